@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Golden-output check and microbenchmark for text_cleaning.clean_ai_text.
+
+Every corpus entry's `expected` value was produced by the original
+regex-chain implementation; the check fails if any output drifts.
+
+Usage: python benchmarks/clean_ai_text_bench.py [repeat]
+"""
+
+import json
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from text_cleaning import clean_ai_text  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "clean_ai_text_corpus.json"
+
+
+def legacy_clean_ai_text(text):
+    """The original implementation, kept for comparison"""
+    if not text:
+        return ""
+    text = re.sub(r'#{1,6}\s*', '', text)
+    text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
+    text = re.sub(r'\*([^*]+)\*', r'\1', text)
+    text = re.sub(r'__([^_]+)__', r'\1', text)
+    text = re.sub(r'_([^_]+)_', r'\1', text)
+    text = re.sub(r'^[-*•]\s*', '• ', text, flags=re.MULTILINE)
+    text = re.sub(r'```[\s\S]*?```', '', text)
+    text = re.sub(r'`([^`]+)`', r'\1', text)
+    text = re.sub(r'^---+$', '', text, flags=re.MULTILINE)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip()
+
+
+def check_golden(corpus):
+    failures = [c for c in corpus if clean_ai_text(c["input"]) != c["expected"]]
+    for c in failures:
+        print(f"❌ mismatch for input {c['input'][:60]!r}")
+    print(f"{'✅' if not failures else '❌'} golden corpus: {len(corpus) - len(failures)}/{len(corpus)} match")
+    return not failures
+
+
+def bench(name, text, repeat):
+    for label, fn in (("legacy", legacy_clean_ai_text), ("current", clean_ai_text)):
+        seconds = min(timeit.repeat(lambda: fn(text), number=repeat, repeat=5)) / repeat
+        print(f"{name:<14} {label:<8} {len(text):>8} chars  {seconds * 1e6:>10.1f} µs/call")
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    corpus = json.loads(CORPUS.read_text(encoding="utf-8"))
+    ok = check_golden(corpus)
+
+    markdown = max((c["input"] for c in corpus), key=len)
+    plain = legacy_clean_ai_text(markdown)
+    bench("markdown-long", markdown * 50, repeat)
+    bench("plain-long", plain * 50, repeat)
+    bench("short", "Tome o remédio de 8 em 8 horas.", repeat * 50)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
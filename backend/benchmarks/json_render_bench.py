@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Compare the ways a 1000-row list_reminders / list_followups page can be rendered.
+
+  response_model  validated models returned to FastAPI, which re-validates and
+                  serializes them through the route's response_model (the
+                  behaviour before repositories)
+  repository      Repository.to_model (model_validate on the raw row) + TypeAdapter.dump_json
+  fast_json       Repository.to_model + FastJSONResponse (orjson if installed)
+
+All paths must produce the same JSON; the check fails otherwise.
+
+Usage: python benchmarks/json_render_bench.py [rows] [repeat]
+"""
+
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+import fast_json  # noqa: E402
+from fast_json import FastJSONResponse  # noqa: E402
+from models import FollowUpResponse, ReminderResponse  # noqa: E402
+from repositories import FollowUpRepository, ReminderRepository  # noqa: E402
+
+
+class _Db(dict):
+    """Just enough of a database for repositories that are only used to map rows"""
+
+    def __missing__(self, name):
+        return None
+
+
+def reminder_docs(rows: int) -> List[dict]:
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "reminder_id": f"rem_{i:012x}", "patient_id": f"pat_{i % 97:012x}", "appointment_id": f"apt_{i:012x}",
+            "message": "Lembrete: tome a medicação prescrita às 8h e às 20h.", "reminder_type": "email",
+            "scheduled_for": start + timedelta(hours=i), "sent": i % 3 == 0,
+            "sent_at": start + timedelta(hours=i, minutes=1) if i % 3 == 0 else None,
+            "created_at": start + timedelta(minutes=i), "version": 1, "updated_at": start
+        }
+        for i in range(rows)
+    ]
+
+
+def followup_docs(rows: int) -> List[dict]:
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "followup_id": f"fup_{i:012x}", "patient_id": f"pat_{i % 97:012x}", "patient_name": f"Paciente {i % 97}",
+            "appointment_id": f"apt_{i:012x}", "follow_up_date": start + timedelta(days=i % 30),
+            "reason": "Retorno pós-operatório", "notes": None, "completed": i % 4 == 0,
+            "created_at": start + timedelta(minutes=i), "version": 1, "updated_at": start
+        }
+        for i in range(rows)
+    ]
+
+
+def validated_models(model, docs):
+    """What the hand-written *_from_doc mappers did: a fully validated model per row"""
+    return [model(**{name: doc.get(name) for name in model.model_fields if name in doc}) for doc in docs]
+
+
+async def render_response_model(model, docs) -> bytes:
+    field = create_response_field(name="response", type_=List[model])
+    content = await serialize_response(field=field, response_content=validated_models(model, docs), is_coroutine=True)
+    return JSONResponse(content).body
+
+
+async def render_repository(repo, docs) -> bytes:
+    return repo.dump_json([repo.to_model(doc) for doc in docs])
+
+
+async def render_fast_json(repo, docs) -> bytes:
+    return FastJSONResponse([repo.to_model(doc) for doc in docs]).body
+
+
+PATHS = (("response_model", render_response_model), ("repository", render_repository),
+         ("fast_json", render_fast_json))
+
+
+async def bench(name, model, repo, docs, repeat) -> bool:
+    outputs = {}
+    for label, render in PATHS:
+        target = model if label == "response_model" else repo
+        outputs[label] = json.loads(await render(target, docs))
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await render(target, docs)
+            timings.append(time.perf_counter() - start)
+        print(f"{name:<10} {label:<15} {len(docs):>6} rows  {min(timings) * 1e3:>8.2f} ms/page")
+    ok = all(output == outputs["response_model"] for output in outputs.values())
+    print(f"{'✅' if ok else '❌'} {name}: all paths produce identical JSON")
+    return ok
+
+
+async def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print(f"orjson: {'installed' if fast_json.orjson else 'not installed (json fallback)'}")
+    db = _Db()
+    ok = await bench("reminders", ReminderResponse, ReminderRepository(db), reminder_docs(rows), repeat)
+    ok &= await bench("followups", FollowUpResponse, FollowUpRepository(db), followup_docs(rows), repeat)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+Async load benchmark for the CareFollow API.
+
+Seeds a scratch database, runs the app in-process (httpx ASGITransport, with
+the app's own startup/shutdown), then drives each endpoint in turn at the
+requested concurrency. The LLM and ElevenLabs are replaced by stubs with
+configurable latency, and the OAuth session service by an httpx mock
+transport. GET /api/admin/slow-requests/{id} only runs when the slow-request
+log has entries (SLOW_REQUEST_PROFILING=true), and DELETE /api/instructions/{id}
+runs last since it consumes the seeded instructions. Per endpoint it reports status counts, p50/p95/p99
+latency, throughput and, against a real mongod, the Mongo commands issued
+per request (pymongo command monitoring; mongomock has none).
+
+Usage:
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/load_bench.py
+    python benchmarks/load_bench.py --mongomock --patients 200 --requests 100
+    python benchmarks/load_bench.py --only "GET /api/reminders" --concurrency 64 --output report.json
+
+The scratch database (carefollow_bench_<random> unless --db-name is given)
+is dropped afterwards unless --keep-db is passed.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+from pymongo import monitoring
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+BENCH_PASSWORD = "bench123"
+LATENCY_PERCENTILES = (50, 95, 99)
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts Mongo commands by name; callbacks arrive on Motor's worker threads"""
+
+    def __init__(self):
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        with self._lock:
+            self.counts[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def snapshot(self) -> Counter:
+        with self._lock:
+            return Counter(self.counts)
+
+
+class StubChat:
+    """Stands in for LlmChat: streams a fixed markdown reply after a configurable delay"""
+
+    latency = 0.0
+    reply = (
+        "CUIDADOS GERAIS\n\n**Repouso** por 24 horas, [PACIENTE].\n\n"
+        "MEDICAÇÕES\n\n1. Analgésico de 8 em 8 horas\n\n"
+        "SINAIS DE ALERTA\n\n- Febre acima de 38°C\n\nRETORNO\n\nEm 7 dias."
+    )
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def with_model(self, *args):
+        return self
+
+    async def send_message(self, message):
+        await asyncio.sleep(self.latency)
+        return self.reply
+
+    async def stream_message(self, message):
+        parts = self.reply.split("\n\n")
+        for part in parts:
+            await asyncio.sleep(self.latency / len(parts))
+            yield part + "\n\n"
+
+
+class NoGridFSBucket:
+    """Placeholder bucket for --mongomock runs, where no scenario touches audio"""
+
+    def __init__(self, db, bucket_name: str = "fs"):
+        pass
+
+
+class StubUserMessage:
+    def __init__(self, text: str):
+        self.text = text
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def configure_environment(args) -> Optional[CommandCounter]:
+    """Must run before `server` is imported: it reads its configuration at import time"""
+    os.environ["DB_NAME"] = args.db_name
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ["JOB_QUEUE_BACKEND"] = "local"
+    os.environ["REMINDER_DISPATCHER_ENABLED"] = "false"
+    os.environ.pop("METRICS_TOKEN", None)
+    if args.mongomock:
+        try:
+            import motor.motor_asyncio as motor_asyncio
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--mongomock needs `pip install mongomock-motor`")
+        motor_asyncio.AsyncIOMotorClient = lambda *a, **kw: AsyncMongoMockClient(tz_aware=kw.get("tz_aware", False))
+        # GridFS is not emulated, so audio is left out of generation and of the scenarios
+        motor_asyncio.AsyncIOMotorGridFSBucket = NoGridFSBucket
+        os.environ.pop("ELEVENLABS_API_KEY", None)
+        return None
+    os.environ["ELEVENLABS_API_KEY"] = "bench-stub"
+    counter = CommandCounter()
+    monitoring.register(counter)
+    return counter
+
+
+def stub_providers(server, llm_latency: float, tts_latency: float):
+    StubChat.latency = llm_latency
+
+    def render_audio(text: str) -> bytes:
+        time.sleep(tts_latency)
+        return b"ID3" + text.encode("utf-8")[:2048]
+
+    def session_data(request: httpx.Request) -> httpx.Response:
+        session_id = request.headers["X-Session-ID"]
+        return httpx.Response(200, json={"email": f"{session_id}@example.com", "name": "OAuth User"})
+
+    server.LlmChat = StubChat
+    server.UserMessage = StubUserMessage
+    server.render_audio = render_audio
+    server.http_clients.register("auth", "http://auth.stub", transport=httpx.MockTransport(session_data))
+
+
+async def insert_chunked(collection, docs: List[dict], chunk: int = 1000):
+    for i in range(0, len(docs), chunk):
+        await collection.insert_many(docs[i:i + chunk], ordered=False)
+
+
+async def seed(server, args, with_audio: bool) -> dict:
+    """Insert the configured volumes directly (same document shapes as the API writes)"""
+    from passwords import hash_password
+    from versioning import initial_version
+
+    db = server.db
+    rng = random.Random(args.seed)
+    now = datetime.now(timezone.utc)
+    password = hash_password(BENCH_PASSWORD)
+    staff = {
+        "user_id": "user_benchstaff", "email": "staff@example.com", "password": password, "name": "Bench Staff",
+        "role": "staff", "phone": None, "created_at": now
+    }
+    patients, users, appointments, instructions, reminders, followups = [], [], [], [], [], []
+    for p in range(args.patients):
+        patient_id = f"pat_{uuid.uuid4().hex[:12]}"
+        created = now - timedelta(minutes=args.patients - p)
+        patients.append({
+            "patient_id": patient_id, "name": f"Paciente {p}", "email": f"patient{p}@example.com",
+            "phone": f"+55119{p:08d}", "birth_date": "1980-01-01", "notes": None, "created_at": created,
+            "created_by": staff["user_id"], **initial_version(created)
+        })
+        users.append({
+            "user_id": f"user_{uuid.uuid4().hex[:12]}", "email": f"patient{p}@example.com", "password": password,
+            "name": f"Paciente {p}", "role": "patient", "phone": None, "patient_id": patient_id, "created_at": created
+        })
+        for a in range(args.appointments_per_patient):
+            appointment_id = f"apt_{uuid.uuid4().hex[:12]}"
+            appointments.append({
+                "appointment_id": appointment_id, "patient_id": patient_id, "procedure": rng.choice(
+                    ["Extração dentária", "Sutura", "Curativo", "Biópsia"]), "diagnosis": "Avaliação de rotina",
+                "notes": None, "appointment_date": created.isoformat(), "created_at": created,
+                "created_by": staff["user_id"], **initial_version(created)
+            })
+            for _ in range(args.instructions_per_appointment):
+                instructions.append({
+                    "instruction_id": f"ins_{uuid.uuid4().hex[:12]}", "appointment_id": appointment_id,
+                    "patient_id": patient_id, "text_content": StubChat.reply.replace("[PACIENTE]", f"Paciente {p}"),
+                    "audio_blob": None, "created_at": created, **initial_version(created)
+                })
+        for r in range(args.reminders_per_patient):
+            scheduled = now + timedelta(hours=rng.randint(-72, 72))
+            sent = scheduled < now
+            reminders.append({
+                "reminder_id": f"rem_{uuid.uuid4().hex[:12]}", "patient_id": patient_id, "appointment_id": None,
+                "message": "Lembrete de medicação", "reminder_type": rng.choice(["email", "sms", "whatsapp"]),
+                "scheduled_for": scheduled, "sent": sent, "sent_at": scheduled if sent else None,
+                "created_at": created, **initial_version(created)
+            })
+        for f in range(args.followups_per_patient):
+            followups.append({
+                "followup_id": f"fup_{uuid.uuid4().hex[:12]}", "patient_id": patient_id, "appointment_id": None,
+                "follow_up_date": now + timedelta(days=rng.randint(-10, 30)), "reason": "Retorno",
+                "notes": None, "completed": rng.random() < 0.3, "created_at": created, **initial_version(created)
+            })
+
+    if with_audio and instructions:
+        digest = await server.audio_store.put(b"ID3" + b"\0" * 64 * 1024, "audio/mpeg")
+        for ins in instructions[::4]:
+            ins["audio_blob"] = digest
+
+    await db.users.insert_one(staff)
+    for collection, docs in (("patients", patients), ("users", users), ("appointments", appointments),
+                             ("care_instructions", instructions), ("reminders", reminders),
+                             ("followups", followups)):
+        if docs:
+            await insert_chunked(db[collection], docs)
+    await server.dashboard_counters.recompute()
+
+    return {
+        "staff_token": server.create_token(staff["user_id"], "staff", staff),
+        "patient_tokens": [server.create_token(u["user_id"], "patient", u) for u in users[:50]],
+        "patient_ids": [p["patient_id"] for p in patients],
+        "appointment_ids": [a["appointment_id"] for a in appointments],
+        "instruction_ids": [i["instruction_id"] for i in instructions],
+        "audio_instruction_ids": [i["instruction_id"] for i in instructions if i["audio_blob"]],
+        "followup_ids": [f["followup_id"] for f in followups],
+        "job_ids": [],
+        "slow_request_ids": [],
+        "sequence": 0,
+        "bulk_rows": args.bulk_rows,
+    }
+
+
+def bulk_csv(fixture: dict) -> bytes:
+    rows = fixture["bulk_rows"]
+    fixture["sequence"] += 1
+    lines = ["name,email,phone"] + [
+        f"Importado {fixture['sequence']}-{i},bulk{fixture['sequence']}-{i}@example.com,+5511900000000"
+        for i in range(rows)
+    ]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def bulk_appointments_csv(fixture: dict) -> bytes:
+    lines = ["patient_id,procedure,diagnosis"] + [
+        f"{random.choice(fixture['patient_ids'])},Curativo,Importado" for _ in range(fixture["bulk_rows"])
+    ]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def next_instruction_to_delete(fixture: dict) -> str:
+    """Each delete takes a seeded instruction nobody deleted yet; once they run out the 404s show as errors"""
+    ids = fixture["instruction_ids"]
+    return ids.pop() if ids else "ins_missing"
+
+
+def new_email(fixture: dict) -> str:
+    fixture["sequence"] += 1
+    return f"new{fixture['sequence']}@example.com"
+
+
+# (name, request builder, accepted status codes). Builders return (method, url, kwargs, token role).
+Scenario = tuple
+
+
+def scenarios(with_audio: bool) -> List[Scenario]:
+    pick = random.choice
+    items = [
+        ("GET /health", lambda f: ("GET", "/health", {}, None), (200,)),
+        ("GET /ready", lambda f: ("GET", "/ready", {}, None), (200,)),
+        ("GET /metrics", lambda f: ("GET", "/metrics", {}, None), (200,)),
+        ("GET /api/", lambda f: ("GET", "/api/", {}, None), (200,)),
+        ("POST /api/auth/register", lambda f: ("POST", "/api/auth/register", {"json": {
+            "email": new_email(f), "password": BENCH_PASSWORD, "name": "Nova Equipe"}}, None), (200,)),
+        ("POST /api/auth/login", lambda f: (
+            "POST", "/api/auth/login", {"json": {"email": "staff@example.com", "password": BENCH_PASSWORD}}, None),
+         (200,)),
+        ("GET /api/auth/me", lambda f: ("GET", "/api/auth/me", {}, "staff"), (200,)),
+        ("GET /api/auth/session", lambda f: (
+            "GET", f"/api/auth/session?session_id=sess{uuid.uuid4().hex[:12]}", {}, None), (200,)),
+        ("GET /api/dashboard/stats", lambda f: ("GET", "/api/dashboard/stats", {}, "staff"), (200,)),
+        ("GET /api/patients", lambda f: ("GET", "/api/patients?limit=100", {}, "staff"), (200,)),
+        ("GET /api/patients?stream", lambda f: ("GET", "/api/patients?stream=true", {}, "staff"), (200,)),
+        ("GET /api/patients/{id}", lambda f: (
+            "GET", f"/api/patients/{pick(f['patient_ids'])}", {}, "staff"), (200,)),
+        ("POST /api/patients", lambda f: ("POST", "/api/patients", {"json": {
+            "name": "Novo Paciente", "email": new_email(f), "phone": "+5511900000000"}}, "staff"), (200,)),
+        ("POST /api/patients/bulk", lambda f: ("POST", "/api/patients/bulk", {
+            "files": {"file": ("patients.csv", bulk_csv(f), "text/csv")}}, "staff"), (200,)),
+        ("GET /api/appointments", lambda f: ("GET", "/api/appointments?limit=100", {}, "staff"), (200,)),
+        ("GET /api/appointments?stream", lambda f: ("GET", "/api/appointments?stream=true", {}, "staff"), (200,)),
+        ("GET /api/appointments?patient_id", lambda f: (
+            "GET", f"/api/appointments?patient_id={pick(f['patient_ids'])}", {}, "staff"), (200,)),
+        ("GET /api/appointments/{id}", lambda f: (
+            "GET", f"/api/appointments/{pick(f['appointment_ids'])}", {}, "staff"), (200,)),
+        ("POST /api/appointments", lambda f: ("POST", "/api/appointments", {"json": {
+            "patient_id": pick(f["patient_ids"]), "procedure": "Sutura", "diagnosis": "Corte superficial"}},
+            "staff"), (200,)),
+        ("POST /api/appointments/bulk", lambda f: ("POST", "/api/appointments/bulk", {
+            "files": {"file": ("appointments.csv", bulk_appointments_csv(f), "text/csv")}}, "staff"), (200,)),
+        ("GET /api/instructions", lambda f: ("GET", "/api/instructions?limit=100", {}, "staff"), (200,)),
+        ("GET /api/instructions?stream", lambda f: ("GET", "/api/instructions?stream=true", {}, "staff"), (200,)),
+        ("GET /api/instructions/{id}", lambda f: (
+            "GET", f"/api/instructions/{pick(f['instruction_ids'])}", {}, "staff"), (200,)),
+        ("POST /api/instructions/generate", lambda f: ("POST", "/api/instructions/generate", {"json": {
+            "appointment_id": pick(f["appointment_ids"]), "generate_audio": with_audio}}, "staff"), (202,)),
+        ("GET /api/instructions/jobs/{id}", lambda f: (
+            "GET", f"/api/instructions/jobs/{pick(f['job_ids'])}", {}, "staff"), (200,)),
+        ("POST /api/instructions/generate/stream", lambda f: ("POST", "/api/instructions/generate/stream", {
+            "json": {"appointment_id": pick(f["appointment_ids"]), "generate_audio": False}}, "staff"), (200,)),
+        ("GET /api/reminders", lambda f: ("GET", "/api/reminders?limit=100", {}, "staff"), (200,)),
+        ("GET /api/reminders?stream", lambda f: ("GET", "/api/reminders?stream=true", {}, "staff"), (200,)),
+        ("POST /api/reminders", lambda f: ("POST", "/api/reminders", {"json": {
+            "patient_id": pick(f["patient_ids"]), "message": "Tomar medicação",
+            "scheduled_for": (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()}}, "staff"), (200,)),
+        ("GET /api/followups", lambda f: ("GET", "/api/followups?limit=100", {}, "staff"), (200,)),
+        ("GET /api/followups?stream", lambda f: ("GET", "/api/followups?stream=true", {}, "staff"), (200,)),
+        ("POST /api/followups", lambda f: ("POST", "/api/followups", {"json": {
+            "patient_id": pick(f["patient_ids"]), "reason": "Retorno",
+            "follow_up_date": (datetime.now(timezone.utc) + timedelta(days=7)).isoformat()}}, "staff"), (200,)),
+        ("PATCH /api/followups/{id}/complete", lambda f: (
+            "PATCH", f"/api/followups/{pick(f['followup_ids'])}/complete", {}, "staff"), (200,)),
+        ("GET /api/patient/portal", lambda f: ("GET", "/api/patient/portal", {}, "patient"), (200,)),
+        ("GET /api/export?collections=patients", lambda f: (
+            "GET", "/api/export?collections=patients", {}, "staff"), (200,)),
+        ("GET /api/admin/slow-requests", lambda f: ("GET", "/api/admin/slow-requests", {}, "staff"), (200,)),
+        ("GET /api/admin/slow-requests/{id}", lambda f: (
+            "GET", f"/api/admin/slow-requests/{pick(f['slow_request_ids'])}", {}, "staff"), (200,)),
+    ]
+    if with_audio:
+        items.append(("GET /api/instructions/{id}/audio", lambda f: (
+            "GET", f"/api/instructions/{pick(f['audio_instruction_ids'])}/audio", {}, "staff"), (200,)))
+    items.append(("DELETE /api/instructions/{id}", lambda f: (
+        "DELETE", f"/api/instructions/{next_instruction_to_delete(f)}", {}, "staff"), (200,)))
+    return items
+
+
+async def run_scenario(client: httpx.AsyncClient, fixture: dict, scenario: Scenario, requests: int,
+                       concurrency: int, counter: Optional[CommandCounter]) -> dict:
+    name, build, accepted = scenario
+    latencies: List[float] = []
+    statuses = Counter()
+    queue = iter(range(requests))
+
+    async def worker():
+        for _ in queue:
+            method, url, kwargs, role = build(fixture)
+            token = fixture["staff_token"] if role == "staff" else (
+                random.choice(fixture["patient_tokens"]) if role == "patient" else None)
+            headers = {"Authorization": f"Bearer {token}"} if token else {}
+            start = time.perf_counter()
+            response = await client.request(method, url, headers=headers, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+            if name == "POST /api/instructions/generate" and response.status_code == 202:
+                fixture["job_ids"].append(response.json()["job_id"])
+
+    before = counter.snapshot() if counter else None
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    result = {
+        "requests": requests,
+        "errors": sum(n for status, n in statuses.items() if status not in accepted),
+        "status": {str(status): n for status, n in sorted(statuses.items())},
+        "latency_ms": {f"p{p}": round(percentile(latencies, p) * 1e3, 2) for p in LATENCY_PERCENTILES},
+        "throughput_rps": round(requests / elapsed, 1) if elapsed else None,
+        "mongo_ops_per_request": None,
+        "mongo_commands": None,
+    }
+    result["latency_ms"]["max"] = round(latencies[-1] * 1e3, 2) if latencies else 0.0
+    if counter:
+        delta = counter.snapshot() - before
+        result["mongo_ops_per_request"] = round(sum(delta.values()) / requests, 2)
+        result["mongo_commands"] = dict(delta.most_common())
+    return result
+
+
+async def wait_for_jobs(server, job_ids: List[str], timeout: float = 120.0):
+    """Let queued generations finish so their Mongo traffic is not billed to the next endpoint"""
+    deadline = time.monotonic() + timeout
+    pending = list(job_ids)
+    while pending and time.monotonic() < deadline:
+        jobs = await asyncio.gather(*(server.generation_queue.get(job_id) for job_id in pending))
+        pending = [job["job_id"] for job in jobs if job and job["status"] not in ("done", "failed")]
+        if pending:
+            await asyncio.sleep(0.05)
+
+
+async def main(args):
+    counter = configure_environment(args)
+    import server
+
+    stub_providers(server, args.llm_latency_ms / 1000, args.tts_latency_ms / 1000)
+    with_audio = not args.mongomock
+    report = {
+        "backend": "mongomock" if args.mongomock else os.environ["MONGO_URL"],
+        "config": {key: value for key, value in vars(args).items() if key not in ("output",)},
+        "seeded": None,
+        "results": {},
+    }
+    async with server.app.router.lifespan_context(server.app):
+        try:
+            await server.client.drop_database(args.db_name)
+            seeded_at = time.perf_counter()
+            fixture = await seed(server, args, with_audio)
+            report["seeded"] = {
+                "patients": len(fixture["patient_ids"]),
+                "appointments": len(fixture["appointment_ids"]),
+                "instructions": len(fixture["instruction_ids"]),
+                "seconds": round(time.perf_counter() - seeded_at, 2),
+            }
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                for scenario in scenarios(with_audio):
+                    name = scenario[0]
+                    if args.only and not any(pattern in name for pattern in args.only):
+                        continue
+                    if name == "GET /api/instructions/jobs/{id}" and not fixture["job_ids"]:
+                        continue
+                    if name == "GET /api/admin/slow-requests/{id}":
+                        fixture["slow_request_ids"] = [e["id"] for e in server.slow_request_log.list(500)]
+                        if not fixture["slow_request_ids"]:
+                            continue
+                    result = await run_scenario(client, fixture, scenario, args.requests, args.concurrency, counter)
+                    if name == "POST /api/instructions/generate":
+                        await wait_for_jobs(server, fixture["job_ids"])
+                    report["results"][name] = result
+                    print(f"{name:<42} p50 {result['latency_ms']['p50']:>8.2f} ms  "
+                          f"p99 {result['latency_ms']['p99']:>8.2f} ms  {result['throughput_rps']:>8} rps  "
+                          f"errors {result['errors']}", file=sys.stderr)
+        finally:
+            if not args.keep_db:
+                await server.client.drop_database(args.db_name)
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        Path(args.output).write_text(output)
+    else:
+        print(output)
+    failed = [name for name, result in report["results"].items() if result["errors"]]
+    sys.exit(1 if failed and args.fail_on_errors else 0)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load benchmark for the CareFollow API")
+    parser.add_argument("--mongomock", action="store_true", help="use mongomock-motor instead of MONGO_URL")
+    parser.add_argument("--db-name", default=f"carefollow_bench_{uuid.uuid4().hex[:6]}")
+    parser.add_argument("--keep-db", action="store_true", help="do not drop the scratch database afterwards")
+    parser.add_argument("--patients", type=int, default=500)
+    parser.add_argument("--appointments-per-patient", type=int, default=3)
+    parser.add_argument("--instructions-per-appointment", type=int, default=1)
+    parser.add_argument("--reminders-per-patient", type=int, default=4)
+    parser.add_argument("--followups-per-patient", type=int, default=2)
+    parser.add_argument("--bulk-rows", type=int, default=20, help="CSV rows per bulk import request")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--llm-latency-ms", type=float, default=50, help="stubbed LLM completion time")
+    parser.add_argument("--tts-latency-ms", type=float, default=20, help="stubbed ElevenLabs render time")
+    parser.add_argument("--only", action="append", help="run endpoints whose name contains this (repeatable)")
+    parser.add_argument("--seed", type=int, default=7, help="random seed for the generated data")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--fail-on-errors", action="store_true", help="exit 1 if any endpoint returned errors")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Round-trip benchmark for patient-name resolution on list endpoints.
+
+Seeds a scratch database on a local mongod and compares the old
+one-find_one-per-row lookup with the batched $in join from joins.py.
+
+Usage: MONGO_URL=mongodb://localhost:27017 python benchmarks/patient_join_roundtrips.py [rows]
+"""
+
+import asyncio
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from joins import attach_patient_names  # noqa: E402
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def seed(db, rows, patients):
+    patient_ids = [f"pat_{uuid.uuid4().hex[:12]}" for _ in range(patients)]
+    await db.patients.insert_many([
+        {"patient_id": pid, "name": f"Paciente {i}"} for i, pid in enumerate(patient_ids)
+    ])
+    await db.appointments.insert_many([
+        {"appointment_id": f"apt_{uuid.uuid4().hex[:12]}", "patient_id": patient_ids[i % patients]}
+        for i in range(rows)
+    ])
+
+
+async def per_row(db):
+    appointments = await db.appointments.find({}, {"_id": 0}).to_list(None)
+    for a in appointments:
+        patient = await db.patients.find_one({"patient_id": a["patient_id"]}, {"_id": 0, "name": 1})
+        a["patient_name"] = patient["name"] if patient else None
+    return appointments
+
+
+async def batched(db):
+    appointments = await db.appointments.find({}, {"_id": 0}).to_list(None)
+    return await attach_patient_names(db, appointments)
+
+
+async def measure(name, fn, db, counter):
+    counter.count = 0
+    start = time.perf_counter()
+    docs = await fn(db)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{name:<10} rows={len(docs):<6} round_trips={counter.count:<6} time={elapsed:.1f}ms")
+    return docs
+
+
+async def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"), event_listeners=[counter])
+    db_name = f"carefollow_bench_{uuid.uuid4().hex[:8]}"
+    db = client[db_name]
+    try:
+        await seed(db, rows, max(1, rows // 10))
+        before = await measure("per-row", per_row, db, counter)
+        after = await measure("batched", batched, db, counter)
+        assert [d["patient_name"] for d in before] == [d["patient_name"] for d in after]
+    finally:
+        await client.drop_database(db_name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
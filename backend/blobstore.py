@@ -0,0 +1,84 @@
+"""Content-addressed binary storage on GridFS (used for care-instruction audio)"""
+import hashlib
+from typing import AsyncIterator, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+READ_CHUNK_SIZE = 256 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class BlobStore:
+    """Stores each distinct payload once under its SHA-256 digest"""
+
+    def __init__(self, db, bucket_name: str = "blobs"):
+        self.db = db
+        self.bucket_name = bucket_name
+        self._bucket: Optional[AsyncIOMotorGridFSBucket] = None
+        self.files = db[f"{bucket_name}.files"]
+
+    @property
+    def bucket(self) -> AsyncIOMotorGridFSBucket:
+        # Created on first use: building a GridFS bucket binds the Motor client to the
+        # current event loop, which at import time is not the loop that will serve requests
+        if self._bucket is None:
+            self._bucket = AsyncIOMotorGridFSBucket(self.db, bucket_name=self.bucket_name)
+        return self._bucket
+
+    async def put(self, data: bytes, content_type: str) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        if not await self.files.find_one({"filename": digest}, {"_id": 1}):
+            await self.bucket.upload_from_stream(digest, data, metadata={"content_type": content_type})
+        return digest
+
+    async def stat(self, digest: str) -> Optional[dict]:
+        doc = await self.files.find_one({"filename": digest}, {"length": 1, "metadata": 1})
+        if not doc:
+            return None
+        return {"length": doc["length"], "content_type": (doc.get("metadata") or {}).get("content_type")}
+
+    async def read(self, digest: str) -> Optional[bytes]:
+        if not await self.files.find_one({"filename": digest}, {"_id": 1}):
+            return None
+        grid_out = await self.bucket.open_download_stream_by_name(digest)
+        return await grid_out.read()
+
+    async def read_range(self, digest: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield bytes start..end (inclusive) without loading the whole blob"""
+        grid_out = await self.bucket.open_download_stream_by_name(digest)
+        grid_out.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await grid_out.read(min(READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def parse_range(header: Optional[str], length: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=` Range header into an inclusive (start, end) pair.
+
+    Returns None when the whole resource should be sent (no header, or a form
+    we don't serve such as multiple ranges).
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_s, _, end_s = header[len("bytes="):].strip().partition("-")
+    try:
+        if start_s:
+            start = int(start_s)
+            end = min(int(end_s), length - 1) if end_s else length - 1
+        else:
+            suffix = int(end_s)
+            if suffix == 0:
+                raise RangeNotSatisfiable(header)
+            start, end = max(length - suffix, 0), length - 1
+    except ValueError:
+        return None
+    if start >= length or start > end:
+        raise RangeNotSatisfiable(header)
+    return start, end
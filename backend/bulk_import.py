@@ -0,0 +1,98 @@
+"""
+Row streaming and error reporting for bulk CSV/NDJSON imports.
+
+Uploads are read one batch at a time (`read_batch` runs in the I/O pool), so
+memory stays bounded by the batch size whatever the file size. Every problem
+is reported against the row it came from: the physical line number for
+NDJSON, the data row number (header excluded) for CSV.
+"""
+import csv
+import io
+import json
+import os
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+BATCH_SIZE = int(os.environ.get('BULK_IMPORT_BATCH_SIZE', '500'))
+
+# (row number, parsed row or None, parse error or None)
+Row = Tuple[int, Optional[dict], Optional[str]]
+
+
+def detect_format(explicit: Optional[str], filename: Optional[str], content_type: Optional[str]) -> str:
+    if explicit:
+        return explicit
+    if (filename or "").lower().endswith(".csv") or (content_type or "").startswith("text/csv"):
+        return "csv"
+    return "ndjson"
+
+
+def _csv_rows(text) -> Iterator[Row]:
+    for number, row in enumerate(csv.DictReader(text), start=1):
+        # Columns beyond the header land under None; empty cells mean "not provided"
+        yield number, {k: (v if v != "" else None) for k, v in row.items() if k is not None}, None
+
+
+def _ndjson_rows(text) -> Iterator[Row]:
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield number, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(row, dict):
+            yield number, None, "Expected a JSON object"
+            continue
+        yield number, row, None
+
+
+def iter_rows(fileobj, fmt: str) -> Iterator[Row]:
+    """Lazily parse a binary upload; stops with a row error on invalid UTF-8"""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    number = 0
+    try:
+        for number, row, error in (_csv_rows if fmt == "csv" else _ndjson_rows)(text):
+            yield number, row, error
+    except (UnicodeDecodeError, csv.Error) as e:
+        yield number + 1, None, f"Unreadable input, import stopped here: {e}"
+    finally:
+        # Leave the underlying upload open for its owner to close
+        text.detach()
+
+
+def read_batch(rows: Iterator[Row], size: int = BATCH_SIZE) -> List[Row]:
+    return list(islice(rows, size))
+
+
+def validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in exc.errors()
+    )
+
+
+def write_errors(exc: BulkWriteError) -> dict:
+    """Map the positions of documents rejected by an unordered insert_many to their messages"""
+    return {err["index"]: err.get("errmsg", "write failed") for err in exc.details.get("writeErrors", [])}
+
+
+class ImportReport:
+    def __init__(self):
+        self.total_rows = 0
+        self.inserted = 0
+        self.errors: List[dict] = []
+
+    def fail(self, row: int, error: str):
+        self.errors.append({"row": row, "error": error})
+
+    def to_dict(self) -> dict:
+        return {
+            "total_rows": self.total_rows,
+            "inserted": self.inserted,
+            "failed": len(self.errors),
+            "errors": sorted(self.errors, key=lambda e: e["row"])
+        }
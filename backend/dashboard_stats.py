@@ -0,0 +1,92 @@
+"""
+Materialized dashboard counters.
+
+A single `counters` document holds the totals shown on the staff dashboard.
+Write endpoints adjust it with $inc, so reading the stats is one find_one
+instead of five count_documents scans. If the document is missing it is
+rebuilt from the collections (the counts run concurrently).
+
+Every $inc also bumps the document's `version`. A rebuild only writes its
+counts if the version is unchanged since before it started counting, so an
+increment that lands while the counts run is never overwritten. The API
+process also rebuilds periodically (DASHBOARD_RECONCILE_SECONDS) to correct
+any drift, e.g. from writes made outside the API.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_ID = "dashboard"
+RECOMPUTE_ATTEMPTS = 3
+
+# counter name -> (collection, filter) used when rebuilding from scratch
+COUNTER_SOURCES = {
+    "total_patients": ("patients", {}),
+    "total_appointments": ("appointments", {}),
+    "total_instructions": ("care_instructions", {}),
+    "pending_followups": ("followups", {"completed": False}),
+    "pending_reminders": ("reminders", {"sent": False, "failed": {"$ne": True}}),
+}
+
+
+class DashboardCounters:
+    def __init__(self, db):
+        self.db = db
+        self._task: Optional[asyncio.Task] = None
+
+    async def bump(self, **deltas: int):
+        """Apply increments; a missing document is left for the next read to rebuild"""
+        await self.db.counters.update_one({"_id": COUNTERS_ID}, {"$inc": {**deltas, "version": 1}})
+
+    async def read(self) -> dict:
+        doc = await self.db.counters.find_one({"_id": COUNTERS_ID}, {"_id": 0})
+        if doc is None:
+            return await self.recompute()
+        return {name: doc.get(name, 0) for name in COUNTER_SOURCES}
+
+    async def recompute(self) -> dict:
+        """Rebuild from the collections, retrying when an increment races the counts"""
+        for _ in range(RECOMPUTE_ATTEMPTS):
+            current = await self.db.counters.find_one({"_id": COUNTERS_ID}, {"_id": 0, "version": 1})
+            counts = await asyncio.gather(*(
+                self.db[collection].count_documents(query) for collection, query in COUNTER_SOURCES.values()
+            ))
+            values = dict(zip(COUNTER_SOURCES, counts))
+            if current is None:
+                try:
+                    await self.db.counters.insert_one({"_id": COUNTERS_ID, **values, "version": 1})
+                    return values
+                except DuplicateKeyError:
+                    continue
+            # A document written before versioning has no `version`; None matches it
+            result = await self.db.counters.update_one(
+                {"_id": COUNTERS_ID, "version": current.get("version")},
+                {"$set": values, "$inc": {"version": 1}}
+            )
+            if result.matched_count:
+                return values
+        logger.warning(f"Dashboard counters changed during {RECOMPUTE_ATTEMPTS} rebuilds; keeping the stored values")
+        return values
+
+    async def reconcile_forever(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.recompute()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Dashboard counter reconciliation failed: {e}")
+
+    def start(self, interval: float):
+        self._task = asyncio.create_task(self.reconcile_forever(interval))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,149 @@
+"""
+Motor client configuration and connection-pool monitoring.
+
+Client options come from the environment; anything left unset keeps the
+driver default (or whatever MONGO_URL itself specifies):
+
+    MONGO_MAX_POOL_SIZE                maxPoolSize (driver default 100)
+    MONGO_MIN_POOL_SIZE                minPoolSize
+    MONGO_MAX_IDLE_TIME_MS             maxIdleTimeMS
+    MONGO_MAX_CONNECTING               maxConnecting
+    MONGO_WAIT_QUEUE_TIMEOUT_MS        waitQueueTimeoutMS
+    MONGO_CONNECT_TIMEOUT_MS           connectTimeoutMS
+    MONGO_SOCKET_TIMEOUT_MS            socketTimeoutMS
+    MONGO_SERVER_SELECTION_TIMEOUT_MS  serverSelectionTimeoutMS
+    MONGO_TIMEOUT_MS                   timeoutMS (client-side operation timeout)
+    MONGO_READ_PREFERENCE              e.g. primaryPreferred, secondaryPreferred
+    MONGO_COMPRESSORS                  e.g. "zstd,zlib" (zstd/snappy need their packages)
+    MONGO_APP_NAME                     appname shown in server logs (default carefollow)
+
+Every worker process has its own pool, so the server sees up to
+workers x MONGO_MAX_POOL_SIZE connections from one deployment.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from pymongo import monitoring
+from pymongo.common import MAX_POOL_SIZE
+
+CLIENT_OPTION_ENV = {
+    "MONGO_MAX_POOL_SIZE": ("maxPoolSize", int),
+    "MONGO_MIN_POOL_SIZE": ("minPoolSize", int),
+    "MONGO_MAX_IDLE_TIME_MS": ("maxIdleTimeMS", int),
+    "MONGO_MAX_CONNECTING": ("maxConnecting", int),
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": ("waitQueueTimeoutMS", int),
+    "MONGO_CONNECT_TIMEOUT_MS": ("connectTimeoutMS", int),
+    "MONGO_SOCKET_TIMEOUT_MS": ("socketTimeoutMS", int),
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": ("serverSelectionTimeoutMS", int),
+    "MONGO_TIMEOUT_MS": ("timeoutMS", int),
+    "MONGO_READ_PREFERENCE": ("readPreference", str),
+    "MONGO_COMPRESSORS": ("compressors", str),
+}
+
+
+def client_options(environ=os.environ) -> dict:
+    """Keyword arguments for AsyncIOMotorClient (event listeners are added by the caller)"""
+    options = {"tz_aware": True, "appname": environ.get("MONGO_APP_NAME", "carefollow")}
+    for env_name, (option, parse) in CLIENT_OPTION_ENV.items():
+        value = environ.get(env_name)
+        if value:
+            options[option] = parse(value)
+    return options
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks open, checked-out and waiting connections per server"""
+
+    def __init__(self):
+        self._pools: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _address(event) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+
+    def _update(self, event, **deltas):
+        with self._lock:
+            pool = self._pools.get(self._address(event))
+            if pool is None:
+                return
+            for field, delta in deltas.items():
+                pool[field] += delta
+
+    def pool_created(self, event):
+        with self._lock:
+            self._pools[self._address(event)] = {
+                "max_size": event.options.get("maxPoolSize", MAX_POOL_SIZE),
+                "open": 0, "checked_out": 0, "waiting": 0, "check_out_failures": 0, "cleared": 0
+            }
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._update(event, cleared=1)
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._pools.pop(self._address(event), None)
+
+    def connection_created(self, event):
+        self._update(event, open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._update(event, open=-1)
+
+    def connection_check_out_started(self, event):
+        self._update(event, waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._update(event, waiting=-1, check_out_failures=1)
+
+    def connection_checked_out(self, event):
+        self._update(event, waiting=-1, checked_out=1)
+
+    def connection_checked_in(self, event):
+        self._update(event, checked_out=-1)
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            pools = {address: dict(pool) for address, pool in self._pools.items()}
+        for pool in pools.values():
+            # maxPoolSize=0 means unbounded, which never saturates
+            pool["saturation"] = round(pool["checked_out"] / pool["max_size"], 3) if pool["max_size"] else 0.0
+        return pools
+
+    def saturated(self, threshold: float) -> bool:
+        """True when some pool is at `threshold` of its size and operations are queuing for it"""
+        return any(
+            pool["saturation"] >= threshold and pool["waiting"] > 0 for pool in self.stats().values()
+        )
+
+
+async def ping(client, timeout: float) -> dict:
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(client.admin.command("ping"), timeout)
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": f"no reply within {timeout:g}s"}
+    except Exception as e:
+        return {"ok": False, "error": f"{type(e).__name__}: {e}"[:300]}
+    return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1e3, 2)}
+
+
+def ready_status(mongo: dict, pool_monitor: PoolMonitor, max_saturation: float, draining: bool) -> Optional[str]:
+    """Reason the instance should not receive traffic, or None when it is ready"""
+    if draining:
+        return "shutting down"
+    if not mongo["ok"]:
+        return "mongo unreachable"
+    if pool_monitor.saturated(max_saturation):
+        return "mongo pool saturated"
+    return None
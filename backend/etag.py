@@ -0,0 +1,84 @@
+"""
+Conditional GET support: strong ETags and 304 Not Modified.
+
+`ETagMiddleware` buffers successful `application/json` GET responses, tags
+them with an ETag (the handler's own if it set one, otherwise a hash of the
+body) and answers a matching `If-None-Match` with an empty 304. Streaming
+responses (NDJSON, SSE, audio) pass through untouched.
+"""
+import hashlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+DEFAULT_CACHE_CONTROL = "private, no-cache"
+
+
+def content_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def version_etag(doc: dict, id_field: str) -> Optional[str]:
+    """ETag derived from a document's revision; None for documents written before versioning"""
+    version = doc.get("version")
+    if version is None:
+        return None
+    return f'"{doc[id_field]}.v{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+class ETagMiddleware:
+    def __init__(self, app, cache_control: str = DEFAULT_CACHE_CONTROL):
+        self.app = app
+        self.cache_control = cache_control
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start = None
+        chunks = []
+        
+        async def send_wrapper(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                content_type = Headers(raw=message["headers"]).get("content-type", "")
+                if message["status"] == 200 and content_type.split(";")[0].strip() == "application/json":
+                    start = message
+                    return
+                await send(message)
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+            
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            headers = MutableHeaders(raw=list(start["headers"]))
+            etag = headers.get("etag") or content_etag(body)
+            headers["etag"] = etag
+            if "cache-control" not in headers:
+                headers["cache-control"] = self.cache_control
+            if etag_matches(if_none_match, etag):
+                del headers["content-length"]
+                del headers["content-type"]
+                await send({**start, "status": 304, "headers": headers.raw})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send({**start, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+        
+        await self.app(scope, receive, send_wrapper)
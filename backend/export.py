@@ -0,0 +1,132 @@
+"""
+Streaming export of the clinic's collections as NDJSON or CSV.
+
+Documents are read straight from Motor cursors and encoded into chunks of
+roughly `CHUNK_BYTES`; the next batch is only pulled from Mongo once the
+previous chunk has been handed to the ASGI server, so memory stays constant
+whatever the collection size. Optional gzip is applied incrementally.
+"""
+import base64
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+CHUNK_BYTES = 64 * 1024
+CURSOR_BATCH_SIZE = 500
+
+# name -> (collection, CSV columns). NDJSON lines carry every stored field.
+EXPORT_COLLECTIONS: Dict[str, tuple] = {
+    "patients": ("patients", [
+        "patient_id", "name", "email", "phone", "birth_date", "notes", "created_at", "created_by",
+        "version", "updated_at"
+    ]),
+    "appointments": ("appointments", [
+        "appointment_id", "patient_id", "procedure", "diagnosis", "notes", "appointment_date", "created_at",
+        "created_by", "version", "updated_at"
+    ]),
+    "instructions": ("care_instructions", [
+        "instruction_id", "appointment_id", "patient_id", "text_content", "audio_blob", "created_at",
+        "version", "updated_at"
+    ]),
+    "reminders": ("reminders", [
+        "reminder_id", "patient_id", "appointment_id", "message", "reminder_type", "scheduled_for", "sent",
+        "sent_at", "failed", "failed_at", "attempts", "last_error", "created_at", "version", "updated_at"
+    ]),
+    "followups": ("followups", [
+        "followup_id", "patient_id", "appointment_id", "follow_up_date", "reason", "notes", "completed",
+        "created_at", "version", "updated_at"
+    ]),
+}
+
+# Internal bookkeeping that is never exported
+_PROJECTION = {"_id": 0, "lease_owner": 0, "lease_until": 0}
+# Legacy instructions embed their audio as a base64 data URL
+_NO_AUDIO_PROJECTION = {**_PROJECTION, "audio_url": 0}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class ExportWriter:
+    """Encodes documents to NDJSON or CSV text and returns output in CHUNK_BYTES pieces"""
+
+    def __init__(self, fmt: str, compress: bool):
+        self.fmt = fmt
+        self._buffer = io.StringIO()
+        self._csv = csv.writer(self._buffer) if fmt == "csv" else None
+        self._gzip = zlib.compressobj(wbits=31) if compress else None
+
+    def header(self, columns: List[str]):
+        self._csv.writerow(columns)
+
+    def write(self, doc: dict, name: str, columns: List[str]):
+        if self._csv:
+            self._csv.writerow([_csv_value(doc.get(column)) for column in columns])
+        else:
+            self._buffer.write(json.dumps({"collection": name, **doc}, default=_json_default, ensure_ascii=False))
+            self._buffer.write("\n")
+
+    def ready(self) -> bool:
+        return self._buffer.tell() >= CHUNK_BYTES
+
+    def drain(self, final: bool = False) -> bytes:
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        if self._gzip:
+            data = self._gzip.compress(data)
+            if final:
+                data += self._gzip.flush()
+        return data
+
+
+async def _instruction_audio(doc: dict, audio_store) -> Optional[str]:
+    if doc.get("audio_blob"):
+        data = await audio_store.read(doc["audio_blob"])
+        return base64.b64encode(data).decode("ascii") if data else None
+    legacy = doc.pop("audio_url", None) or ""
+    if legacy.startswith("data:"):
+        return legacy.split(",", 1)[1]
+    return None
+
+
+async def export_stream(db, names: List[str], fmt: str, compress: bool = False,
+                        include_audio: bool = False, audio_store=None) -> AsyncIterator[bytes]:
+    """Yield the export of `names` (keys of EXPORT_COLLECTIONS) as encoded byte chunks.
+
+    CSV holds a single collection (the caller enforces this); NDJSON tags each
+    line with its collection. With `include_audio`, instructions carry their
+    audio inline as base64 in an `audio` field.
+    """
+    writer = ExportWriter(fmt, compress)
+    for name in names:
+        collection, columns = EXPORT_COLLECTIONS[name]
+        projection = _NO_AUDIO_PROJECTION if name == "instructions" and not include_audio else _PROJECTION
+        with_audio = include_audio and name == "instructions"
+        if with_audio:
+            columns = columns + ["audio"]
+        if fmt == "csv":
+            writer.header(columns)
+        async for doc in db[collection].find({}, projection).batch_size(CURSOR_BATCH_SIZE):
+            if with_audio:
+                doc["audio"] = await _instruction_audio(doc, audio_store)
+            writer.write(doc, name, columns)
+            if writer.ready():
+                yield writer.drain()
+    tail = writer.drain(final=True)
+    if tail:
+        yield tail
@@ -0,0 +1,49 @@
+"""
+Fast JSON rendering for content the server built itself.
+
+`FastJSONResponse` serializes dicts, lists and response models with orjson
+(listed in requirements.txt) and falls back to the standard json module
+when it is not installed. Models are emitted straight from their attribute
+dict, so only use it for models the server has already validated and that
+have no custom serializers or aliases, such as the repositories' models.
+Datetimes are written natively as ISO-8601 with a `Z` suffix for UTC,
+matching Pydantic's output.
+"""
+import json
+from datetime import date, datetime
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+ORJSON_AVAILABLE = orjson is not None
+
+
+def _model_fields(obj):
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+def _json_default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat().replace("+00:00", "Z")
+    if isinstance(obj, date):
+        return obj.isoformat()
+    return _model_fields(obj)
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_model_fields, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
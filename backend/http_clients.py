@@ -0,0 +1,122 @@
+"""
+Application-scoped outbound HTTP clients.
+
+`HttpClients` holds one pooled httpx.AsyncClient per upstream service,
+created on first use and closed by the app's lifespan. Calls reuse
+keep-alive connections instead of paying a TCP + TLS handshake each, and
+use HTTP/2 when the `h2` package is installed. Since every service has its
+own client, the connection limits apply per upstream host. Pointing a
+service's base URL at a local stub server (or passing an httpx transport)
+is enough to test against it.
+
+Pool and timeout settings, from the environment:
+
+    HTTP_MAX_CONNECTIONS    connections per service (default 100)
+    HTTP_MAX_KEEPALIVE      idle connections kept open (default 20)
+    HTTP_KEEPALIVE_EXPIRY   seconds an idle connection is kept (default 30)
+    HTTP_CONNECT_TIMEOUT    seconds (default 5)
+    HTTP_TIMEOUT            read/write/pool timeout in seconds (default 10)
+    HTTP_RETRIES            retries for idempotent requests (default 2)
+    HTTP2_ENABLED           true/false (default true; needs h2)
+
+Idempotent requests are retried on transport errors and on 502/503/504,
+with full-jitter exponential backoff capped by HTTP_RETRY_MAX_DELAY.
+"""
+import asyncio
+import importlib.util
+import logging
+import os
+import random
+from typing import Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def _env_float(environ, name: str, default: float) -> float:
+    return float(environ.get(name, default))
+
+
+class ServiceConfig:
+    def __init__(self, base_url: str, retries: int, headers: Optional[dict] = None,
+                 timeout: Optional[httpx.Timeout] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url
+        self.retries = retries
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.transport = transport
+
+
+class HttpClients:
+    def __init__(self, environ=os.environ):
+        self.limits = httpx.Limits(
+            max_connections=int(environ.get("HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(environ.get("HTTP_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=_env_float(environ, "HTTP_KEEPALIVE_EXPIRY", 30)
+        )
+        self.timeout = httpx.Timeout(
+            _env_float(environ, "HTTP_TIMEOUT", 10), connect=_env_float(environ, "HTTP_CONNECT_TIMEOUT", 5)
+        )
+        self.retries = int(environ.get("HTTP_RETRIES", "2"))
+        self.retry_base_delay = _env_float(environ, "HTTP_RETRY_BASE_DELAY", 0.1)
+        self.retry_max_delay = _env_float(environ, "HTTP_RETRY_MAX_DELAY", 2)
+        self.http2 = HTTP2_AVAILABLE and environ.get("HTTP2_ENABLED", "true").lower() == "true"
+        self._services: Dict[str, ServiceConfig] = {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def register(self, name: str, base_url: str, retries: Optional[int] = None, headers: Optional[dict] = None,
+                 timeout: Optional[httpx.Timeout] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """Declare a service; registering it again (e.g. in tests) replaces the open client on next use"""
+        self._services[name] = ServiceConfig(
+            base_url, self.retries if retries is None else retries, headers, timeout, transport
+        )
+        stale = self._clients.pop(name, None)
+        if stale is not None:
+            asyncio.ensure_future(stale.aclose())
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None:
+            service = self._services[name]
+            client = self._clients[name] = httpx.AsyncClient(
+                base_url=service.base_url,
+                headers=service.headers,
+                limits=self.limits,
+                timeout=service.timeout or self.timeout,
+                http2=self.http2,
+                transport=service.transport
+            )
+        return client
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniform between 0 and the capped exponential delay"""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+
+    async def request(self, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send through the service's pooled client, retrying idempotent requests"""
+        client = self.client(name)
+        retries = self._services[name].retries if method.upper() in IDEMPOTENT_METHODS else 0
+        for attempt in range(retries + 1):
+            last_attempt = attempt == retries
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if last_attempt:
+                    raise
+                logger.warning(f"{name}: {method} {url} failed ({e!r}), retrying")
+            else:
+                if response.status_code not in RETRY_STATUSES or last_attempt:
+                    return response
+                await response.aclose()
+                logger.warning(f"{name}: {method} {url} returned {response.status_code}, retrying")
+            await asyncio.sleep(self.backoff(attempt))
+
+    async def aclose(self):
+        clients = list(self._clients.values())
+        self._clients.clear()
+        await asyncio.gather(*(client.aclose() for client in clients), return_exceptions=True)
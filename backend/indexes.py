@@ -0,0 +1,127 @@
+"""
+Index declarations for every collection, created idempotently at startup.
+
+Run standalone to create the indexes or report how they are used:
+    python indexes.py            # create missing indexes
+    python indexes.py --stats    # print $indexStats for every collection
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+
+def _asc(*fields):
+    return [(field, ASCENDING) for field in fields]
+
+
+# (created_at, <id>) backs the keyset pagination in pagination.py; the
+# patient_id-prefixed variant serves the same sort for per-patient lists.
+INDEXES = {
+    "users": [
+        IndexModel(_asc("user_id"), name="user_id_unique", unique=True),
+        IndexModel(_asc("email"), name="email_unique", unique=True),
+        IndexModel(_asc("patient_id"), name="patient_id", sparse=True),
+    ],
+    "patients": [
+        IndexModel(_asc("patient_id"), name="patient_id_unique", unique=True),
+        IndexModel(_asc("email"), name="email"),
+        IndexModel(_asc("created_at", "patient_id"), name="created_at_patient_id"),
+    ],
+    "appointments": [
+        IndexModel(_asc("appointment_id"), name="appointment_id_unique", unique=True),
+        IndexModel(_asc("created_at", "appointment_id"), name="created_at_appointment_id"),
+        IndexModel(_asc("patient_id", "created_at", "appointment_id"), name="patient_id_created_at"),
+    ],
+    "care_instructions": [
+        IndexModel(_asc("instruction_id"), name="instruction_id_unique", unique=True),
+        IndexModel(_asc("appointment_id"), name="appointment_id"),
+        IndexModel(_asc("created_at", "instruction_id"), name="created_at_instruction_id"),
+        IndexModel(_asc("patient_id", "created_at", "instruction_id"), name="patient_id_created_at"),
+    ],
+    "reminders": [
+        IndexModel(_asc("reminder_id"), name="reminder_id_unique", unique=True),
+        IndexModel(_asc("sent", "scheduled_for"), name="sent_scheduled_for"),
+        IndexModel(_asc("created_at", "reminder_id"), name="created_at_reminder_id"),
+        IndexModel(_asc("patient_id", "created_at", "reminder_id"), name="patient_id_created_at"),
+    ],
+    "followups": [
+        IndexModel(_asc("followup_id"), name="followup_id_unique", unique=True),
+        # Serves the pending count (prefix) and due-date range queries over native dates
+        IndexModel(_asc("completed", "follow_up_date"), name="completed_follow_up_date"),
+        IndexModel(_asc("created_at", "followup_id"), name="created_at_followup_id"),
+        IndexModel(_asc("patient_id", "created_at", "followup_id"), name="patient_id_created_at"),
+    ],
+    "instruction_cache": [
+        IndexModel(_asc("key"), name="key_unique", unique=True),
+        IndexModel(_asc("expires_at"), name="expires_at_ttl", expireAfterSeconds=0),
+        IndexModel(_asc("last_used_at"), name="last_used_at"),
+    ],
+    "audio_cache": [
+        IndexModel(_asc("key"), name="key_unique", unique=True),
+        IndexModel(_asc("expires_at"), name="expires_at_ttl", expireAfterSeconds=0),
+        IndexModel(_asc("last_used_at"), name="last_used_at"),
+    ],
+    "generation_jobs": [
+        IndexModel(_asc("job_id"), name="job_id_unique", unique=True),
+        IndexModel(_asc("status", "created_at"), name="status_created_at"),
+        IndexModel(_asc("finished_at"), name="finished_at_ttl", expireAfterSeconds=7 * 24 * 3600),
+    ],
+}
+
+
+async def ensure_indexes(db) -> dict:
+    """Create every declared index; existing identical indexes are a no-op.
+
+    A failure on one collection (e.g. duplicate emails blocking a unique index)
+    is logged and reported without preventing the others from being created.
+    """
+    report = {}
+    for collection, models in INDEXES.items():
+        try:
+            report[collection] = await db[collection].create_indexes(models)
+        except OperationFailure as e:
+            logger.error(f"Failed to create indexes on {collection}: {e}")
+            report[collection] = {"error": str(e)}
+    return report
+
+
+async def index_stats(db) -> dict:
+    """Per-index usage counters from $indexStats, keyed by collection"""
+    stats = {}
+    for collection in INDEXES:
+        rows = await db[collection].aggregate([{"$indexStats": {}}]).to_list(None)
+        stats[collection] = {
+            row["name"]: {"ops": row["accesses"]["ops"], "since": row["accesses"]["since"].isoformat()}
+            for row in rows
+        }
+    return stats
+
+
+async def _main(show_stats: bool):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        result = await index_stats(db) if show_stats else await ensure_indexes(db)
+        print(json.dumps(result, indent=2))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create or inspect CareFollow MongoDB indexes")
+    parser.add_argument("--stats", action="store_true", help="report index usage via $indexStats")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args.stats))
@@ -0,0 +1,76 @@
+"""
+Content-addressed cache for generated care instructions and their audio.
+
+Entries live in a Mongo collection (TTL index on `expires_at`, LRU eviction
+on `last_used_at` once `max_entries` is exceeded) with an optional
+in-process L1 in front.
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from cachetools import TTLCache
+from pymongo import ReturnDocument
+
+
+def _normalize(value: Optional[str]) -> str:
+    return " ".join((value or "").lower().split())
+
+
+def instruction_cache_key(procedure: str, diagnosis: str, notes: Optional[str], prompt_version: str, model: str) -> str:
+    """Hash of everything that shapes the LLM output except the patient's name"""
+    raw = json.dumps([_normalize(procedure), _normalize(diagnosis), _normalize(notes), prompt_version, model])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def audio_cache_key(text: str, voice_id: str, model_id: str) -> str:
+    return hashlib.sha256(f"{voice_id}\0{model_id}\0{text}".encode()).hexdigest()
+
+
+class ContentCache:
+    def __init__(self, collection, ttl_seconds: int, max_entries: int, l1_size: int = 0):
+        self.collection = collection
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_entries = max_entries
+        self.l1 = TTLCache(maxsize=l1_size, ttl=ttl_seconds) if l1_size else None
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        if self.l1 is not None and key in self.l1:
+            self.hits += 1
+            return self.l1[key]
+        now = datetime.now(timezone.utc)
+        doc = await self.collection.find_one_and_update(
+            {"key": key, "expires_at": {"$gt": now}},
+            {"$set": {"last_used_at": now}, "$inc": {"hits": 1}},
+            projection={"_id": 0, "value": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if not doc:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.l1 is not None:
+            self.l1[key] = doc["value"]
+        return doc["value"]
+
+    async def put(self, key: str, value: str):
+        now = datetime.now(timezone.utc)
+        await self.collection.update_one(
+            {"key": key},
+            {"$set": {"value": value, "last_used_at": now, "expires_at": now + self.ttl},
+             "$setOnInsert": {"created_at": now, "hits": 0}},
+            upsert=True
+        )
+        if self.l1 is not None:
+            self.l1[key] = value
+        await self._evict()
+
+    async def _evict(self):
+        excess = await self.collection.estimated_document_count() - self.max_entries
+        if excess <= 0:
+            return
+        stale = await self.collection.find({}, {"_id": 1}).sort("last_used_at", 1).limit(excess).to_list(excess)
+        await self.collection.delete_many({"_id": {"$in": [d["_id"] for d in stale]}})
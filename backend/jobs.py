@@ -0,0 +1,219 @@
+"""
+Background job queue for slow work such as AI instruction generation.
+
+Jobs live in a Mongo collection so any API process can pick them up; a
+local in-memory backend is available for single-process deployments and
+development (JOB_QUEUE_BACKEND=local).
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+Handler = Callable[[dict], Awaitable[dict]]
+
+
+class JobQueue:
+    def __init__(self, handler: Handler, workers: int = 2, poll_interval: float = 1.0, lease_seconds: int = 300,
+                 max_attempts: int = 3):
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+        self._stopping = False
+
+    # Storage backend hooks
+    async def _insert(self, job: dict):
+        raise NotImplementedError
+
+    async def _claim(self) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def _renew(self, job: dict) -> bool:
+        """Extend the claimed job's lease; False once another worker has taken it over"""
+        return True
+
+    async def _finish(self, job: dict, fields: dict) -> bool:
+        """Record the outcome; False if the lease was lost and the write was skipped"""
+        raise NotImplementedError
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def enqueue(self, payload: dict) -> dict:
+        now = datetime.now(timezone.utc)
+        job = {
+            "job_id": f"job_{uuid.uuid4().hex[:12]}",
+            "status": QUEUED,
+            "payload": payload,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "finished_at": None
+        }
+        await self._insert(job)
+        self._wakeup.set()
+        return job
+
+    def start(self):
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        self._stopping = True
+        self._wakeup.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, index: int):
+        while not self._stopping:
+            # A storage error anywhere in the cycle must not end the worker
+            try:
+                job = await self._claim()
+                if job:
+                    await self._run(job)
+                    continue
+            except Exception as e:
+                logger.error(f"Job worker {index} failed: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _keep_leased(self, job: dict):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                if not await self._renew(job):
+                    logger.warning(f"Job {job['job_id']} lost its lease; its result will be discarded")
+                    return
+            except Exception as e:
+                logger.error(f"Failed to renew the lease of job {job['job_id']}: {e}")
+
+    async def _run(self, job: dict):
+        if job.get("attempts", 1) > self.max_attempts:
+            # Claimed again after its worker died too many times: likely a job that kills workers
+            fields = {"status": FAILED, "error": f"Gave up after {self.max_attempts} attempts"}
+        else:
+            heartbeat = asyncio.create_task(self._keep_leased(job))
+            try:
+                result = await self.handler(job["payload"])
+                fields = {"status": DONE, "result": result}
+            except Exception as e:
+                logger.warning(f"Job {job['job_id']} failed: {e}")
+                fields = {"status": FAILED, "error": getattr(e, "detail", None) or str(e)}
+            finally:
+                heartbeat.cancel()
+                await asyncio.gather(heartbeat, return_exceptions=True)
+        fields["finished_at"] = datetime.now(timezone.utc)
+        if not await self._finish(job, fields):
+            logger.warning(f"Job {job['job_id']} finished after losing its lease; result discarded")
+
+
+class MongoJobQueue(JobQueue):
+    """Jobs are claimed with an atomic lease so several processes can share one collection.
+
+    The lease is renewed while the handler runs and the outcome is only written
+    by the lease owner. A job whose worker died is claimed again once its lease
+    expires, and failed once it has been claimed more than `max_attempts` times.
+    """
+
+    def __init__(self, collection, handler: Handler, **kwargs):
+        super().__init__(handler, **kwargs)
+        self.collection = collection
+
+    async def _insert(self, job: dict):
+        await self.collection.insert_one(dict(job))
+
+    def _lease_until(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": QUEUED},
+                {"status": RUNNING, "lease_until": {"$lt": now}}
+            ]},
+            {
+                "$set": {
+                    "status": RUNNING, "started_at": now, "lease_until": self._lease_until(),
+                    "lease_owner": uuid.uuid4().hex
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", 1)],
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _renew(self, job: dict) -> bool:
+        result = await self.collection.update_one(
+            {"job_id": job["job_id"], "lease_owner": job["lease_owner"]},
+            {"$set": {"lease_until": self._lease_until()}}
+        )
+        return result.matched_count == 1
+
+    async def _finish(self, job: dict, fields: dict) -> bool:
+        result = await self.collection.update_one(
+            {"job_id": job["job_id"], "lease_owner": job["lease_owner"]},
+            {"$set": fields, "$unset": {"lease_until": "", "lease_owner": ""}}
+        )
+        return result.matched_count == 1
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"job_id": job_id}, {"_id": 0})
+
+
+class LocalJobQueue(JobQueue):
+    """In-process fallback: jobs are lost on restart and not shared between workers"""
+
+    def __init__(self, handler: Handler, max_jobs: int = 1000, **kwargs):
+        super().__init__(handler, **kwargs)
+        self.max_jobs = max_jobs
+        self._jobs: Dict[str, dict] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    async def _insert(self, job: dict):
+        self._jobs[job["job_id"]] = job
+        self._queue.put_nowait(job["job_id"])
+        # Forget the oldest finished jobs once the table is full
+        while len(self._jobs) > self.max_jobs:
+            finished = next((k for k, j in self._jobs.items() if j["status"] in (DONE, FAILED)), None)
+            if finished is None:
+                break
+            del self._jobs[finished]
+
+    async def _claim(self) -> Optional[dict]:
+        try:
+            job = self._jobs.get(self._queue.get_nowait())
+        except asyncio.QueueEmpty:
+            return None
+        if job:
+            job["status"] = RUNNING
+            job["started_at"] = datetime.now(timezone.utc)
+        return job
+
+    async def _finish(self, job: dict, fields: dict) -> bool:
+        if job["job_id"] in self._jobs:
+            self._jobs[job["job_id"]].update(fields)
+        return True
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return self._jobs.get(job_id)
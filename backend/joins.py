@@ -0,0 +1,19 @@
+"""Batch lookups used to enrich list responses with data from related collections"""
+from typing import Dict, Iterable, List
+
+
+async def fetch_patient_names(db, patient_ids: Iterable[str]) -> Dict[str, str]:
+    """Resolve patient names for many patient_ids with a single $in query"""
+    ids = list({pid for pid in patient_ids if pid})
+    if not ids:
+        return {}
+    cursor = db.patients.find({"patient_id": {"$in": ids}}, {"_id": 0, "patient_id": 1, "name": 1})
+    return {p["patient_id"]: p.get("name") async for p in cursor}
+
+
+async def attach_patient_names(db, docs: List[dict]) -> List[dict]:
+    """Fill in `patient_name` on every document using one round trip to `patients`"""
+    names = await fetch_patient_names(db, (d.get("patient_id") for d in docs))
+    for d in docs:
+        d["patient_name"] = names.get(d.get("patient_id"))
+    return docs
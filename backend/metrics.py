@@ -0,0 +1,351 @@
+"""
+Request-level instrumentation exposed in the Prometheus text format.
+
+  MetricsMiddleware      per-route latency histograms, request counters and
+                         in-flight gauges (routes are labelled by their path
+                         template, so ids never become label values)
+  MongoCommandMetrics    pymongo CommandListener: command counts and
+                         durations, plus per-request totals for the request
+                         that issued them (Motor copies the caller's context
+                         into its executor threads, so a ContextVar finds it)
+  stage_timer            times external stages such as the LLM and TTS calls
+
+The metric types are deliberately minimal (no prometheus_client dependency)
+and thread-safe, because command events arrive on Motor's worker threads.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+MONGO_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+ROUND_TRIP_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+UNMATCHED_ROUTE = "unmatched"
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = labels
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return self.header() + self.samples()
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, key)} {_number(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> [per-bucket counts..., sum, count]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, list(series)) for key, series in self._values.items())
+        lines = []
+        for key, series in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], Iterable[Metric]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def add_collector(self, collector: Callable[[], Iterable[Metric]]):
+        """`collector` builds metrics from live state (e.g. pool stats) at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for metric in collector():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "carefollow_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_latency = registry.histogram(
+    "carefollow_http_request_duration_seconds", "Time until the last response byte was sent", ("method", "route"))
+http_in_flight = registry.gauge(
+    "carefollow_http_requests_in_flight", "Requests currently being served", ("method",))
+request_mongo_commands = registry.histogram(
+    "carefollow_http_request_mongo_commands", "Mongo round trips issued per request", ("method", "route"),
+    buckets=ROUND_TRIP_BUCKETS)
+request_mongo_seconds = registry.histogram(
+    "carefollow_http_request_mongo_seconds", "Time spent in Mongo commands per request", ("method", "route"))
+mongo_commands = registry.counter(
+    "carefollow_mongo_commands_total", "Mongo commands by name and outcome", ("command", "outcome"))
+mongo_latency = registry.histogram(
+    "carefollow_mongo_command_duration_seconds", "Mongo command duration", ("command",),
+    buckets=MONGO_LATENCY_BUCKETS)
+stage_latency = registry.histogram(
+    "carefollow_stage_duration_seconds", "Duration of external stages (LLM, TTS)", ("stage", "outcome"))
+
+
+class RequestStats:
+    """Per-request Mongo totals; `capture_commands` also keeps each command (see profiling.py)"""
+
+    __slots__ = ("mongo_commands", "mongo_seconds", "lock", "commands", "max_commands", "dropped_commands",
+                 "_started")
+
+    def __init__(self):
+        self.mongo_commands = 0
+        self.mongo_seconds = 0.0
+        self.lock = threading.Lock()
+        self.commands: Optional[List[dict]] = None
+        self.max_commands = 0
+        self.dropped_commands = 0
+        self._started: Dict[tuple, str] = {}
+
+    def capture_commands(self, max_commands: int):
+        self.commands = []
+        self.max_commands = max_commands
+
+    def command_started(self, key: tuple, collection: Optional[str]):
+        with self.lock:
+            self._started[key] = collection
+
+    def add_command(self, seconds: float, key: Optional[tuple] = None, name: Optional[str] = None,
+                    outcome: str = "ok"):
+        with self.lock:
+            self.mongo_commands += 1
+            self.mongo_seconds += seconds
+            if self.commands is None:
+                return
+            collection = self._started.pop(key, None)
+            if len(self.commands) >= self.max_commands:
+                self.dropped_commands += 1
+                return
+            self.commands.append({
+                "command": name, "collection": collection, "duration_ms": round(seconds * 1e3, 3), "outcome": outcome
+            })
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Pass to the client as `event_listeners=[...]`"""
+
+    def started(self, event):
+        stats = current_request.get()
+        if stats is not None and stats.commands is not None:
+            # Only the target collection is kept: filters may contain patient data
+            target = event.command.get(event.command_name)
+            stats.command_started((event.connection_id, event.request_id), target if isinstance(target, str) else None)
+
+    def _record(self, event, outcome: str):
+        seconds = event.duration_micros / 1e6
+        mongo_commands.inc(command=event.command_name, outcome=outcome)
+        mongo_latency.observe(seconds, command=event.command_name)
+        stats = current_request.get()
+        if stats is not None:
+            stats.add_command(seconds, (event.connection_id, event.request_id), event.command_name, outcome)
+
+    def succeeded(self, event):
+        self._record(event, "ok")
+
+    def failed(self, event):
+        self._record(event, "error")
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Observe the duration of an external call: `with stage_timer("llm"): ...`"""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        stage_latency.observe(time.perf_counter() - start, stage=stage, outcome=outcome)
+
+
+def route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        stats = RequestStats()
+        token = current_request.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc(method=method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.dec(method=method)
+            current_request.reset(token)
+            route = route_label(scope)
+            http_requests.inc(method=method, route=route, status=status)
+            http_latency.observe(elapsed, method=method, route=route)
+            request_mongo_commands.observe(stats.mongo_commands, method=method, route=route)
+            request_mongo_seconds.observe(stats.mongo_seconds, method=method, route=route)
+
+
+def offload_pool_metrics(stats: Dict[str, dict]) -> List[Metric]:
+    """Turn offload.pool_stats() into gauges and counters"""
+    gauges = {
+        "workers": Gauge("carefollow_offload_workers", "Executor workers", ("pool",)),
+        "pending": Gauge("carefollow_offload_pending", "Calls running or queued", ("pool",)),
+    }
+    counters = {
+        name: Counter(f"carefollow_offload_{name}_total", f"Calls {name}", ("pool",))
+        for name in ("submitted", "completed", "failed", "rejected")
+    }
+    busy = Counter("carefollow_offload_busy_seconds_total", "Time spent running offloaded calls", ("pool",))
+    for pool, values in stats.items():
+        for name, gauge in gauges.items():
+            gauge.set(values[name], pool=pool)
+        for name, counter in counters.items():
+            counter.inc(values[name], pool=pool)
+        busy.inc(values["busy_seconds"], pool=pool)
+    return [*gauges.values(), *counters.values(), busy]
+
+
+def mongo_pool_metrics(stats: Dict[str, dict]) -> List[Metric]:
+    """Turn database.PoolMonitor.stats() into per-server gauges and counters"""
+    gauges = {
+        name: Gauge(f"carefollow_mongo_pool_{name}", documentation, ("address",))
+        for name, documentation in (
+            ("max_size", "Configured maxPoolSize"),
+            ("open", "Open connections"),
+            ("checked_out", "Connections in use"),
+            ("waiting", "Operations waiting for a connection"),
+            ("saturation", "Share of maxPoolSize in use"),
+        )
+    }
+    failures = Counter("carefollow_mongo_pool_check_out_failures_total", "Failed connection check-outs", ("address",))
+    cleared = Counter("carefollow_mongo_pool_cleared_total", "Times the pool was cleared", ("address",))
+    for address, values in stats.items():
+        for name, gauge in gauges.items():
+            gauge.set(values[name], address=address)
+        failures.inc(values["check_out_failures"], address=address)
+        cleared.inc(values["cleared"], address=address)
+    return [*gauges.values(), failures, cleared]
@@ -0,0 +1,79 @@
+"""
+Move legacy inline instruction audio into the BlobStore.
+
+Instructions written before audio moved to GridFS embed it in `audio_url` as
+a base64 data URL. This stores each payload as a blob, points `audio_blob`
+at it and removes `audio_url`, so nothing left in the collection is loaded
+just to be discarded. Idempotent and safe to run while the API is serving:
+each update is conditioned on the document still having no blob, and the
+read paths handle both forms in the meantime.
+
+    python migrate_legacy_audio.py             # move everything
+    python migrate_legacy_audio.py --dry-run   # only count what would move
+"""
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import os
+from pathlib import Path
+
+from blobstore import BlobStore
+
+logger = logging.getLogger(__name__)
+
+# Same bucket as server.audio_store
+AUDIO_BUCKET = "audio"
+LEGACY_AUDIO_QUERY = {"audio_url": {"$regex": "^data:"}, "audio_blob": {"$in": [None, ""]}}
+
+
+def decode_data_url(data_url: str) -> bytes:
+    return base64.b64decode(data_url.split(",", 1)[1], validate=True)
+
+
+async def migrate(db, store: BlobStore, dry_run: bool = False) -> dict:
+    moved = 0
+    invalid = 0
+    # One document at a time: each payload can be several megabytes
+    async for doc in db.care_instructions.find(LEGACY_AUDIO_QUERY, {"instruction_id": 1}):
+        if dry_run:
+            moved += 1
+            continue
+        legacy = await db.care_instructions.find_one({"_id": doc["_id"]}, {"audio_url": 1})
+        try:
+            audio = decode_data_url(legacy["audio_url"])
+        except (IndexError, ValueError, binascii.Error):
+            invalid += 1
+            logger.warning(f"care_instructions {doc['instruction_id']}: audio_url is not a base64 data URL")
+            continue
+        digest = await store.put(audio, "audio/mpeg")
+        # No version bump: the API representation (a signed audio URL) does not change
+        result = await db.care_instructions.update_one(
+            {"_id": doc["_id"], "audio_blob": {"$in": [None, ""]}},
+            {"$set": {"audio_blob": digest}, "$unset": {"audio_url": ""}}
+        )
+        moved += result.modified_count
+    return {"moved": moved, "invalid": invalid}
+
+
+async def _main(dry_run: bool):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    db = client[os.environ['DB_NAME']]
+    try:
+        print(json.dumps(await migrate(db, BlobStore(db, bucket_name=AUDIO_BUCKET), dry_run), indent=2))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move inline CareFollow instruction audio into GridFS")
+    parser.add_argument("--dry-run", action="store_true", help="count instructions to migrate without writing")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args.dry_run))
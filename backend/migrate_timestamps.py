@@ -0,0 +1,103 @@
+"""
+Convert legacy ISO-8601 string timestamps to native BSON dates.
+
+Idempotent and safe to run while the API is serving: each update is
+conditioned on the field still holding the string that was read, and
+the read paths accept both representations in the meantime. Converted
+documents in versioned collections get a version bump, since their
+timestamps now serialize differently and cached copies must revalidate.
+
+    python migrate_timestamps.py             # convert everything
+    python migrate_timestamps.py --dry-run   # only count what would change
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+from typing import List
+
+from pymongo import UpdateOne
+
+from timestamps import parse_timestamp
+from versioning import bump_version
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FIELDS = {
+    "users": ["created_at"],
+    "patients": ["created_at", "updated_at"],
+    "appointments": ["created_at", "updated_at"],
+    "care_instructions": ["created_at", "updated_at"],
+    "reminders": ["scheduled_for", "sent_at", "created_at", "updated_at"],
+    "followups": ["follow_up_date", "created_at", "updated_at"],
+}
+
+# Collections whose documents carry version/updated_at (see versioning.py)
+VERSIONED_COLLECTIONS = {"patients", "appointments", "care_instructions", "reminders", "followups"}
+
+
+async def migrate_collection(collection, fields: List[str], batch_size: int = 500, dry_run: bool = False,
+                             versioned: bool = False) -> dict:
+    query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+    projection = {field: 1 for field in fields}
+    converted = 0
+    unparseable = 0
+    batch = []
+    async for doc in collection.find(query, projection):
+        changes = {}
+        for field in fields:
+            value = doc.get(field)
+            if not isinstance(value, str):
+                continue
+            try:
+                changes[field] = parse_timestamp(value)
+            except ValueError:
+                unparseable += 1
+                logger.warning(f"{collection.name} {doc['_id']}: cannot parse {field}={value!r}")
+        if not changes:
+            continue
+        converted += 1
+        update = {"$set": changes}
+        if versioned:
+            # A converted updated_at is superseded by the time of this write
+            update = bump_version(update)
+        batch.append(UpdateOne({"_id": doc["_id"], **{f: doc[f] for f in changes}}, update))
+        if len(batch) >= batch_size:
+            if not dry_run:
+                await collection.bulk_write(batch, ordered=False)
+            batch = []
+    if batch and not dry_run:
+        await collection.bulk_write(batch, ordered=False)
+    return {"converted": converted, "unparseable": unparseable}
+
+
+async def migrate(db, batch_size: int = 500, dry_run: bool = False) -> dict:
+    results = {}
+    for name, fields in TIMESTAMP_FIELDS.items():
+        results[name] = await migrate_collection(db[name], fields, batch_size, dry_run, name in VERSIONED_COLLECTIONS)
+        logger.info(f"{name}: {results[name]}")
+    return results
+
+
+async def _main(batch_size: int, dry_run: bool):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    db = client[os.environ['DB_NAME']]
+    try:
+        print(json.dumps(await migrate(db, batch_size, dry_run), indent=2))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert CareFollow string timestamps to BSON dates")
+    parser.add_argument("--batch-size", type=int, default=500, help="documents per bulk_write")
+    parser.add_argument("--dry-run", action="store_true", help="count documents to convert without writing")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args.batch_size, args.dry_run))
@@ -0,0 +1,148 @@
+"""Request and response models for the CareFollow API"""
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, EmailStr
+
+
+class UserCreate(BaseModel):
+    email: EmailStr
+    password: str
+    name: str
+    role: Literal["staff", "patient"] = "staff"
+    phone: Optional[str] = None
+
+
+class UserLogin(BaseModel):
+    email: EmailStr
+    password: str
+
+
+class UserResponse(BaseModel):
+    user_id: str
+    email: str
+    name: str
+    role: str
+    phone: Optional[str] = None
+    picture: Optional[str] = None
+    created_at: datetime
+
+
+class TokenResponse(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    user: UserResponse
+
+
+class PatientCreate(BaseModel):
+    name: str
+    email: EmailStr
+    phone: str
+    birth_date: Optional[str] = None
+    notes: Optional[str] = None
+
+
+class PatientResponse(BaseModel):
+    patient_id: str
+    name: str
+    email: str
+    phone: str
+    birth_date: Optional[str] = None
+    notes: Optional[str] = None
+    created_at: datetime
+    created_by: str
+
+
+class AppointmentCreate(BaseModel):
+    patient_id: str
+    procedure: str
+    diagnosis: str
+    notes: Optional[str] = None
+    appointment_date: Optional[str] = None
+
+
+class AppointmentResponse(BaseModel):
+    appointment_id: str
+    patient_id: str
+    patient_name: Optional[str] = None
+    procedure: str
+    diagnosis: str
+    notes: Optional[str] = None
+    appointment_date: Optional[str] = None
+    created_at: datetime
+    created_by: str
+
+
+class CareInstructionCreate(BaseModel):
+    appointment_id: str
+    generate_audio: bool = True
+
+
+class CareInstructionResponse(BaseModel):
+    instruction_id: str
+    appointment_id: str
+    patient_id: str
+    text_content: str
+    audio_url: Optional[str] = None
+    created_at: datetime
+
+
+class GenerationJobResponse(BaseModel):
+    job_id: str
+    status: str
+    error: Optional[str] = None
+    instruction: Optional[CareInstructionResponse] = None
+    created_at: datetime
+
+
+class ReminderCreate(BaseModel):
+    patient_id: str
+    appointment_id: Optional[str] = None
+    message: str
+    reminder_type: Literal["email", "sms", "whatsapp"] = "email"
+    scheduled_for: str
+
+
+class ReminderResponse(BaseModel):
+    reminder_id: str
+    patient_id: str
+    appointment_id: Optional[str] = None
+    message: str
+    reminder_type: str
+    scheduled_for: datetime
+    sent: bool = False
+    sent_at: Optional[datetime] = None
+    failed: bool = False
+    created_at: datetime
+
+
+class FollowUpCreate(BaseModel):
+    patient_id: str
+    appointment_id: Optional[str] = None
+    follow_up_date: str
+    reason: str
+    notes: Optional[str] = None
+
+
+class FollowUpResponse(BaseModel):
+    followup_id: str
+    patient_id: str
+    patient_name: Optional[str] = None
+    appointment_id: Optional[str] = None
+    follow_up_date: datetime
+    reason: str
+    notes: Optional[str] = None
+    completed: bool = False
+    created_at: datetime
+
+
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+
+class BulkImportResponse(BaseModel):
+    total_rows: int
+    inserted: int
+    failed: int
+    errors: List[BulkRowError]
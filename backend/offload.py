@@ -0,0 +1,120 @@
+"""
+Bounded executors for work that must not run on the event loop.
+
+`io_pool` (threads) serves blocking SDK calls such as ElevenLabs; `cpu_pool`
+(processes) serves CPU-bound work such as bcrypt. Each pool admits at most
+`workers + max_queue` pending calls and rejects the rest with
+OffloadSaturated so a burst degrades into fast 503s instead of an
+unbounded backlog.
+
+CPU workers start through a forkserver (spawn where that is unavailable)
+rather than being forked from the app process, which by then has running
+event-loop, Motor and executor threads whose locks a fork could copy
+mid-use. Workers import the main module afresh, so scripts that drive the
+app in-process need an `if __name__ == "__main__":` guard.
+OFFLOAD_CPU_START_METHOD overrides the choice.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+class OffloadSaturated(Exception):
+    pass
+
+
+class BoundedExecutor:
+    def __init__(self, name: str, factory: Callable[[int], Executor], workers: int, max_queue: int):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self._factory = factory
+        self._executor: Optional[Executor] = None
+        # Guards the counters below; futures settle on executor threads
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        # Created lazily so importing the app never forks worker processes
+        if self._executor is None:
+            self._executor = self._factory(self.workers)
+        return self._executor
+
+    async def run(self, fn, *args):
+        """Run `fn(*args)` on the pool.
+
+        A slot stays taken until the work itself finishes: cancelling the
+        awaiting coroutine only drops work that has not started yet.
+        """
+        if self.pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise OffloadSaturated(f"{self.name} pool is saturated")
+        future = self.executor.submit(fn, *args)
+        start = time.perf_counter()
+        with self._lock:
+            self.pending += 1
+            self.submitted += 1
+        future.add_done_callback(lambda f: self._settle(f, start))
+        return await asyncio.wrap_future(future)
+
+    def _settle(self, future: Future, start: float):
+        with self._lock:
+            self.pending -= 1
+            self.busy_seconds += time.perf_counter() - start
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "busy_seconds": round(self.busy_seconds, 3)
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+io_pool = BoundedExecutor(
+    "io",
+    lambda n: ThreadPoolExecutor(max_workers=n, thread_name_prefix="offload-io"),
+    workers=int(os.environ.get('OFFLOAD_IO_WORKERS', '8')),
+    max_queue=int(os.environ.get('OFFLOAD_IO_QUEUE', '64'))
+)
+
+CPU_START_METHOD = os.environ.get(
+    'OFFLOAD_CPU_START_METHOD',
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+cpu_pool = BoundedExecutor(
+    "cpu",
+    lambda n: ProcessPoolExecutor(max_workers=n, mp_context=multiprocessing.get_context(CPU_START_METHOD)),
+    workers=int(os.environ.get('OFFLOAD_CPU_WORKERS', str(os.cpu_count() or 2))),
+    max_queue=int(os.environ.get('OFFLOAD_CPU_QUEUE', '256'))
+)
+
+
+def pool_stats() -> dict:
+    return {pool.name: pool.stats() for pool in (io_pool, cpu_pool)}
@@ -0,0 +1,95 @@
+"""Keyset pagination and NDJSON streaming for list endpoints"""
+import base64
+import json
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+SORT_FIELD = "created_at"
+DEFAULT_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(doc: dict, id_field: str) -> str:
+    """Opaque cursor pointing just after `doc` in (created_at, id) order"""
+    created_at = doc.get(SORT_FIELD)
+    # A trailing "d" marks a native date, so the cursor compares against the same BSON type
+    if isinstance(created_at, datetime):
+        key = [created_at.isoformat(), doc[id_field], "d"]
+    else:
+        key = [created_at, doc[id_field]]
+    raw = json.dumps(key, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Union[datetime, str], str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, last_id, *kind = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if kind == ["d"]:
+            created_at = datetime.fromisoformat(created_at)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    return created_at, last_id
+
+
+def keyset_query(query: dict, id_field: str, cursor: Optional[str]) -> dict:
+    if not cursor:
+        return query
+    created_at, last_id = decode_cursor(cursor)
+    after = [
+        {SORT_FIELD: {"$gt": created_at}},
+        {SORT_FIELD: created_at, id_field: {"$gt": last_id}},
+    ]
+    if isinstance(created_at, str):
+        # Legacy ISO-string timestamps sort before every native date (BSON type order)
+        # and $gt never crosses types, so the dates still ahead are matched explicitly.
+        after.append({SORT_FIELD: {"$type": "date"}})
+    return {**query, "$or": after}
+
+
+def sorted_find(collection, query: dict, id_field: str, cursor: Optional[str] = None, projection: Optional[dict] = None):
+    """Motor cursor over `query` in stable (created_at, id) order, resuming after `cursor`"""
+    return collection.find(
+        keyset_query(query, id_field, cursor),
+        projection or {"_id": 0},
+    ).sort([(SORT_FIELD, 1), (id_field, 1)])
+
+
+async def find_page(collection, query: dict, id_field: str, limit: int = DEFAULT_PAGE_SIZE,
+                    cursor: Optional[str] = None, projection: Optional[dict] = None) -> Tuple[List[dict], Optional[str]]:
+    """Fetch one page of documents and the cursor for the next page (None on the last page)"""
+    docs = await sorted_find(collection, query, id_field, cursor, projection).limit(limit + 1).to_list(limit + 1)
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(docs[-1], id_field)
+
+
+async def stream_ndjson(motor_cursor, to_model: Callable[[dict], BaseModel],
+                        enrich: Optional[Callable[[List[dict]], Awaitable]] = None,
+                        batch_size: int = STREAM_BATCH_SIZE):
+    """Yield one JSON line per document straight from a Motor cursor.
+
+    Documents are pulled in small batches so `enrich` (e.g. a patient-name join)
+    costs one query per batch and memory stays bounded by `batch_size`.
+    """
+    batch = []
+    async for doc in motor_cursor.batch_size(batch_size):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield await _render_batch(batch, to_model, enrich)
+            batch = []
+    if batch:
+        yield await _render_batch(batch, to_model, enrich)
+
+
+async def _render_batch(batch, to_model, enrich):
+    if enrich:
+        await enrich(batch)
+    return "".join(to_model(doc).model_dump_json() + "\n" for doc in batch)
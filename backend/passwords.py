@@ -0,0 +1,17 @@
+"""bcrypt helpers, kept in a light module so process-pool workers can import them cheaply"""
+from typing import List
+
+import bcrypt
+
+
+def hash_password(password: str) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """Hash several passwords in one pool task (bulk imports)"""
+    return [hash_password(p) for p in passwords]
@@ -0,0 +1,225 @@
+"""
+Opt-in slow-request profiler.
+
+`SlowRequestProfiler` keeps the Mongo commands each request issues (name,
+collection and duration only, never filters). For a sampled fraction of
+requests, a background thread also samples the request's stack every few
+milliseconds:
+
+  - if the request's task is the one running on the event loop, it takes
+    the live thread stack (CPU spent in the handler);
+  - otherwise it takes the task's suspended coroutine chain (what the
+    request is awaiting: Mongo, the LLM, a pool slot...).
+
+Stacks are aggregated in collapsed form (`frame;frame;...` -> samples),
+which flame-graph tools accept as-is. Requests slower than the threshold
+are kept in a bounded ring buffer, `SlowRequestLog`. Unsampled requests
+cost one list append per command, and the sampler thread only runs while
+a sampled request is in flight.
+"""
+import asyncio
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from metrics import RequestStats, current_request, route_label
+
+RUNNING_MARKER = "[running]"
+AWAITING_MARKER = "[awaiting]"
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _awaiting_frames(coro) -> list:
+    """Frames along a suspended coroutine's await chain, outermost first (Task.get_stack stops at the first)"""
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "ag_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "ag_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return frames
+
+
+class StackSampler:
+    """One daemon thread sampling every registered request task"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._targets: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, task: asyncio.Task, loop, thread_id: int) -> Counter:
+        """Start sampling `task`; the returned Counter fills with collapsed stacks until remove()"""
+        samples = Counter()
+        with self._lock:
+            self._targets[id(samples)] = (task, loop, thread_id, samples)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slow-request-sampler", daemon=True)
+                self._thread.start()
+        return samples
+
+    def remove(self, samples: Counter):
+        with self._lock:
+            self._targets.pop(id(samples), None)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._targets:
+                    self._thread = None
+                    return
+                targets = list(self._targets.values())
+            frames = sys._current_frames()
+            taken = []
+            for task, loop, thread_id, samples in targets:
+                try:
+                    stack = self._stack(task, loop, frames.get(thread_id))
+                except Exception:  # the task moved on while we were reading it
+                    continue
+                if stack:
+                    taken.append((samples, stack))
+            del frames
+            with self._lock:
+                # Requests removed meanwhile are being reported; leave their counters alone
+                for samples, stack in taken:
+                    if id(samples) in self._targets:
+                        samples[stack] += 1
+            time.sleep(self.interval)
+
+    @staticmethod
+    def _stack(task: asyncio.Task, loop, thread_frame) -> Optional[str]:
+        if task.done():
+            return None
+        root = getattr(task.get_coro(), "cr_frame", None)
+        if asyncio.current_task(loop) is task and thread_frame is not None:
+            labels = []
+            frame = thread_frame
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                if frame is root:
+                    break
+                frame = frame.f_back
+            labels.reverse()
+            labels.append(RUNNING_MARKER)
+        else:
+            labels = [_frame_label(frame) for frame in _awaiting_frames(task.get_coro())]
+            labels.append(AWAITING_MARKER)
+        return ";".join(labels)
+
+
+class SlowRequestLog:
+    """Ring buffer of the most recent slow requests"""
+
+    def __init__(self, maxlen: int):
+        self._entries = deque(maxlen=maxlen)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, entry: dict) -> dict:
+        with self._lock:
+            entry = {"id": next(self._ids), **entry}
+            self._entries.append(entry)
+        return entry
+
+    def get(self, entry_id: int) -> Optional[dict]:
+        with self._lock:
+            return next((entry for entry in self._entries if entry["id"] == entry_id), None)
+
+    def list(self, limit: int, route: Optional[str] = None) -> List[dict]:
+        """Newest first"""
+        with self._lock:
+            entries = list(self._entries)
+        entries.reverse()
+        if route:
+            entries = [entry for entry in entries if entry["route"] == route]
+        return entries[:limit]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SlowRequestProfiler:
+    """Add inside MetricsMiddleware so both share the request's RequestStats"""
+
+    def __init__(self, app, log: SlowRequestLog, threshold_ms: float = 1000, sample_rate: float = 0.01,
+                 sample_interval_ms: float = 10, max_commands: int = 100, top_stacks: int = 25):
+        self.app = app
+        self.log = log
+        self.threshold = threshold_ms / 1000
+        self.sample_rate = sample_rate
+        self.sampler = StackSampler(sample_interval_ms / 1000)
+        self.max_commands = max_commands
+        self.top_stacks = top_stacks
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = current_request.get()
+        token = None
+        if stats is None:
+            stats = RequestStats()
+            token = current_request.set(stats)
+        stats.capture_commands(self.max_commands)
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        samples = None
+        task = asyncio.current_task()
+        if task is not None and random.random() < self.sample_rate:
+            samples = self.sampler.add(task, asyncio.get_running_loop(), threading.get_ident())
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            if samples is not None:
+                self.sampler.remove(samples)
+            if token is not None:
+                current_request.reset(token)
+            if elapsed >= self.threshold:
+                self.log.add(self._entry(scope, status, started_at, elapsed, stats, samples))
+
+    def _entry(self, scope, status: int, started_at: datetime, elapsed: float, stats: RequestStats,
+               samples: Optional[Counter]) -> dict:
+        profile = None
+        if samples is not None:
+            profile = {
+                "interval_ms": self.sampler.interval * 1000,
+                "samples": sum(samples.values()),
+                "stacks": [{"stack": stack, "samples": count} for stack, count in samples.most_common(self.top_stacks)]
+            }
+        return {
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route_label(scope),
+            "status": status,
+            "started_at": started_at.isoformat(),
+            "duration_ms": round(elapsed * 1e3, 2),
+            "mongo_commands": stats.mongo_commands,
+            "mongo_ms": round(stats.mongo_seconds * 1e3, 2),
+            "commands": list(stats.commands or []),
+            "dropped_commands": stats.dropped_commands,
+            "profile": profile,
+        }
@@ -0,0 +1,262 @@
+"""
+Reminder dispatcher: claims due reminders and delivers them through channel adapters.
+
+Reminders are claimed one at a time with an atomic find_one_and_update lease,
+so any number of dispatchers (in the API process or standalone) can share the
+collection. A batch is fanned out to its channels under per-channel concurrency
+limits and the outcome is written back with one bulk_write. A failed delivery
+is retried after REMINDER_RETRY_DELAY_SECONDS; after REMINDER_MAX_ATTEMPTS
+failures the reminder is marked `failed` and no longer claimed.
+
+Run standalone:
+    python reminder_dispatch.py          # dispatch forever
+    python reminder_dispatch.py --once   # process everything currently due and exit
+"""
+import argparse
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pymongo import ReturnDocument, UpdateOne
+
+from dashboard_stats import DashboardCounters
+from timestamps import parse_timestamp
+from versioning import bump_version
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderChannel:
+    """Delivery adapter for one reminder_type; subclasses implement `send`"""
+
+    def __init__(self, name: str, concurrency: int = 10):
+        self.name = name
+        self.slots = asyncio.Semaphore(concurrency)
+
+    async def send(self, reminder: dict, patient: Optional[dict]):
+        raise NotImplementedError
+
+
+class LogChannel(ReminderChannel):
+    """Stub adapter that only logs; used until real providers are configured"""
+
+    async def send(self, reminder: dict, patient: Optional[dict]):
+        contact = patient.get("email" if self.name == "email" else "phone") if patient else None
+        logger.info(f"[{self.name}] reminder {reminder['reminder_id']} -> {contact}: {reminder['message']}")
+
+
+def default_channels() -> Dict[str, ReminderChannel]:
+    concurrency = int(os.environ.get('REMINDER_CHANNEL_CONCURRENCY', '10'))
+    return {name: LogChannel(name, concurrency) for name in ("email", "sms", "whatsapp")}
+
+
+class ReminderDispatcher:
+    def __init__(self, db, channels: Dict[str, ReminderChannel], batch_size: int = 100,
+                 lease_seconds: int = 120, poll_interval: float = 5.0, retry_delay_seconds: int = 300,
+                 max_attempts: int = 5, counters: Optional[DashboardCounters] = None):
+        self.db = db
+        self.counters = counters
+        self.channels = channels
+        self.batch_size = batch_size
+        self.lease = timedelta(seconds=lease_seconds)
+        self.poll_interval = poll_interval
+        self.retry_delay = timedelta(seconds=retry_delay_seconds)
+        self.max_attempts = max_attempts
+        self.worker_id = f"dispatcher_{uuid.uuid4().hex[:8]}"
+        self.sent = 0
+        self.failed = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def convert_legacy_schedules(self) -> int:
+        """Rewrite pending ISO-string scheduled_for values as dates; returns how many changed.
+
+        Strings with arbitrary offsets do not sort by instant (and never compare
+        with dates), so this runs once when the dispatcher starts; the API only
+        writes dates, so no new strings appear afterwards.
+        """
+        updates = []
+        cursor = self.db.reminders.find(
+            {"sent": False, "scheduled_for": {"$type": "string"}}, {"_id": 0, "reminder_id": 1, "scheduled_for": 1}
+        )
+        async for reminder in cursor:
+            try:
+                scheduled_for = parse_timestamp(reminder["scheduled_for"])
+            except ValueError:
+                logger.warning(f"Reminder {reminder['reminder_id']} has an unparseable scheduled_for")
+                continue
+            updates.append(UpdateOne(
+                {"reminder_id": reminder["reminder_id"], "scheduled_for": reminder["scheduled_for"]},
+                {"$set": {"scheduled_for": scheduled_for}}
+            ))
+        if updates:
+            await self.db.reminders.bulk_write(updates, ordered=False)
+        return len(updates)
+
+    async def claim_batch(self) -> List[dict]:
+        now = datetime.now(timezone.utc)
+        claimed = []
+        while len(claimed) < self.batch_size:
+            reminder = await self.db.reminders.find_one_and_update(
+                {
+                    "sent": False,
+                    "failed": {"$ne": True},
+                    "scheduled_for": {"$lte": now},
+                    "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]
+                },
+                {"$set": {"lease_owner": self.worker_id, "lease_until": now + self.lease}},
+                sort=[("scheduled_for", 1)],
+                projection={"_id": 0},
+                return_document=ReturnDocument.AFTER
+            )
+            if not reminder:
+                break
+            claimed.append(reminder)
+        return claimed
+
+    async def dispatch_batch(self, batch: List[dict]):
+        patient_ids = list({r["patient_id"] for r in batch})
+        cursor = self.db.patients.find(
+            {"patient_id": {"$in": patient_ids}},
+            {"_id": 0, "patient_id": 1, "name": 1, "email": 1, "phone": 1}
+        )
+        patients = {p["patient_id"]: p async for p in cursor}
+
+        errors = await asyncio.gather(*(self._deliver(r, patients.get(r["patient_id"])) for r in batch))
+        now = datetime.now(timezone.utc)
+        # Sent or given up: no longer pending. Updates are guarded by our lease, so
+        # modified_count excludes reminders another dispatcher took over and settled
+        settled, retries = [], []
+        gave_up = 0
+        for reminder, error in zip(batch, errors):
+            match = {"reminder_id": reminder["reminder_id"], "lease_owner": self.worker_id}
+            if error is None:
+                settled.append(UpdateOne(match, bump_version({
+                    "$set": {"sent": True, "sent_at": now},
+                    "$unset": {"lease_owner": "", "lease_until": ""}
+                }, now)))
+            elif reminder.get("attempts", 0) + 1 >= self.max_attempts:
+                gave_up += 1
+                settled.append(UpdateOne(match, bump_version({
+                    "$set": {"failed": True, "failed_at": now, "last_error": error},
+                    "$inc": {"attempts": 1},
+                    "$unset": {"lease_owner": "", "lease_until": ""}
+                }, now)))
+            else:
+                # Keep the lease until the retry delay passes so the reminder is not retried immediately
+                retries.append(UpdateOne(match, {
+                    "$set": {"last_error": error, "lease_until": now + self.retry_delay},
+                    "$inc": {"attempts": 1}
+                }))
+        if settled:
+            result = await self.db.reminders.bulk_write(settled, ordered=False)
+            if result.modified_count and self.counters:
+                await self.counters.bump(pending_reminders=-result.modified_count)
+        if retries:
+            await self.db.reminders.bulk_write(retries, ordered=False)
+        sent = sum(1 for e in errors if e is None)
+        if gave_up:
+            logger.error(f"{gave_up} reminders failed {self.max_attempts} times and were marked failed")
+        self.sent += sent
+        self.failed += len(batch) - sent
+        return sent
+
+    async def _deliver(self, reminder: dict, patient: Optional[dict]) -> Optional[str]:
+        channel = self.channels.get(reminder.get("reminder_type"))
+        if channel is None:
+            return f"No channel for reminder_type {reminder.get('reminder_type')!r}"
+        try:
+            async with channel.slots:
+                await channel.send(reminder, patient)
+        except Exception as e:
+            logger.warning(f"Reminder {reminder['reminder_id']} failed on {channel.name}: {e}")
+            return str(e) or e.__class__.__name__
+        return None
+
+    async def run_once(self) -> int:
+        """Dispatch everything currently due; returns the number of reminders sent"""
+        total = 0
+        while True:
+            batch = await self.claim_batch()
+            if not batch:
+                return total
+            total += await self.dispatch_batch(batch)
+
+    async def _seconds_until_next_due(self) -> float:
+        now = datetime.now(timezone.utc)
+        upcoming = await self.db.reminders.find_one(
+            {"sent": False, "failed": {"$ne": True}, "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]},
+            {"_id": 0, "scheduled_for": 1},
+            sort=[("scheduled_for", 1)]
+        )
+        if not upcoming:
+            return self.poll_interval
+        due = parse_timestamp(upcoming["scheduled_for"])
+        wait = (due - now).total_seconds()
+        return min(max(wait, 0.0), self.poll_interval)
+
+    async def run_forever(self):
+        try:
+            await self.convert_legacy_schedules()
+        except Exception as e:
+            logger.error(f"Converting legacy reminder schedules failed: {e}")
+        while True:
+            try:
+                await self.run_once()
+                await asyncio.sleep(await self._seconds_until_next_due())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Reminder dispatch failed: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+def dispatcher_from_env(db, counters: Optional[DashboardCounters] = None) -> ReminderDispatcher:
+    return ReminderDispatcher(
+        db,
+        default_channels(),
+        counters=counters,
+        batch_size=int(os.environ.get('REMINDER_BATCH_SIZE', '100')),
+        lease_seconds=int(os.environ.get('REMINDER_LEASE_SECONDS', '120')),
+        poll_interval=float(os.environ.get('REMINDER_POLL_INTERVAL', '5')),
+        retry_delay_seconds=int(os.environ.get('REMINDER_RETRY_DELAY_SECONDS', '300')),
+        max_attempts=int(os.environ.get('REMINDER_MAX_ATTEMPTS', '5'))
+    )
+
+
+async def _main(once: bool):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    db = client[os.environ['DB_NAME']]
+    dispatcher = dispatcher_from_env(db, DashboardCounters(db))
+    try:
+        if once:
+            await dispatcher.convert_legacy_schedules()
+            print(f"sent {await dispatcher.run_once()} reminders")
+        else:
+            await dispatcher.run_forever()
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dispatch due CareFollow reminders")
+    parser.add_argument("--once", action="store_true", help="process due reminders once and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(_main(args.once))
@@ -0,0 +1,127 @@
+"""
+Data access: one repository per collection.
+
+A repository owns its collection's id field, keyset pagination, batch
+enrichment (the patient-name join) and the document-to-model mapper.
+The mapper hands the raw document to `model_validate`: pydantic-core drops
+the extra fields and parses legacy ISO-string timestamps on its own, and
+it is faster than filtering the row and calling `model_construct` in
+Python (see benchmarks/json_render_bench.py). Each model is validated
+exactly once; list pages are then serialized with a per-repository
+TypeAdapter instead of being re-validated by FastAPI.
+"""
+from typing import AsyncIterator, Callable, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, TypeAdapter
+
+from joins import attach_patient_names
+from models import (
+    AppointmentResponse, CareInstructionResponse, FollowUpResponse, PatientResponse, ReminderResponse, UserResponse
+)
+from pagination import DEFAULT_PAGE_SIZE, find_page, sorted_find, stream_ndjson
+
+
+class Repository:
+    collection_name: str
+    id_field: str
+    model: Type[BaseModel]
+    join_patient_names = False
+    # Default read projection; subclasses drop fields no response needs
+    projection = {"_id": 0}
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db[self.collection_name]
+        self._list_adapter = TypeAdapter(List[self.model])
+
+    def to_model(self, doc: dict) -> BaseModel:
+        return self.model.model_validate(doc)
+
+    def dump_json(self, models: List[BaseModel]) -> bytes:
+        """Serialize a list of this repository's models in one pass"""
+        return self._list_adapter.dump_json(models)
+
+    async def enrich(self, docs: List[dict]):
+        if self.join_patient_names:
+            await attach_patient_names(self.db, docs)
+
+    async def find_one(self, doc_id: str, projection: Optional[dict] = None) -> Optional[dict]:
+        return await self.collection.find_one({self.id_field: doc_id}, projection or self.projection)
+
+    async def page(self, query: dict, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                   projection: Optional[dict] = None) -> Tuple[List[dict], Optional[str]]:
+        """Raw documents for one keyset page plus the next cursor"""
+        return await find_page(self.collection, query, self.id_field, limit, cursor, projection or self.projection)
+
+    async def list(self, query: dict, limit: int = DEFAULT_PAGE_SIZE,
+                   cursor: Optional[str] = None) -> Tuple[List[BaseModel], Optional[str]]:
+        docs, next_cursor = await self.page(query, limit, cursor)
+        await self.enrich(docs)
+        return [self.to_model(doc) for doc in docs], next_cursor
+
+    def stream(self, query: dict, limit: Optional[int] = None, cursor: Optional[str] = None) -> AsyncIterator[str]:
+        """NDJSON lines for every match; the cursor is decoded here so a bad one fails before streaming"""
+        motor_cursor = sorted_find(self.collection, query, self.id_field, cursor, self.projection)
+        if limit:
+            motor_cursor = motor_cursor.limit(limit)
+        return stream_ndjson(motor_cursor, self.to_model, self.enrich)
+
+
+class UserRepository(Repository):
+    collection_name = "users"
+    id_field = "user_id"
+    model = UserResponse
+
+
+class PatientRepository(Repository):
+    collection_name = "patients"
+    id_field = "patient_id"
+    model = PatientResponse
+
+
+class AppointmentRepository(Repository):
+    collection_name = "appointments"
+    id_field = "appointment_id"
+    model = AppointmentResponse
+    join_patient_names = True
+
+
+class InstructionRepository(Repository):
+    collection_name = "care_instructions"
+    id_field = "instruction_id"
+    model = CareInstructionResponse
+    # Legacy documents embed their audio in audio_url as a multi-MB base64 data URL
+    projection = {"_id": 0, "audio_url": 0}
+
+    def __init__(self, db, audio_url: Callable[[dict], Optional[str]]):
+        super().__init__(db)
+        # Stored audio is exposed through a signed URL, never the stored value
+        self.audio_url = audio_url
+
+    async def enrich(self, docs: List[dict]):
+        """Set `has_legacy_audio`, checking blob-less documents for inline audio without reading it"""
+        ids = [doc["instruction_id"] for doc in docs if not doc.get("audio_blob")]
+        legacy = set()
+        if ids:
+            cursor = self.collection.find(
+                {"instruction_id": {"$in": ids}, "audio_url": {"$nin": [None, ""]}}, {"_id": 0, "instruction_id": 1}
+            )
+            legacy = {doc["instruction_id"] async for doc in cursor}
+        for doc in docs:
+            doc["has_legacy_audio"] = doc["instruction_id"] in legacy
+
+    def to_model(self, doc: dict) -> BaseModel:
+        return super().to_model({**doc, "audio_url": self.audio_url(doc)})
+
+
+class ReminderRepository(Repository):
+    collection_name = "reminders"
+    id_field = "reminder_id"
+    model = ReminderResponse
+
+
+class FollowUpRepository(Repository):
+    collection_name = "followups"
+    id_field = "followup_id"
+    model = FollowUpResponse
+    join_patient_names = True
@@ -1,32 +1,131 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, BackgroundTasks, File, Query, Request, Response, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
+import json
 import logging
 import httpx
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
 from typing import List, Optional, Literal
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone, timedelta
-import bcrypt
 import jwt
 import base64
+from functools import partial
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 from elevenlabs import ElevenLabs
+from export import EXPORT_COLLECTIONS, export_stream
+from fast_json import ORJSON_AVAILABLE, FastJSONResponse
+from etag import ETagMiddleware, version_etag
+from bulk_import import ImportReport, detect_format, iter_rows, read_batch, validation_message, write_errors
+from blobstore import BlobStore, RangeNotSatisfiable, parse_range
+from cachetools import TTLCache
+from dashboard_stats import DashboardCounters
+from database import PoolMonitor, client_options, ping, ready_status
+from http_clients import HttpClients
+from indexes import ensure_indexes
+from instruction_cache import ContentCache, audio_cache_key, instruction_cache_key
+from jobs import DONE, LocalJobQueue, MongoJobQueue
+from metrics import (
+    MetricsMiddleware, MongoCommandMetrics, mongo_pool_metrics, offload_pool_metrics, registry, stage_timer
+)
+from models import (
+    UserCreate, UserLogin, UserResponse, TokenResponse, PatientCreate, PatientResponse,
+    AppointmentCreate, AppointmentResponse, CareInstructionCreate, CareInstructionResponse,
+    GenerationJobResponse, ReminderCreate, ReminderResponse, FollowUpCreate, FollowUpResponse,
+    BulkImportResponse
+)
+from offload import OffloadSaturated, cpu_pool, io_pool, pool_stats
+from pagination import DEFAULT_PAGE_SIZE, InvalidCursor
+from passwords import hash_password, hash_passwords, verify_password
+from profiling import SlowRequestLog, SlowRequestProfiler
+from reminder_dispatch import dispatcher_from_env
+from repositories import (
+    AppointmentRepository, FollowUpRepository, InstructionRepository, PatientRepository, ReminderRepository,
+    Repository, UserRepository
+)
+from text_cleaning import IncrementalTextCleaner, clean_ai_text
+from timestamps import json_timestamp, parse_timestamp
+from session_cache import SessionExchangeCache
+from user_cache import USER_PROJECTION, UserCache
+from versioning import bump_version, initial_version
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection: pool size, timeouts, read preference and compression come from
+# the MONGO_* settings in database.py. The client connects lazily; the lifespan closes it.
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+mongo_pool_monitor = PoolMonitor()
+client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandMetrics(), mongo_pool_monitor], **client_options())
 db = client[os.environ['DB_NAME']]
+audio_store = BlobStore(db, bucket_name="audio")
+dashboard_counters = DashboardCounters(db)
+# How often the API process rebuilds the dashboard counters from the collections (0 disables)
+DASHBOARD_RECONCILE_SECONDS = float(os.environ.get('DASHBOARD_RECONCILE_SECONDS', '3600'))
+
+async def create_indexes_when_reachable(max_delay: float = 60):
+    """Retry index creation until MongoDB answers; runs in the background when it is down at startup"""
+    delay = 1
+    while True:
+        try:
+            await ensure_indexes(db)
+            logger.info("Indexes created after MongoDB became reachable")
+            return
+        except PyMongoError as e:
+            logger.warning(f"Index creation failed, retrying in {delay}s: {e}")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_delay)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Connect and start background workers before serving; drain and close on shutdown.
+
+    A MongoDB outage at startup does not stop the process: /ready reports 503
+    until the database answers and the indexes are created in the background.
+    """
+    app.state.draining = False
+    index_task = None
+    mongo = await ping(client, MONGO_READY_TIMEOUT)
+    if os.environ.get('AUTO_CREATE_INDEXES', 'true').lower() == 'true':
+        if mongo["ok"]:
+            await ensure_indexes(db)
+        else:
+            logger.warning(f"MongoDB not reachable at startup, creating indexes later: {mongo['error']}")
+            index_task = asyncio.create_task(create_indexes_when_reachable())
+    elif not mongo["ok"]:
+        logger.warning(f"MongoDB not reachable at startup: {mongo['error']}")
+    generation_queue.start()
+    if REMINDER_DISPATCHER_ENABLED:
+        reminder_dispatcher.start()
+    if DASHBOARD_RECONCILE_SECONDS > 0:
+        dashboard_counters.start(DASHBOARD_RECONCILE_SECONDS)
+    try:
+        yield
+    finally:
+        # Readiness fails from here on so load balancers stop routing to this worker
+        app.state.draining = True
+        if index_task is not None:
+            index_task.cancel()
+            await asyncio.gather(index_task, return_exceptions=True)
+        await generation_queue.stop()
+        await reminder_dispatcher.stop()
+        await dashboard_counters.stop()
+        await http_clients.aclose()
+        io_pool.shutdown()
+        cpu_pool.shutdown()
+        client.close()
 
 # Create the main app
-app = FastAPI(title="CareFollow - Sistema de Pós-Atendimento")
+app = FastAPI(title="CareFollow - Sistema de Pós-Atendimento", lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -35,6 +134,24 @@ api_router = APIRouter(prefix="/api")
 security = HTTPBearer(auto_error=False)
 JWT_SECRET = os.environ.get('JWT_SECRET', 'care-follow-secret-key-2024')
 JWT_ALGORITHM = "HS256"
+# Audience of media tokens; session tokens carry none, so PyJWT rejects one kind where the other is expected
+MEDIA_TOKEN_AUDIENCE = "media"
+# When enabled, tokens carry the profile fields handlers read so requests skip the users lookup
+AUTH_EMBED_CLAIMS = os.environ.get('AUTH_EMBED_CLAIMS', 'false').lower() == 'true'
+EMBEDDED_CLAIMS = ("email", "name", "phone", "picture", "patient_id", "created_at")
+user_cache = UserCache(
+    maxsize=int(os.environ.get('USER_CACHE_SIZE', '10000')),
+    ttl=float(os.environ.get('USER_CACHE_TTL_SECONDS', '30'))
+)
+# Reloads repeat the OAuth exchange with the same session_id; reuse the first result briefly
+session_exchange_cache = SessionExchangeCache(
+    maxsize=int(os.environ.get('SESSION_EXCHANGE_CACHE_SIZE', '10000')),
+    ttl=float(os.environ.get('SESSION_EXCHANGE_CACHE_TTL_SECONDS', '60'))
+)
+
+# Outbound HTTP: pooled keep-alive clients shared by every request, closed by the lifespan
+http_clients = HttpClients()
+http_clients.register("auth", os.environ.get('AUTH_SERVICE_URL', 'https://demobackend.emergentagent.com'))
 
 # ElevenLabs client
 eleven_client = ElevenLabs(api_key=os.environ.get('ELEVENLABS_API_KEY', ''))
@@ -43,138 +160,54 @@ eleven_client = ElevenLabs(api_key=os.environ.get('ELEVENLABS_API_KEY', ''))
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# ============== MODELS ==============
-
-class UserCreate(BaseModel):
-    email: EmailStr
-    password: str
-    name: str
-    role: Literal["staff", "patient"] = "staff"
-    phone: Optional[str] = None
-
-class UserLogin(BaseModel):
-    email: EmailStr
-    password: str
-
-class UserResponse(BaseModel):
-    user_id: str
-    email: str
-    name: str
-    role: str
-    phone: Optional[str] = None
-    picture: Optional[str] = None
-    created_at: datetime
-
-class TokenResponse(BaseModel):
-    access_token: str
-    token_type: str = "bearer"
-    user: UserResponse
-
-class PatientCreate(BaseModel):
-    name: str
-    email: EmailStr
-    phone: str
-    birth_date: Optional[str] = None
-    notes: Optional[str] = None
-
-class PatientResponse(BaseModel):
-    patient_id: str
-    name: str
-    email: str
-    phone: str
-    birth_date: Optional[str] = None
-    notes: Optional[str] = None
-    created_at: datetime
-    created_by: str
-
-class AppointmentCreate(BaseModel):
-    patient_id: str
-    procedure: str
-    diagnosis: str
-    notes: Optional[str] = None
-    appointment_date: Optional[str] = None
-
-class AppointmentResponse(BaseModel):
-    appointment_id: str
-    patient_id: str
-    patient_name: Optional[str] = None
-    procedure: str
-    diagnosis: str
-    notes: Optional[str] = None
-    appointment_date: Optional[str] = None
-    created_at: datetime
-    created_by: str
-
-class CareInstructionCreate(BaseModel):
-    appointment_id: str
-    generate_audio: bool = True
-
-class CareInstructionResponse(BaseModel):
-    instruction_id: str
-    appointment_id: str
-    patient_id: str
-    text_content: str
-    audio_url: Optional[str] = None
-    created_at: datetime
-
-class ReminderCreate(BaseModel):
-    patient_id: str
-    appointment_id: Optional[str] = None
-    message: str
-    reminder_type: Literal["email", "sms", "whatsapp"] = "email"
-    scheduled_for: str
-
-class ReminderResponse(BaseModel):
-    reminder_id: str
-    patient_id: str
-    appointment_id: Optional[str] = None
-    message: str
-    reminder_type: str
-    scheduled_for: datetime
-    sent: bool = False
-    sent_at: Optional[datetime] = None
-    created_at: datetime
-
-class FollowUpCreate(BaseModel):
-    patient_id: str
-    appointment_id: Optional[str] = None
-    follow_up_date: str
-    reason: str
-    notes: Optional[str] = None
-
-class FollowUpResponse(BaseModel):
-    followup_id: str
-    patient_id: str
-    patient_name: Optional[str] = None
-    appointment_id: Optional[str] = None
-    follow_up_date: datetime
-    reason: str
-    notes: Optional[str] = None
-    completed: bool = False
-    created_at: datetime
-
 # ============== AUTH HELPERS ==============
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
-
-def create_token(user_id: str, role: str) -> str:
+def create_token(user_id: str, role: str, user: Optional[dict] = None) -> str:
     payload = {
         "user_id": user_id,
         "role": role,
         "exp": datetime.now(timezone.utc) + timedelta(days=7)
     }
+    if AUTH_EMBED_CLAIMS and user:
+        payload["profile"] = {key: json_timestamp(user.get(key)) for key in EMBEDDED_CLAIMS}
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+def create_media_token(instruction_id: str) -> str:
+    """Short-lived token letting <audio> elements fetch one instruction's audio without a bearer header"""
+    # Expiry is rounded to the hour so repeated listings hand out identical URLs
+    hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    payload = {
+        "instruction_id": instruction_id,
+        "scope": "audio",
+        "aud": MEDIA_TOKEN_AUDIENCE,
+        "exp": hour + timedelta(hours=2)
+    }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+def instruction_audio_url(i: dict) -> Optional[str]:
+    """Public URL for an instruction's audio; legacy base64 data URLs are served through the same endpoint.
+
+    Expects a document enriched by InstructionRepository (`has_legacy_audio`).
+    """
+    if not (i.get("audio_blob") or i.get("has_legacy_audio")):
+        return None
+    instruction_id = i["instruction_id"]
+    return f"/api/instructions/{instruction_id}/audio?token={create_media_token(instruction_id)}"
+
+async def load_user(payload: dict) -> Optional[dict]:
+    if "user_id" not in payload or "role" not in payload:
+        return None
+    profile = payload.get("profile")
+    if profile is not None:
+        return {"user_id": payload["user_id"], "role": payload["role"], **profile}
+    return await user_cache.get(db, payload["user_id"])
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     if not credentials:
         raise HTTPException(status_code=401, detail="Not authenticated")
     try:
         payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user = await db.users.find_one({"user_id": payload["user_id"]}, {"_id": 0, "password": 0})
+        user = await load_user(payload)
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
         return user
@@ -188,11 +221,39 @@ async def get_current_user_optional(credentials: HTTPAuthorizationCredentials =
         return None
     try:
         payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user = await db.users.find_one({"user_id": payload["user_id"]}, {"_id": 0, "password": 0})
-        return user
+        return await load_user(payload)
     except:
         return None
 
+# ============== REPOSITORIES ==============
+
+user_repo = UserRepository(db)
+patient_repo = PatientRepository(db)
+appointment_repo = AppointmentRepository(db)
+instruction_repo = InstructionRepository(db, audio_url=instruction_audio_url)
+reminder_repo = ReminderRepository(db)
+followup_repo = FollowUpRepository(db)
+
+# Opt-in orjson rendering of list pages (plain json if orjson is not installed)
+FAST_JSON_RESPONSES = os.environ.get('FAST_JSON_RESPONSES', 'false').lower() == 'true'
+if FAST_JSON_RESPONSES and not ORJSON_AVAILABLE:
+    logger.warning("FAST_JSON_RESPONSES is on but orjson is not installed; list pages fall back to the json module")
+
+async def paginated_list(repo: Repository, query: dict, limit: Optional[int], cursor: Optional[str], stream: bool):
+    """Serve a list endpoint as a keyset-paginated page or as an NDJSON stream"""
+    try:
+        if stream:
+            return StreamingResponse(repo.stream(query, limit, cursor), media_type="application/x-ndjson")
+        models, next_cursor = await repo.list(query, limit or DEFAULT_PAGE_SIZE, cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    # Rendered in one pass here; returning the models would make FastAPI validate every row again
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    if FAST_JSON_RESPONSES:
+        return FastJSONResponse(models, headers=headers)
+    return Response(repo.dump_json(models), media_type="application/json", headers=headers)
+
 # ============== AUTH ENDPOINTS ==============
 
 @api_router.post("/auth/register", response_model=TokenResponse)
@@ -205,16 +266,20 @@ async def register(user_data: UserCreate):
     user_doc = {
         "user_id": user_id,
         "email": user_data.email,
-        "password": hash_password(user_data.password),
+        "password": await cpu_pool.run(hash_password, user_data.password),
         "name": user_data.name,
         "role": user_data.role,
         "phone": user_data.phone,
         "picture": None,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
-    await db.users.insert_one(user_doc)
+    try:
+        await db.users.insert_one(user_doc)
+    except DuplicateKeyError:
+        # A concurrent registration with the same email got past the check above
+        raise HTTPException(status_code=400, detail="Email already registered")
     
-    token = create_token(user_id, user_data.role)
+    token = create_token(user_id, user_data.role, user_doc)
     user_response = UserResponse(
         user_id=user_id,
         email=user_data.email,
@@ -228,101 +293,80 @@ async def register(user_data: UserCreate):
 @api_router.post("/auth/login", response_model=TokenResponse)
 async def login(credentials: UserLogin):
     user = await db.users.find_one({"email": credentials.email})
-    if not user or not verify_password(credentials.password, user["password"]):
+    if not user or not await cpu_pool.run(verify_password, credentials.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    token = create_token(user["user_id"], user["role"])
-    created_at = user.get("created_at")
-    if isinstance(created_at, str):
-        created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-    
-    user_response = UserResponse(
-        user_id=user["user_id"],
-        email=user["email"],
-        name=user["name"],
-        role=user["role"],
-        phone=user.get("phone"),
-        picture=user.get("picture"),
-        created_at=created_at
-    )
-    return TokenResponse(access_token=token, user=user_response)
+    token = create_token(user["user_id"], user["role"], user)
+    return TokenResponse(access_token=token, user=user_repo.to_model(user))
 
 @api_router.get("/auth/me", response_model=UserResponse)
 async def get_me(current_user: dict = Depends(get_current_user)):
-    created_at = current_user.get("created_at")
-    if isinstance(created_at, str):
-        created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-    
-    return UserResponse(
-        user_id=current_user["user_id"],
-        email=current_user["email"],
-        name=current_user["name"],
-        role=current_user["role"],
-        phone=current_user.get("phone"),
-        picture=current_user.get("picture"),
-        created_at=created_at
-    )
+    return user_repo.to_model(current_user)
 
-@api_router.get("/auth/session")
-async def get_session_data(session_id: str):
-    """Exchange session_id for user data from Emergent Auth"""
-    try:
-        async with httpx.AsyncClient() as http_client:
-            response = await http_client.get(
-                "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
-                headers={"X-Session-ID": session_id}
+async def upsert_oauth_user(data: dict) -> dict:
+    """Create or refresh the account for an OAuth identity in one atomic round trip"""
+    for attempt in range(2):
+        try:
+            return await db.users.find_one_and_update(
+                {"email": data["email"]},
+                {
+                    "$set": {"name": data["name"], "picture": data.get("picture")},
+                    "$setOnInsert": {
+                        "user_id": f"user_{uuid.uuid4().hex[:12]}",
+                        "password": "",
+                        "role": "staff",
+                        "phone": None,
+                        "created_at": datetime.now(timezone.utc)
+                    }
+                },
+                projection=USER_PROJECTION,
+                upsert=True,
+                return_document=ReturnDocument.AFTER
             )
-            if response.status_code != 200:
-                raise HTTPException(status_code=401, detail="Invalid session")
-            
-            data = response.json()
-            
-            # Check if user exists
-            existing_user = await db.users.find_one({"email": data["email"]})
-            if existing_user:
-                user_id = existing_user["user_id"]
-                role = existing_user["role"]
-                # Update user info
-                await db.users.update_one(
-                    {"user_id": user_id},
-                    {"$set": {"name": data["name"], "picture": data.get("picture")}}
-                )
-            else:
-                # Create new user
-                user_id = f"user_{uuid.uuid4().hex[:12]}"
-                role = "staff"
-                user_doc = {
-                    "user_id": user_id,
-                    "email": data["email"],
-                    "password": "",
-                    "name": data["name"],
-                    "role": role,
-                    "phone": None,
-                    "picture": data.get("picture"),
-                    "created_at": datetime.now(timezone.utc).isoformat()
-                }
-                await db.users.insert_one(user_doc)
-            
-            # Create our own token
-            token = create_token(user_id, role)
-            
-            return {
-                "access_token": token,
-                "token_type": "bearer",
-                "user": {
-                    "user_id": user_id,
-                    "email": data["email"],
-                    "name": data["name"],
-                    "role": role,
-                    "picture": data.get("picture")
-                }
-            }
+        except DuplicateKeyError:
+            # Two first logins raced and the unique email index let the other insert win
+            if attempt:
+                raise
+
+async def exchange_session(session_id: str) -> dict:
+    try:
+        response = await http_clients.request(
+            "auth", "GET", "/auth/v1/env/oauth/session-data", headers={"X-Session-ID": session_id}
+        )
     except httpx.RequestError as e:
         logger.error(f"Error fetching session data: {e}")
         raise HTTPException(status_code=500, detail="Failed to authenticate")
+    if response.status_code != 200:
+        raise HTTPException(status_code=401, detail="Invalid session")
+    
+    user_doc = await upsert_oauth_user(response.json())
+    user_cache.invalidate(user_doc["user_id"])
+    
+    # Create our own token
+    token = create_token(user_doc["user_id"], user_doc["role"], user_doc)
+    
+    return {
+        "access_token": token,
+        "token_type": "bearer",
+        "user": {
+            "user_id": user_doc["user_id"],
+            "email": user_doc["email"],
+            "name": user_doc["name"],
+            "role": user_doc["role"],
+            "picture": user_doc.get("picture")
+        }
+    }
+
+@api_router.get("/auth/session")
+async def get_session_data(session_id: str):
+    """Exchange session_id for user data from Emergent Auth"""
+    return await session_exchange_cache.get_or_exchange(session_id, partial(exchange_session, session_id))
 
 # ============== PATIENTS ENDPOINTS ==============
 
+# Temporary password for the user account created alongside each patient
+PATIENT_TEMP_PASSWORD = "temp123"
+
 @api_router.post("/patients", response_model=PatientResponse)
 async def create_patient(patient: PatientCreate, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "staff":
@@ -336,10 +380,12 @@ async def create_patient(patient: PatientCreate, current_user: dict = Depends(ge
         "phone": patient.phone,
         "birth_date": patient.birth_date,
         "notes": patient.notes,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "created_by": current_user["user_id"]
+        "created_at": datetime.now(timezone.utc),
+        "created_by": current_user["user_id"],
+        **initial_version()
     }
     await db.patients.insert_one(patient_doc)
+    await dashboard_counters.bump(total_patients=1)
     
     # Also create a user account for the patient
     existing_user = await db.users.find_one({"email": patient.email})
@@ -347,14 +393,18 @@ async def create_patient(patient: PatientCreate, current_user: dict = Depends(ge
         user_doc = {
             "user_id": f"user_{uuid.uuid4().hex[:12]}",
             "email": patient.email,
-            "password": hash_password("temp123"),  # Temporary password
+            "password": await cpu_pool.run(hash_password, PATIENT_TEMP_PASSWORD),
             "name": patient.name,
             "role": "patient",
             "phone": patient.phone,
             "patient_id": patient_id,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         }
-        await db.users.insert_one(user_doc)
+        try:
+            await db.users.insert_one(user_doc)
+        except DuplicateKeyError:
+            # Created concurrently; keep that account, as when the check above finds one
+            pass
     
     return PatientResponse(
         patient_id=patient_id,
@@ -368,31 +418,20 @@ async def create_patient(patient: PatientCreate, current_user: dict = Depends(ge
     )
 
 @api_router.get("/patients", response_model=List[PatientResponse])
-async def list_patients(current_user: dict = Depends(get_current_user)):
+async def list_patients(
+    limit: Optional[int] = Query(None, ge=1, le=DEFAULT_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
     if current_user["role"] != "staff":
         raise HTTPException(status_code=403, detail="Only staff can list all patients")
     
-    patients = await db.patients.find({}, {"_id": 0}).to_list(1000)
-    result = []
-    for p in patients:
-        created_at = p.get("created_at")
-        if isinstance(created_at, str):
-            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-        result.append(PatientResponse(
-            patient_id=p["patient_id"],
-            name=p["name"],
-            email=p["email"],
-            phone=p["phone"],
-            birth_date=p.get("birth_date"),
-            notes=p.get("notes"),
-            created_at=created_at,
-            created_by=p["created_by"]
-        ))
-    return result
+    return await paginated_list(patient_repo, {}, limit, cursor, stream)
 
 @api_router.get("/patients/{patient_id}", response_model=PatientResponse)
-async def get_patient(patient_id: str, current_user: dict = Depends(get_current_user)):
-    patient = await db.patients.find_one({"patient_id": patient_id}, {"_id": 0})
+async def get_patient(patient_id: str, response: Response, current_user: dict = Depends(get_current_user)):
+    patient = await patient_repo.find_one(patient_id)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     
@@ -401,20 +440,11 @@ async def get_patient(patient_id: str, current_user: dict = Depends(get_current_
         if current_user.get("patient_id") != patient_id:
             raise HTTPException(status_code=403, detail="Access denied")
     
-    created_at = patient.get("created_at")
-    if isinstance(created_at, str):
-        created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-    
-    return PatientResponse(
-        patient_id=patient["patient_id"],
-        name=patient["name"],
-        email=patient["email"],
-        phone=patient["phone"],
-        birth_date=patient.get("birth_date"),
-        notes=patient.get("notes"),
-        created_at=created_at,
-        created_by=patient["created_by"]
-    )
+    # The representation is a pure function of the document, so its revision is a strong validator
+    etag = version_etag(patient, "patient_id")
+    if etag:
+        response.headers["ETag"] = etag
+    return patient_repo.to_model(patient)
 
 # ============== APPOINTMENTS ENDPOINTS ==============
 
@@ -436,10 +466,12 @@ async def create_appointment(appointment: AppointmentCreate, current_user: dict
         "diagnosis": appointment.diagnosis,
         "notes": appointment.notes,
         "appointment_date": appointment.appointment_date or datetime.now(timezone.utc).isoformat(),
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "created_by": current_user["user_id"]
+        "created_at": datetime.now(timezone.utc),
+        "created_by": current_user["user_id"],
+        **initial_version()
     }
     await db.appointments.insert_one(appointment_doc)
+    await dashboard_counters.bump(total_appointments=1)
     
     return AppointmentResponse(
         appointment_id=appointment_id,
@@ -454,36 +486,24 @@ async def create_appointment(appointment: AppointmentCreate, current_user: dict
     )
 
 @api_router.get("/appointments", response_model=List[AppointmentResponse])
-async def list_appointments(patient_id: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+async def list_appointments(
+    patient_id: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=DEFAULT_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
     query = {}
     if current_user["role"] == "patient":
         query["patient_id"] = current_user.get("patient_id")
     elif patient_id:
         query["patient_id"] = patient_id
     
-    appointments = await db.appointments.find(query, {"_id": 0}).to_list(1000)
-    result = []
-    for a in appointments:
-        patient = await db.patients.find_one({"patient_id": a["patient_id"]}, {"_id": 0, "name": 1})
-        created_at = a.get("created_at")
-        if isinstance(created_at, str):
-            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-        result.append(AppointmentResponse(
-            appointment_id=a["appointment_id"],
-            patient_id=a["patient_id"],
-            patient_name=patient["name"] if patient else None,
-            procedure=a["procedure"],
-            diagnosis=a["diagnosis"],
-            notes=a.get("notes"),
-            appointment_date=a.get("appointment_date"),
-            created_at=created_at,
-            created_by=a["created_by"]
-        ))
-    return result
+    return await paginated_list(appointment_repo, query, limit, cursor, stream)
 
 @api_router.get("/appointments/{appointment_id}", response_model=AppointmentResponse)
 async def get_appointment(appointment_id: str, current_user: dict = Depends(get_current_user)):
-    appointment = await db.appointments.find_one({"appointment_id": appointment_id}, {"_id": 0})
+    appointment = await appointment_repo.find_one(appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     
@@ -491,70 +511,211 @@ async def get_appointment(appointment_id: str, current_user: dict = Depends(get_
         if current_user.get("patient_id") != appointment["patient_id"]:
             raise HTTPException(status_code=403, detail="Access denied")
     
-    patient = await db.patients.find_one({"patient_id": appointment["patient_id"]}, {"_id": 0, "name": 1})
-    created_at = appointment.get("created_at")
-    if isinstance(created_at, str):
-        created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-    
-    return AppointmentResponse(
-        appointment_id=appointment["appointment_id"],
-        patient_id=appointment["patient_id"],
-        patient_name=patient["name"] if patient else None,
-        procedure=appointment["procedure"],
-        diagnosis=appointment["diagnosis"],
-        notes=appointment.get("notes"),
-        appointment_date=appointment.get("appointment_date"),
-        created_at=created_at,
-        created_by=appointment["created_by"]
-    )
-
-# ============== CARE INSTRUCTIONS (AI + AUDIO) ==============
-
-import re
-
-def clean_ai_text(text: str) -> str:
-    """Remove markdown formatting and clean up AI-generated text"""
-    if not text:
-        return ""
-    # Remove markdown headers
-    text = re.sub(r'#{1,6}\s*', '', text)
-    # Remove bold/italic markers
-    text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
-    text = re.sub(r'\*([^*]+)\*', r'\1', text)
-    text = re.sub(r'__([^_]+)__', r'\1', text)
-    text = re.sub(r'_([^_]+)_', r'\1', text)
-    # Clean bullet points
-    text = re.sub(r'^[-*•]\s*', '• ', text, flags=re.MULTILINE)
-    # Remove code blocks
-    text = re.sub(r'```[\s\S]*?```', '', text)
-    text = re.sub(r'`([^`]+)`', r'\1', text)
-    # Remove horizontal rules
-    text = re.sub(r'^---+$', '', text, flags=re.MULTILINE)
-    # Clean extra whitespace
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    return text.strip()
-
-@api_router.post("/instructions/generate", response_model=CareInstructionResponse)
-async def generate_care_instructions(request: CareInstructionCreate, current_user: dict = Depends(get_current_user)):
-    if current_user["role"] != "staff":
-        raise HTTPException(status_code=403, detail="Only staff can generate instructions")
+    await appointment_repo.enrich([appointment])
+    return appointment_repo.to_model(appointment)
+
+# ============== BULK IMPORT ==============
+
+async def run_bulk_import(file: UploadFile, fmt: Optional[str], import_batch) -> dict:
+    """Feed an uploaded CSV/NDJSON file to `import_batch` one batch of parsed rows at a time"""
+    report = ImportReport()
+    rows = iter_rows(file.file, detect_format(fmt, file.filename, file.content_type))
+    while True:
+        batch = await io_pool.run(read_batch, rows)
+        if not batch:
+            break
+        report.total_rows += len(batch)
+        parsed = []
+        for number, data, error in batch:
+            if error:
+                report.fail(number, error)
+            else:
+                parsed.append((number, data))
+        if parsed:
+            await import_batch(parsed, report)
+    return report.to_dict()
+
+def validate_rows(rows: list, model, report: ImportReport) -> list:
+    valid = []
+    for number, data in rows:
+        try:
+            valid.append((number, model.model_validate(data)))
+        except ValidationError as e:
+            report.fail(number, validation_message(e))
+    return valid
+
+async def insert_rows(collection, numbers: List[int], docs: List[dict], report: ImportReport) -> List[dict]:
+    """Unordered insert_many; rejected documents become row errors, the rest are returned"""
+    failed = {}
+    try:
+        await collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        failed = write_errors(e)
+    for index, error in failed.items():
+        report.fail(numbers[index], error)
+    inserted = [doc for index, doc in enumerate(docs) if index not in failed]
+    report.inserted += len(inserted)
+    return inserted
+
+async def hash_passwords_in_pool(passwords: List[str]) -> List[str]:
+    """Spread bcrypt over the process pool in one task per worker"""
+    if not passwords:
+        return []
+    size = -(-len(passwords) // cpu_pool.workers)
+    chunks = await asyncio.gather(*(
+        cpu_pool.run(hash_passwords, passwords[i:i + size]) for i in range(0, len(passwords), size)
+    ))
+    return [hashed for chunk in chunks for hashed in chunk]
+
+async def import_patient_batch(rows: list, report: ImportReport, created_by: str):
+    valid = validate_rows(rows, PatientCreate, report)
+    if not valid:
+        return
     
-    # Get appointment details
-    appointment = await db.appointments.find_one({"appointment_id": request.appointment_id}, {"_id": 0})
-    if not appointment:
-        raise HTTPException(status_code=404, detail="Appointment not found")
+    now = datetime.now(timezone.utc)
+    docs = [
+        {
+            "patient_id": f"pat_{uuid.uuid4().hex[:12]}",
+            **patient.model_dump(),
+            "created_at": now,
+            "created_by": created_by,
+            **initial_version(now)
+        }
+        for _, patient in valid
+    ]
+    patients = await insert_rows(db.patients, [number for number, _ in valid], docs, report)
+    if not patients:
+        return
+    await dashboard_counters.bump(total_patients=len(patients))
     
-    # Get patient details
-    patient = await db.patients.find_one({"patient_id": appointment["patient_id"]}, {"_id": 0})
-    if not patient:
-        raise HTTPException(status_code=404, detail="Patient not found")
+    # One user account per new email, as create_patient does, checked with a single $in query
+    emails = list({p["email"] for p in patients})
+    cursor = db.users.find({"email": {"$in": emails}}, {"_id": 0, "email": 1})
+    existing = {u["email"] async for u in cursor}
+    new_accounts = {}
+    for p in patients:
+        if p["email"] not in existing:
+            new_accounts.setdefault(p["email"], p)
+    if not new_accounts:
+        return
     
-    # Generate instructions using OpenAI GPT-5.2
+    hashed = await hash_passwords_in_pool([PATIENT_TEMP_PASSWORD] * len(new_accounts))
+    user_docs = [
+        {
+            "user_id": f"user_{uuid.uuid4().hex[:12]}",
+            "email": p["email"],
+            "password": password,
+            "name": p["name"],
+            "role": "patient",
+            "phone": p["phone"],
+            "patient_id": p["patient_id"],
+            "created_at": now
+        }
+        for p, password in zip(new_accounts.values(), hashed)
+    ]
     try:
-        chat = LlmChat(
-            api_key=os.environ.get('EMERGENT_LLM_KEY', ''),
-            session_id=f"instruction_{uuid.uuid4().hex[:8]}",
-            system_message="""Você é um assistente médico especializado em criar orientações pós-atendimento.
+        await db.users.insert_many(user_docs, ordered=False)
+    except BulkWriteError as e:
+        # An account registered concurrently for the same email; the patient row itself is fine
+        logger.warning(f"Bulk import skipped {len(write_errors(e))} patient accounts that already existed")
+
+async def import_appointment_batch(rows: list, report: ImportReport, created_by: str):
+    valid = validate_rows(rows, AppointmentCreate, report)
+    if not valid:
+        return
+    
+    patient_ids = list({appointment.patient_id for _, appointment in valid})
+    cursor = db.patients.find({"patient_id": {"$in": patient_ids}}, {"_id": 0, "patient_id": 1})
+    known = {p["patient_id"] async for p in cursor}
+    
+    now = datetime.now(timezone.utc)
+    numbers, docs = [], []
+    for number, appointment in valid:
+        if appointment.patient_id not in known:
+            report.fail(number, "Patient not found")
+            continue
+        numbers.append(number)
+        docs.append({
+            "appointment_id": f"apt_{uuid.uuid4().hex[:12]}",
+            **appointment.model_dump(),
+            "appointment_date": appointment.appointment_date or now.isoformat(),
+            "created_at": now,
+            "created_by": created_by,
+            **initial_version(now)
+        })
+    if not docs:
+        return
+    appointments = await insert_rows(db.appointments, numbers, docs, report)
+    if appointments:
+        await dashboard_counters.bump(total_appointments=len(appointments))
+
+@api_router.post("/patients/bulk", response_model=BulkImportResponse)
+async def bulk_import_patients(
+    file: UploadFile = File(...),
+    fmt: Optional[Literal["csv", "ndjson"]] = Query(None, alias="format"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Import patients from a CSV (with header) or NDJSON upload; returns a per-row error report"""
+    if current_user["role"] != "staff":
+        raise HTTPException(status_code=403, detail="Only staff can import patients")
+    
+    return await run_bulk_import(file, fmt, partial(import_patient_batch, created_by=current_user["user_id"]))
+
+@api_router.post("/appointments/bulk", response_model=BulkImportResponse)
+async def bulk_import_appointments(
+    file: UploadFile = File(...),
+    fmt: Optional[Literal["csv", "ndjson"]] = Query(None, alias="format"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Import appointments from a CSV (with header) or NDJSON upload; returns a per-row error report"""
+    if current_user["role"] != "staff":
+        raise HTTPException(status_code=403, detail="Only staff can import appointments")
+    
+    return await run_bulk_import(file, fmt, partial(import_appointment_batch, created_by=current_user["user_id"]))
+
+# ============== CARE INSTRUCTIONS (AI + AUDIO) ==============
+
+# Bound how many generations may hit each external service at once
+llm_slots = asyncio.Semaphore(int(os.environ.get('LLM_CONCURRENCY', '4')))
+tts_slots = asyncio.Semaphore(int(os.environ.get('TTS_CONCURRENCY', '2')))
+
+LLM_PROVIDER = "openai"
+LLM_MODEL = "gpt-5.2"
+TTS_VOICE_ID = "21m00Tcm4TlvDq8ikWAM"  # Rachel voice
+TTS_MODEL_ID = "eleven_multilingual_v2"
+# Bump whenever the prompt below changes so cached texts are not reused
+PROMPT_VERSION = "2"
+# The prompt never contains the patient's name, so generated texts can be shared
+# between patients; the name is substituted for this token after the cache lookup
+PATIENT_NAME_TOKEN = "[PACIENTE]"
+
+CACHE_TTL_SECONDS = int(os.environ.get('INSTRUCTION_CACHE_TTL_SECONDS', str(30 * 24 * 3600)))
+instruction_text_cache = ContentCache(
+    db.instruction_cache,
+    ttl_seconds=CACHE_TTL_SECONDS,
+    max_entries=int(os.environ.get('INSTRUCTION_CACHE_MAX_ENTRIES', '10000')),
+    l1_size=int(os.environ.get('INSTRUCTION_CACHE_L1_SIZE', '256'))
+)
+audio_render_cache = ContentCache(
+    db.audio_cache,
+    ttl_seconds=CACHE_TTL_SECONDS,
+    max_entries=int(os.environ.get('AUDIO_CACHE_MAX_ENTRIES', '10000')),
+    l1_size=int(os.environ.get('AUDIO_CACHE_L1_SIZE', '256'))
+)
+
+def render_audio(text: str) -> bytes:
+    audio_generator = eleven_client.text_to_speech.convert(
+        text=text,
+        voice_id=TTS_VOICE_ID,
+        model_id=TTS_MODEL_ID
+    )
+    return b"".join(audio_generator)
+
+def build_instruction_chat() -> LlmChat:
+    chat = LlmChat(
+        api_key=os.environ.get('EMERGENT_LLM_KEY', ''),
+        session_id=f"instruction_{uuid.uuid4().hex[:8]}",
+        system_message=f"""Você é um assistente médico especializado em criar orientações pós-atendimento.
             
 REGRAS IMPORTANTES:
 - Use linguagem simples e acessível
@@ -563,13 +724,16 @@ REGRAS IMPORTANTES:
 - Separe seções com linhas em branco
 - Use números (1. 2. 3.) para listas
 - Seja empático e claro
+- Ao se referir ao paciente pelo nome, escreva exatamente {PATIENT_NAME_TOKEN}
 - Responda em português brasileiro"""
-        )
-        chat.with_model("openai", "gpt-5.2")
-        
-        prompt = f"""Crie orientações de pós-atendimento em TEXTO SIMPLES (sem markdown) para:
+    )
+    chat.with_model(LLM_PROVIDER, LLM_MODEL)
+    return chat
+
+def build_instruction_prompt(appointment: dict) -> str:
+    return f"""Crie orientações de pós-atendimento em TEXTO SIMPLES (sem markdown) para:
 
-Paciente: {patient['name']}
+Paciente: {PATIENT_NAME_TOKEN}
 Procedimento: {appointment['procedure']}
 Diagnóstico: {appointment['diagnosis']}
 Observações: {appointment.get('notes', 'Nenhuma')}
@@ -590,9 +754,56 @@ RESTRIÇÕES
 
 RETORNO
 [próximos passos e quando retornar]"""
-        
-        user_message = UserMessage(text=prompt)
-        text_content = await chat.send_message(user_message)
+
+async def stream_llm_text(chat: LlmChat, message: UserMessage):
+    """Yield completion text as it arrives; clients without streaming support yield the whole reply once"""
+    stream_message = getattr(chat, "stream_message", None)
+    if stream_message is None:
+        yield await chat.send_message(message)
+        return
+    async for chunk in stream_message(message):
+        yield chunk
+
+async def with_heartbeats(chunks, interval: float):
+    """Re-yield `chunks`, yielding None whenever nothing arrived for `interval` seconds"""
+    iterator = chunks.__aiter__()
+    pending = asyncio.ensure_future(iterator.__anext__())
+    try:
+        while True:
+            done, _ = await asyncio.wait({pending}, timeout=interval)
+            if not done:
+                yield None
+                continue
+            try:
+                chunk = pending.result()
+            except StopAsyncIteration:
+                return
+            yield chunk
+            pending = asyncio.ensure_future(iterator.__anext__())
+    finally:
+        if not pending.done():
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+
+def template_cache_key(appointment: dict) -> str:
+    return instruction_cache_key(
+        appointment["procedure"], appointment["diagnosis"], appointment.get("notes"), PROMPT_VERSION, LLM_MODEL
+    )
+
+async def generate_instruction_template(appointment: dict) -> str:
+    """Cleaned LLM instructions for an appointment, with PATIENT_NAME_TOKEN in place of the name"""
+    key = template_cache_key(appointment)
+    cached = await instruction_text_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    # Generate instructions using OpenAI GPT-5.2
+    try:
+        chat = build_instruction_chat()
+        user_message = UserMessage(text=build_instruction_prompt(appointment))
+        async with llm_slots:
+            with stage_timer("llm"):
+                text_content = await chat.send_message(user_message)
         
         # Clean the text to remove any markdown that slipped through
         text_content = clean_ai_text(text_content)
@@ -601,25 +812,50 @@ RETORNO
         logger.error(f"Error generating instructions: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao gerar orientações. Tente novamente.")
     
+    await instruction_text_cache.put(key, text_content)
+    return text_content
+
+async def generate_instruction_audio(text: str) -> str:
+    """Blob digest of the spoken version of `text`, rendered at most once per distinct text"""
+    key = audio_cache_key(text, TTS_VOICE_ID, TTS_MODEL_ID)
+    audio_blob = await audio_render_cache.get(key)
+    if audio_blob is None:
+        # The ElevenLabs SDK is synchronous; keep it off the event loop
+        async with tts_slots:
+            with stage_timer("tts"):
+                audio_data = await io_pool.run(render_audio, text)
+        audio_blob = await audio_store.put(audio_data, "audio/mpeg")
+        await audio_render_cache.put(key, audio_blob)
+    return audio_blob
+
+async def generate_care_instructions(payload: dict) -> dict:
+    """Job handler: run the LLM and TTS stages for one appointment and save the instruction"""
+    # Get appointment details
+    appointment = await db.appointments.find_one({"appointment_id": payload["appointment_id"]}, {"_id": 0})
+    if not appointment:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    
+    # Get patient details
+    patient = await db.patients.find_one({"patient_id": appointment["patient_id"]}, {"_id": 0})
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    
+    template = await generate_instruction_template(appointment)
+    instruction_doc = await save_instruction(appointment, patient, template, payload.get("generate_audio"))
+    return {"instruction_id": instruction_doc["instruction_id"]}
+
+async def save_instruction(appointment: dict, patient: dict, template: str, generate_audio: bool) -> dict:
+    """Personalise a generated template, render its audio if requested and store the instruction"""
+    text_content = template.replace(PATIENT_NAME_TOKEN, patient["name"])
+    
     # Generate audio if requested (with shorter text for faster processing)
-    audio_url = None
-    if request.generate_audio and os.environ.get('ELEVENLABS_API_KEY'):
+    audio_blob = None
+    if generate_audio and os.environ.get('ELEVENLABS_API_KEY'):
         try:
             # Limit text length for audio to avoid timeout
             audio_text = text_content[:3000] if len(text_content) > 3000 else text_content
             
-            audio_generator = eleven_client.text_to_speech.convert(
-                text=audio_text,
-                voice_id="21m00Tcm4TlvDq8ikWAM",  # Rachel voice
-                model_id="eleven_multilingual_v2"
-            )
-            
-            audio_data = b""
-            for chunk in audio_generator:
-                audio_data += chunk
-            
-            audio_b64 = base64.b64encode(audio_data).decode()
-            audio_url = f"data:audio/mpeg;base64,{audio_b64}"
+            audio_blob = await generate_instruction_audio(audio_text)
         except Exception as e:
             logger.warning(f"Audio generation failed (continuing without audio): {e}")
     
@@ -627,50 +863,157 @@ RETORNO
     instruction_id = f"ins_{uuid.uuid4().hex[:12]}"
     instruction_doc = {
         "instruction_id": instruction_id,
-        "appointment_id": request.appointment_id,
+        "appointment_id": appointment["appointment_id"],
         "patient_id": appointment["patient_id"],
         "text_content": text_content,
-        "audio_url": audio_url,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "audio_blob": audio_blob,
+        "created_at": datetime.now(timezone.utc),
+        **initial_version()
     }
     await db.care_instructions.insert_one(instruction_doc)
+    await dashboard_counters.bump(total_instructions=1)
+    instruction_doc.pop("_id", None)
+    return instruction_doc
+
+def build_generation_queue():
+    workers = int(os.environ.get('JOB_WORKERS', '2'))
+    if os.environ.get('JOB_QUEUE_BACKEND', 'mongo') == 'local':
+        return LocalJobQueue(generate_care_instructions, workers=workers)
+    return MongoJobQueue(db.generation_jobs, generate_care_instructions, workers=workers)
+
+generation_queue = build_generation_queue()
+
+reminder_dispatcher = dispatcher_from_env(db, dashboard_counters)
+REMINDER_DISPATCHER_ENABLED = os.environ.get('REMINDER_DISPATCHER_ENABLED', 'false').lower() == 'true'
+
+async def job_response(job: dict) -> GenerationJobResponse:
+    instruction = None
+    if job["status"] == DONE:
+        doc = await instruction_repo.find_one(job["result"]["instruction_id"])
+        if doc:
+            await instruction_repo.enrich([doc])
+            instruction = instruction_repo.to_model(doc)
+    return GenerationJobResponse(
+        job_id=job["job_id"],
+        status=job["status"],
+        error=job.get("error"),
+        instruction=instruction,
+        created_at=job["created_at"]
+    )
+
+@api_router.post("/instructions/generate", response_model=GenerationJobResponse, status_code=202)
+async def enqueue_care_instructions(request: CareInstructionCreate, current_user: dict = Depends(get_current_user)):
+    """Queue AI generation and return immediately; poll /instructions/jobs/{job_id} for the result"""
+    if current_user["role"] != "staff":
+        raise HTTPException(status_code=403, detail="Only staff can generate instructions")
     
-    return CareInstructionResponse(
-        instruction_id=instruction_id,
-        appointment_id=request.appointment_id,
-        patient_id=appointment["patient_id"],
-        text_content=text_content,
-        audio_url=audio_url,
-        created_at=datetime.now(timezone.utc)
+    appointment = await db.appointments.find_one({"appointment_id": request.appointment_id}, {"_id": 0, "appointment_id": 1})
+    if not appointment:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    
+    job = await generation_queue.enqueue({
+        "appointment_id": request.appointment_id,
+        "generate_audio": request.generate_audio,
+        "requested_by": current_user["user_id"]
+    })
+    return await job_response(job)
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# Comment line sent while the LLM has not produced text yet; EventSource clients ignore it
+SSE_HEARTBEAT = ": keep-alive\n\n"
+SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', '5'))
+
+@api_router.post("/instructions/generate/stream")
+async def stream_care_instructions(request: CareInstructionCreate, current_user: dict = Depends(get_current_user)):
+    """Generate instructions over Server-Sent Events.
+
+    A `status` event is sent as soon as the stream opens, before the LLM call.
+    `delta` events carry cleaned text as the LLM produces it, `done` carries the
+    saved instruction and `error` reports a failure after the stream started.
+    While the model has not answered, a comment line is sent every
+    SSE_HEARTBEAT_SECONDS so proxies do not close an idle connection.
+    """
+    if current_user["role"] != "staff":
+        raise HTTPException(status_code=403, detail="Only staff can generate instructions")
+    
+    appointment = await db.appointments.find_one({"appointment_id": request.appointment_id}, {"_id": 0})
+    if not appointment:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    patient = await db.patients.find_one({"patient_id": appointment["patient_id"]}, {"_id": 0})
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    
+    async def events():
+        key = template_cache_key(appointment)
+        yield sse_event("status", {"stage": "generating"})
+        try:
+            template = await instruction_text_cache.get(key)
+            if template is not None:
+                yield sse_event("delta", {"text": template.replace(PATIENT_NAME_TOKEN, patient["name"])})
+            else:
+                cleaner = IncrementalTextCleaner()
+                raw_parts = []
+                chat = build_instruction_chat()
+                async with llm_slots:
+                    with stage_timer("llm_stream"):
+                        chunks = stream_llm_text(chat, UserMessage(text=build_instruction_prompt(appointment)))
+                        async for chunk in with_heartbeats(chunks, SSE_HEARTBEAT_SECONDS):
+                            if chunk is None:
+                                yield SSE_HEARTBEAT
+                                continue
+                            raw_parts.append(chunk)
+                            text = cleaner.feed(chunk)
+                            if text:
+                                yield sse_event("delta", {"text": text.replace(PATIENT_NAME_TOKEN, patient["name"])})
+                text = cleaner.flush()
+                if text:
+                    yield sse_event("delta", {"text": text.replace(PATIENT_NAME_TOKEN, patient["name"])})
+                template = clean_ai_text("".join(raw_parts))
+                await instruction_text_cache.put(key, template)
+            instruction_doc = await save_instruction(appointment, patient, template, request.generate_audio)
+        except Exception as e:
+            logger.error(f"Error streaming instructions: {e}")
+            yield sse_event("error", {"detail": "Erro ao gerar orientações. Tente novamente."})
+            return
+        yield sse_event("done", instruction_repo.to_model(instruction_doc).model_dump(mode="json"))
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
+@api_router.get("/instructions/jobs/{job_id}", response_model=GenerationJobResponse)
+async def get_generation_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "staff":
+        raise HTTPException(status_code=403, detail="Only staff can view generation jobs")
+    
+    job = await generation_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return await job_response(job)
+
 @api_router.get("/instructions", response_model=List[CareInstructionResponse])
-async def list_instructions(patient_id: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+async def list_instructions(
+    patient_id: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=DEFAULT_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
     query = {}
     if current_user["role"] == "patient":
         query["patient_id"] = current_user.get("patient_id")
     elif patient_id:
         query["patient_id"] = patient_id
     
-    instructions = await db.care_instructions.find(query, {"_id": 0}).to_list(1000)
-    result = []
-    for i in instructions:
-        created_at = i.get("created_at")
-        if isinstance(created_at, str):
-            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-        result.append(CareInstructionResponse(
-            instruction_id=i["instruction_id"],
-            appointment_id=i["appointment_id"],
-            patient_id=i["patient_id"],
-            text_content=i["text_content"],
-            audio_url=i.get("audio_url"),
-            created_at=created_at
-        ))
-    return result
+    return await paginated_list(instruction_repo, query, limit, cursor, stream)
 
 @api_router.get("/instructions/{instruction_id}", response_model=CareInstructionResponse)
 async def get_instruction(instruction_id: str, current_user: dict = Depends(get_current_user)):
-    instruction = await db.care_instructions.find_one({"instruction_id": instruction_id}, {"_id": 0})
+    instruction = await instruction_repo.find_one(instruction_id)
     if not instruction:
         raise HTTPException(status_code=404, detail="Instruction not found")
     
@@ -678,17 +1021,73 @@ async def get_instruction(instruction_id: str, current_user: dict = Depends(get_
         if current_user.get("patient_id") != instruction["patient_id"]:
             raise HTTPException(status_code=403, detail="Access denied")
     
-    created_at = instruction.get("created_at")
-    if isinstance(created_at, str):
-        created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+    await instruction_repo.enrich([instruction])
+    return instruction_repo.to_model(instruction)
+
+def audio_access_allowed(instruction: dict, token: Optional[str], current_user: Optional[dict]) -> bool:
+    if token:
+        try:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM], audience=MEDIA_TOKEN_AUDIENCE)
+        except jwt.InvalidTokenError:
+            return False
+        return payload.get("scope") == "audio" and payload.get("instruction_id") == instruction["instruction_id"]
+    if not current_user:
+        return False
+    return current_user["role"] == "staff" or current_user.get("patient_id") == instruction["patient_id"]
+
+@api_router.get("/instructions/{instruction_id}/audio")
+async def get_instruction_audio(
+    instruction_id: str,
+    request: Request,
+    token: Optional[str] = None,
+    current_user: Optional[dict] = Depends(get_current_user_optional)
+):
+    """Stream instruction audio, honouring single HTTP Range requests for seeking"""
+    instruction = await db.care_instructions.find_one(
+        {"instruction_id": instruction_id},
+        {"_id": 0, "instruction_id": 1, "patient_id": 1, "audio_blob": 1, "audio_url": 1}
+    )
+    if not instruction:
+        raise HTTPException(status_code=404, detail="Instruction not found")
+    if not audio_access_allowed(instruction, token, current_user):
+        raise HTTPException(status_code=401, detail="Not authenticated")
     
-    return CareInstructionResponse(
-        instruction_id=instruction["instruction_id"],
-        appointment_id=instruction["appointment_id"],
-        patient_id=instruction["patient_id"],
-        text_content=instruction["text_content"],
-        audio_url=instruction.get("audio_url"),
-        created_at=created_at
+    legacy_audio = None
+    if instruction.get("audio_blob"):
+        info = await audio_store.stat(instruction["audio_blob"])
+        if not info:
+            raise HTTPException(status_code=404, detail="Audio not found")
+        length = info["length"]
+    elif (instruction.get("audio_url") or "").startswith("data:"):
+        # Documents written before audio moved to GridFS embed it as a base64 data URL
+        legacy_audio = base64.b64decode(instruction["audio_url"].split(",", 1)[1])
+        length = len(legacy_audio)
+    else:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    
+    try:
+        byte_range = parse_range(request.headers.get("range"), length)
+    except RangeNotSatisfiable:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{length}"})
+    
+    start, end = byte_range or (0, length - 1)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(end - start + 1),
+        "Cache-Control": "private, max-age=3600"
+    }
+    status_code = 200
+    if byte_range:
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{length}"
+    
+    if legacy_audio is not None:
+        return Response(legacy_audio[start:end + 1], status_code=status_code, headers=headers, media_type="audio/mpeg")
+    return StreamingResponse(
+        audio_store.read_range(instruction["audio_blob"], start, end),
+        status_code=status_code,
+        headers=headers,
+        media_type="audio/mpeg"
     )
 
 @api_router.delete("/instructions/{instruction_id}", status_code=200)
@@ -703,7 +1102,7 @@ async def delete_instruction(instruction_id: str, current_user: dict = Depends(g
         logger.warning(f"Invalid instruction_id format: {instruction_id}")
         raise HTTPException(status_code=400, detail="ID de orientação inválido")
     
-    instruction = await db.care_instructions.find_one({"instruction_id": instruction_id}, {"_id": 0})
+    instruction = await db.care_instructions.find_one({"instruction_id": instruction_id}, {"_id": 1})
     if not instruction:
         logger.info(f"Instruction not found: {instruction_id}")
         raise HTTPException(status_code=404, detail="Orientação não encontrada")
@@ -714,6 +1113,7 @@ async def delete_instruction(instruction_id: str, current_user: dict = Depends(g
     if result.deleted_count == 0:
         logger.error(f"Failed to delete instruction: {instruction_id}")
         raise HTTPException(status_code=500, detail="Falha ao excluir orientação")
+    await dashboard_counters.bump(total_instructions=-1)
     
     logger.info(f"Successfully deleted instruction: {instruction_id}")
     return {"message": "Orientação excluída com sucesso", "deleted": True}
@@ -725,21 +1125,28 @@ async def create_reminder(reminder: ReminderCreate, current_user: dict = Depends
     if current_user["role"] != "staff":
         raise HTTPException(status_code=403, detail="Only staff can create reminders")
     
-    reminder_id = f"rem_{uuid.uuid4().hex[:12]}"
-    scheduled_for = datetime.fromisoformat(reminder.scheduled_for.replace('Z', '+00:00'))
+    try:
+        # Stored in UTC so the dispatcher can compare scheduled_for values directly
+        scheduled_for = parse_timestamp(reminder.scheduled_for)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="scheduled_for must be an ISO-8601 timestamp")
     
+    reminder_id = f"rem_{uuid.uuid4().hex[:12]}"
+    created_at = datetime.now(timezone.utc)
     reminder_doc = {
         "reminder_id": reminder_id,
         "patient_id": reminder.patient_id,
         "appointment_id": reminder.appointment_id,
         "message": reminder.message,
         "reminder_type": reminder.reminder_type,
-        "scheduled_for": scheduled_for.isoformat(),
+        "scheduled_for": scheduled_for,
         "sent": False,
         "sent_at": None,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": created_at,
+        **initial_version()
     }
     await db.reminders.insert_one(reminder_doc)
+    await dashboard_counters.bump(pending_reminders=1)
     
     return ReminderResponse(
         reminder_id=reminder_id,
@@ -749,42 +1156,24 @@ async def create_reminder(reminder: ReminderCreate, current_user: dict = Depends
         reminder_type=reminder.reminder_type,
         scheduled_for=scheduled_for,
         sent=False,
-        created_at=datetime.now(timezone.utc)
+        created_at=created_at
     )
 
 @api_router.get("/reminders", response_model=List[ReminderResponse])
-async def list_reminders(patient_id: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+async def list_reminders(
+    patient_id: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=DEFAULT_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
     query = {}
     if current_user["role"] == "patient":
         query["patient_id"] = current_user.get("patient_id")
     elif patient_id:
         query["patient_id"] = patient_id
     
-    reminders = await db.reminders.find(query, {"_id": 0}).to_list(1000)
-    result = []
-    for r in reminders:
-        scheduled_for = r.get("scheduled_for")
-        if isinstance(scheduled_for, str):
-            scheduled_for = datetime.fromisoformat(scheduled_for.replace('Z', '+00:00'))
-        created_at = r.get("created_at")
-        if isinstance(created_at, str):
-            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-        sent_at = r.get("sent_at")
-        if isinstance(sent_at, str):
-            sent_at = datetime.fromisoformat(sent_at.replace('Z', '+00:00'))
-        
-        result.append(ReminderResponse(
-            reminder_id=r["reminder_id"],
-            patient_id=r["patient_id"],
-            appointment_id=r.get("appointment_id"),
-            message=r["message"],
-            reminder_type=r["reminder_type"],
-            scheduled_for=scheduled_for,
-            sent=r.get("sent", False),
-            sent_at=sent_at,
-            created_at=created_at
-        ))
-    return result
+    return await paginated_list(reminder_repo, query, limit, cursor, stream)
 
 # ============== FOLLOW-UPS ==============
 
@@ -797,20 +1186,27 @@ async def create_followup(followup: FollowUpCreate, current_user: dict = Depends
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     
+    try:
+        follow_up_date = parse_timestamp(followup.follow_up_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="follow_up_date must be an ISO-8601 timestamp")
+    
     followup_id = f"fup_{uuid.uuid4().hex[:12]}"
-    follow_up_date = datetime.fromisoformat(followup.follow_up_date.replace('Z', '+00:00'))
+    created_at = datetime.now(timezone.utc)
     
     followup_doc = {
         "followup_id": followup_id,
         "patient_id": followup.patient_id,
         "appointment_id": followup.appointment_id,
-        "follow_up_date": follow_up_date.isoformat(),
+        "follow_up_date": follow_up_date,
         "reason": followup.reason,
         "notes": followup.notes,
         "completed": False,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": created_at,
+        **initial_version()
     }
     await db.followups.insert_one(followup_doc)
+    await dashboard_counters.bump(pending_followups=1)
     
     return FollowUpResponse(
         followup_id=followup_id,
@@ -821,85 +1217,150 @@ async def create_followup(followup: FollowUpCreate, current_user: dict = Depends
         reason=followup.reason,
         notes=followup.notes,
         completed=False,
-        created_at=datetime.now(timezone.utc)
+        created_at=created_at
     )
 
 @api_router.get("/followups", response_model=List[FollowUpResponse])
-async def list_followups(patient_id: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+async def list_followups(
+    patient_id: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=DEFAULT_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
     query = {}
     if current_user["role"] == "patient":
         query["patient_id"] = current_user.get("patient_id")
     elif patient_id:
         query["patient_id"] = patient_id
     
-    followups = await db.followups.find(query, {"_id": 0}).to_list(1000)
-    result = []
-    for f in followups:
-        patient = await db.patients.find_one({"patient_id": f["patient_id"]}, {"_id": 0, "name": 1})
-        follow_up_date = f.get("follow_up_date")
-        if isinstance(follow_up_date, str):
-            follow_up_date = datetime.fromisoformat(follow_up_date.replace('Z', '+00:00'))
-        created_at = f.get("created_at")
-        if isinstance(created_at, str):
-            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-        
-        result.append(FollowUpResponse(
-            followup_id=f["followup_id"],
-            patient_id=f["patient_id"],
-            patient_name=patient["name"] if patient else None,
-            appointment_id=f.get("appointment_id"),
-            follow_up_date=follow_up_date,
-            reason=f["reason"],
-            notes=f.get("notes"),
-            completed=f.get("completed", False),
-            created_at=created_at
-        ))
-    return result
+    return await paginated_list(followup_repo, query, limit, cursor, stream)
 
 @api_router.patch("/followups/{followup_id}/complete")
 async def complete_followup(followup_id: str, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "staff":
         raise HTTPException(status_code=403, detail="Only staff can complete follow-ups")
     
+    # Completing an already-completed follow-up must neither count twice nor bump its version
     result = await db.followups.update_one(
-        {"followup_id": followup_id},
-        {"$set": {"completed": True}}
+        {"followup_id": followup_id, "completed": {"$ne": True}},
+        bump_version({"$set": {"completed": True}})
     )
-    if result.matched_count == 0:
+    if result.modified_count:
+        await dashboard_counters.bump(pending_followups=-1)
+    elif not await db.followups.find_one({"followup_id": followup_id}, {"_id": 1}):
         raise HTTPException(status_code=404, detail="Follow-up not found")
     
     return {"message": "Follow-up completed"}
 
+# ============== EXPORT ==============
+
+@api_router.get("/export")
+async def export_data(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    collections: Optional[str] = Query(None, description="Comma-separated subset of " + ", ".join(EXPORT_COLLECTIONS)),
+    gzip: bool = False,
+    include_audio: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream a full export of the clinic's data; CSV exports one collection per request"""
+    if current_user["role"] != "staff":
+        raise HTTPException(status_code=403, detail="Only staff can export data")
+    
+    # Absent means everything; present but empty is a mistake, not a request for everything
+    if collections is None:
+        names = list(EXPORT_COLLECTIONS)
+    else:
+        names = list(dict.fromkeys(n.strip() for n in collections.split(",") if n.strip()))
+        if not names:
+            raise HTTPException(
+                status_code=400, detail=f"collections must name one or more of: {', '.join(EXPORT_COLLECTIONS)}"
+            )
+    unknown = [n for n in names if n not in EXPORT_COLLECTIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown collections: {', '.join(unknown)} (expected {', '.join(EXPORT_COLLECTIONS)})"
+        )
+    if fmt == "csv" and len(names) != 1:
+        raise HTTPException(status_code=400, detail="CSV export requires exactly one collection")
+    
+    filename = f"carefollow-{names[0] if len(names) == 1 else 'export'}-{datetime.now(timezone.utc):%Y%m%d}.{fmt}"
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        export_stream(db, names, fmt, compress=gzip, include_audio=include_audio, audio_store=audio_store),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"}
+    )
+
 # ============== DASHBOARD STATS ==============
 
+# Auto-refreshing dashboards share one response for a few seconds (0 disables)
+DASHBOARD_CACHE_TTL_SECONDS = float(os.environ.get('DASHBOARD_CACHE_TTL_SECONDS', '5'))
+dashboard_cache = TTLCache(maxsize=1, ttl=DASHBOARD_CACHE_TTL_SECONDS) if DASHBOARD_CACHE_TTL_SECONDS > 0 else None
+
 @api_router.get("/dashboard/stats")
-async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
+async def get_dashboard_stats(refresh: bool = False, current_user: dict = Depends(get_current_user)):
+    """Dashboard totals from the materialized counters; refresh=true rebuilds them from the collections"""
     if current_user["role"] != "staff":
         raise HTTPException(status_code=403, detail="Only staff can view dashboard stats")
     
-    total_patients = await db.patients.count_documents({})
-    total_appointments = await db.appointments.count_documents({})
-    total_instructions = await db.care_instructions.count_documents({})
-    pending_followups = await db.followups.count_documents({"completed": False})
-    pending_reminders = await db.reminders.count_documents({"sent": False})
+    if not refresh and dashboard_cache is not None and "stats" in dashboard_cache:
+        return dashboard_cache["stats"]
     
-    # Recent appointments
-    recent_appointments = await db.appointments.find({}, {"_id": 0}).sort("created_at", -1).limit(5).to_list(5)
+    counters, recent_appointments = await asyncio.gather(
+        dashboard_counters.recompute() if refresh else dashboard_counters.read(),
+        # Recent appointments
+        db.appointments.find({}, {"_id": 0}).sort("created_at", -1).limit(5).to_list(5)
+    )
     
-    return {
-        "total_patients": total_patients,
-        "total_appointments": total_appointments,
-        "total_instructions": total_instructions,
-        "pending_followups": pending_followups,
-        "pending_reminders": pending_reminders,
-        "recent_appointments": recent_appointments
-    }
+    stats = {**counters, "recent_appointments": recent_appointments}
+    if dashboard_cache is not None:
+        dashboard_cache["stats"] = stats
+    return stats
 
 # ============== PATIENT PORTAL ==============
 
+# Lean per-section projections: only the fields the portal renders. The legacy
+# inline audio_url (a base64 data URL) is never loaded; see InstructionRepository.enrich.
+PORTAL_SECTIONS = {
+    "appointments": (appointment_repo, {
+        "_id": 0, "appointment_id": 1, "procedure": 1, "diagnosis": 1, "notes": 1,
+        "appointment_date": 1, "created_at": 1
+    }),
+    "instructions": (instruction_repo, {
+        "_id": 0, "instruction_id": 1, "appointment_id": 1, "text_content": 1, "audio_blob": 1, "created_at": 1
+    }),
+    "reminders": (reminder_repo, {
+        "_id": 0, "reminder_id": 1, "message": 1, "reminder_type": 1, "scheduled_for": 1, "sent": 1,
+        "sent_at": 1, "created_at": 1
+    }),
+    "followups": (followup_repo, {
+        "_id": 0, "followup_id": 1, "appointment_id": 1, "follow_up_date": 1, "reason": 1, "notes": 1,
+        "completed": 1, "created_at": 1
+    }),
+}
+PORTAL_PATIENT_PROJECTION = {
+    "_id": 0, "patient_id": 1, "name": 1, "email": 1, "phone": 1, "birth_date": 1, "notes": 1, "created_at": 1
+}
+
 @api_router.get("/patient/portal")
-async def get_patient_portal(current_user: dict = Depends(get_current_user)):
-    """Get all data for patient portal"""
+async def get_patient_portal(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=DEFAULT_PAGE_SIZE),
+    appointments_cursor: Optional[str] = None,
+    instructions_cursor: Optional[str] = None,
+    reminders_cursor: Optional[str] = None,
+    followups_cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get all data for patient portal.
+
+    Sections are fetched concurrently and paginated independently; each
+    `next_cursors` entry is passed back as `<section>_cursor` for the next page.
+    """
     if current_user["role"] != "patient":
         raise HTTPException(status_code=403, detail="Only patients can access portal")
     
@@ -914,6 +1375,7 @@ async def get_patient_portal(current_user: dict = Depends(get_current_user)):
                 {"user_id": current_user["user_id"]},
                 {"$set": {"patient_id": patient_id}}
             )
+            user_cache.invalidate(current_user["user_id"])
     
     if not patient_id:
         return {
@@ -921,21 +1383,39 @@ async def get_patient_portal(current_user: dict = Depends(get_current_user)):
             "appointments": [],
             "instructions": [],
             "reminders": [],
-            "followups": []
+            "followups": [],
+            "next_cursors": {}
         }
     
-    patient = await db.patients.find_one({"patient_id": patient_id}, {"_id": 0})
-    appointments = await db.appointments.find({"patient_id": patient_id}, {"_id": 0}).to_list(100)
-    instructions = await db.care_instructions.find({"patient_id": patient_id}, {"_id": 0}).to_list(100)
-    reminders = await db.reminders.find({"patient_id": patient_id}, {"_id": 0}).to_list(100)
-    followups = await db.followups.find({"patient_id": patient_id}, {"_id": 0}).to_list(100)
+    cursors = {
+        "appointments": appointments_cursor,
+        "instructions": instructions_cursor,
+        "reminders": reminders_cursor,
+        "followups": followups_cursor
+    }
+    try:
+        patient, *pages = await asyncio.gather(
+            patient_repo.find_one(patient_id, PORTAL_PATIENT_PROJECTION),
+            *(
+                repo.page({"patient_id": patient_id}, limit, cursors[section], projection)
+                for section, (repo, projection) in PORTAL_SECTIONS.items()
+            )
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    sections = dict(zip(PORTAL_SECTIONS, pages))
+    instructions = sections["instructions"][0]
+    await instruction_repo.enrich(instructions)
+    for ins in instructions:
+        ins["audio_url"] = instruction_audio_url(ins)
+        ins.pop("audio_blob", None)
+        ins.pop("has_legacy_audio", None)
     
     return {
         "patient": patient,
-        "appointments": appointments,
-        "instructions": instructions,
-        "reminders": reminders,
-        "followups": followups
+        **{section: docs for section, (docs, _) in sections.items()},
+        "next_cursors": {section: cursor for section, (_, cursor) in sections.items() if cursor}
     }
 
 # ============== ROOT ==============
@@ -944,6 +1424,101 @@ async def get_patient_portal(current_user: dict = Depends(get_current_user)):
 async def root():
     return {"message": "CareFollow API - Sistema de Pós-Atendimento"}
 
+# ============== METRICS ==============
+
+# Scrapers authenticate with this bearer token when it is set
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+registry.add_collector(lambda: offload_pool_metrics(pool_stats()))
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus text exposition"""
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+# ============== SLOW REQUEST PROFILER ==============
+
+SLOW_REQUEST_PROFILING = os.environ.get('SLOW_REQUEST_PROFILING', 'false').lower() == 'true'
+SLOW_REQUEST_THRESHOLD_MS = float(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', '1000'))
+SLOW_REQUEST_SAMPLE_RATE = float(os.environ.get('SLOW_REQUEST_SAMPLE_RATE', '0.01'))
+slow_request_log = SlowRequestLog(maxlen=int(os.environ.get('SLOW_REQUEST_LOG_SIZE', '100')))
+
+@api_router.get("/admin/slow-requests")
+async def list_slow_requests(
+    limit: int = Query(50, ge=1, le=500),
+    route: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Most recent requests over the threshold, newest first (details via /admin/slow-requests/{id})"""
+    if current_user["role"] != "staff":
+        raise HTTPException(status_code=403, detail="Only staff can view slow requests")
+    
+    entries = slow_request_log.list(limit, route)
+    return {
+        "enabled": SLOW_REQUEST_PROFILING,
+        "threshold_ms": SLOW_REQUEST_THRESHOLD_MS,
+        "sample_rate": SLOW_REQUEST_SAMPLE_RATE,
+        "requests": [
+            {**{k: v for k, v in entry.items() if k not in ("commands", "profile")}, "profiled": entry["profile"] is not None}
+            for entry in entries
+        ]
+    }
+
+@api_router.get("/admin/slow-requests/{entry_id}")
+async def get_slow_request(entry_id: int, current_user: dict = Depends(get_current_user)):
+    """One slow request with its Mongo commands and, if it was sampled, its collapsed stacks"""
+    if current_user["role"] != "staff":
+        raise HTTPException(status_code=403, detail="Only staff can view slow requests")
+    
+    entry = slow_request_log.get(entry_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Slow request not found")
+    return entry
+
+# ============== HEALTH ==============
+
+MONGO_READY_TIMEOUT = float(os.environ.get('MONGO_READY_TIMEOUT_MS', '2000')) / 1000
+# /ready fails once a pool has this share of its connections checked out and operations queuing
+MONGO_READY_MAX_SATURATION = float(os.environ.get('MONGO_READY_MAX_SATURATION', '1.0'))
+registry.add_collector(lambda: mongo_pool_metrics(mongo_pool_monitor.stats()))
+
+@app.get("/health", include_in_schema=False)
+async def health():
+    """Liveness plus dependency report: pings MongoDB and shows pool usage.
+
+    Always 200 while the process serves requests, so an orchestrator does not
+    restart healthy workers during a database outage; /ready is the probe
+    that takes the instance out of rotation.
+    """
+    mongo = await ping(client, MONGO_READY_TIMEOUT)
+    return {
+        "status": "ok" if mongo["ok"] else "degraded",
+        "mongo": mongo,
+        "mongo_pools": mongo_pool_monitor.stats()
+    }
+
+@app.get("/ready", include_in_schema=False)
+async def ready(request: Request):
+    """Readiness: MongoDB answers a ping and its connection pool is not saturated"""
+    mongo = await ping(client, MONGO_READY_TIMEOUT)
+    reason = ready_status(mongo, mongo_pool_monitor, MONGO_READY_MAX_SATURATION, request.app.state.draining)
+    content = {
+        "status": "ready" if reason is None else "unavailable",
+        "reason": reason,
+        "mongo": mongo,
+        "mongo_pools": mongo_pool_monitor.stats(),
+        "offload_pools": pool_stats()
+    }
+    return JSONResponse(status_code=200 if reason is None else 503, content=content)
+
+@app.exception_handler(OffloadSaturated)
+async def offload_saturated_handler(request: Request, exc: OffloadSaturated):
+    return JSONResponse(status_code=503, content={"detail": "Server busy, try again shortly"}, headers={"Retry-After": "1"})
+
+# Conditional GETs for JSON responses; added first so CORS wraps the 304s as well
+app.add_middleware(ETagMiddleware)
+
 # Add CORS middleware BEFORE including routers
 app.add_middleware(
     CORSMiddleware,
@@ -951,11 +1526,21 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+if SLOW_REQUEST_PROFILING:
+    app.add_middleware(
+        SlowRequestProfiler,
+        log=slow_request_log,
+        threshold_ms=SLOW_REQUEST_THRESHOLD_MS,
+        sample_rate=SLOW_REQUEST_SAMPLE_RATE,
+        sample_interval_ms=float(os.environ.get('SLOW_REQUEST_SAMPLE_INTERVAL_MS', '10')),
+        max_commands=int(os.environ.get('SLOW_REQUEST_MAX_COMMANDS', '100'))
+    )
+
+# Outermost, so latency covers the other middlewares and every response is counted
+app.add_middleware(MetricsMiddleware)
+
 # Include the router in the main app
 app.include_router(api_router)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
@@ -0,0 +1,44 @@
+"""Short-lived cache of OAuth session exchanges keyed by session_id"""
+import asyncio
+from functools import partial
+from typing import Awaitable, Callable, Dict
+
+from cachetools import TTLCache
+
+
+class SessionExchangeCache:
+    """Absorbs the duplicate exchanges the frontend fires on reload.
+
+    Repeats within the TTL reuse the first successful result; concurrent
+    repeats wait for the exchange already in flight instead of starting
+    their own. Failures are not cached.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_exchange(self, session_id: str, exchange: Callable[[], Awaitable[dict]]) -> dict:
+        cached = self._cache.get(session_id)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        pending = self._inflight.get(session_id)
+        if pending is None:
+            self.misses += 1
+            pending = self._inflight[session_id] = asyncio.ensure_future(exchange())
+            pending.add_done_callback(partial(self._finished, session_id))
+        else:
+            self.hits += 1
+        # Shielded so a client disconnecting does not cancel the exchange other callers share
+        return await asyncio.shield(pending)
+
+    def _finished(self, session_id: str, task: asyncio.Future):
+        self._inflight.pop(session_id, None)
+        if not task.cancelled() and task.exception() is None:
+            self._cache[session_id] = task.result()
+
+    def clear(self):
+        self._cache.clear()
@@ -0,0 +1,123 @@
+"""Normalization of AI-generated text (markdown stripping) for storage and display"""
+import re
+from collections import deque
+from typing import List
+
+# Applied in order; each entry is (pattern, replacement, trigger). A pass is
+# skipped when its trigger substring is absent, which is the common case for
+# LLM output that already follows the "no markdown" instructions.
+_PASSES = (
+    # Remove markdown headers
+    (re.compile(r'#{1,6}\s*'), '', '#'),
+    # Remove bold/italic markers
+    (re.compile(r'\*\*([^*]+)\*\*'), r'\1', '**'),
+    (re.compile(r'\*([^*]+)\*'), r'\1', '*'),
+    (re.compile(r'__([^_]+)__'), r'\1', '__'),
+    (re.compile(r'_([^_]+)_'), r'\1', '_'),
+    # Clean bullet points
+    (re.compile(r'^[-*•]\s*', re.MULTILINE), '• ', None),
+    # Remove code blocks
+    (re.compile(r'```[\s\S]*?```'), '', '```'),
+    (re.compile(r'`([^`]+)`'), r'\1', '`'),
+    # Remove horizontal rules
+    (re.compile(r'^---+$', re.MULTILINE), '', '---'),
+    # Clean extra whitespace
+    (re.compile(r'\n{3,}'), '\n\n', '\n\n\n'),
+)
+
+
+def clean_ai_text(text: str) -> str:
+    """Remove markdown formatting and clean up AI-generated text"""
+    if not text:
+        return ""
+    for pattern, replacement, trigger in _PASSES:
+        if trigger is None or trigger in text:
+            text = pattern.sub(replacement, text)
+    return text.strip()
+
+
+class IncrementalTextCleaner:
+    """Apply clean_ai_text to streamed text one paragraph block at a time.
+
+    Text is only released at a blank line outside a code fence, so markdown that
+    arrives split across chunks is cleaned once the whole block has been seen.
+    The persisted text is still cleaned in one pass over the full completion.
+
+    Each character is scanned once: fence parity and the last safe cut are
+    tracked as chunks arrive, and unreleased chunks are only joined at a cut.
+    Positions below are offsets into the unreleased text.
+    """
+
+    def __init__(self):
+        self._started = False
+        self._reset()
+
+    def _reset(self):
+        self._parts: List[str] = []
+        self._length = 0
+        self._tail = ""            # last two unreleased characters, for matches spanning chunks
+        self._fence_pos = 0        # where the next ``` search resumes
+        self._fence_ends = deque()  # ends of ``` matches past the last blank line examined
+        self._fences = 0           # ``` matches before the last blank line examined
+        self._cut = 0              # last blank line outside a fence (0: none)
+        self._cut_fences = 0       # ``` matches before it
+
+    def feed(self, chunk: str) -> str:
+        if not chunk:
+            return ""
+        scanned = self._length
+        offset = scanned - len(self._tail)
+        text = self._tail + chunk
+        self._parts.append(chunk)
+        self._length += len(chunk)
+        self._tail = text[-2:]
+
+        # Same non-overlapping left-to-right matches str.count would find
+        fence_pos = self._fence_pos
+        i = text.find("```", max(fence_pos - offset, 0))
+        while i >= 0:
+            fence_pos = offset + i + 3
+            self._fence_ends.append(fence_pos)
+            i = text.find("```", i + 3)
+        # A fence split across chunks starts within the last two characters
+        self._fence_pos = max(fence_pos, self._length - 2)
+
+        j = text.find("\n\n", max(scanned - 1, 1) - offset)
+        while j >= 0:
+            cut = offset + j
+            while self._fence_ends and self._fence_ends[0] <= cut:
+                self._fence_ends.popleft()
+                self._fences += 1
+            if self._fences % 2 == 0:
+                self._cut, self._cut_fences = cut, self._fences
+            j = text.find("\n\n", j + 1)
+
+        if not self._cut:
+            return ""
+        return self._emit(self._release())
+
+    def _release(self) -> str:
+        """Split the unreleased text at the last safe cut and rebase the scan state onto the rest"""
+        cut = self._cut
+        text = "".join(self._parts)
+        block, rest = text[:cut], text[cut:]
+        self._parts = [rest]
+        self._length = len(rest)
+        self._fence_pos -= cut
+        self._fence_ends = deque(end - cut for end in self._fence_ends)
+        self._fences -= self._cut_fences
+        self._cut = self._cut_fences = 0
+        return block
+
+    def flush(self) -> str:
+        block = "".join(self._parts)
+        self._reset()
+        return self._emit(block)
+
+    def _emit(self, block: str) -> str:
+        cleaned = clean_ai_text(block)
+        if not cleaned:
+            return ""
+        separator = "\n\n" if self._started else ""
+        self._started = True
+        return separator + cleaned
@@ -0,0 +1,31 @@
+"""
+Timestamps are stored as native BSON dates (UTC, read back tz-aware).
+
+Documents written before the switch hold ISO-8601 strings instead;
+`parse_timestamp` accepts both so every read path keeps working until
+`migrate_timestamps.py` has converted the data. API input goes through it
+too: values without an offset are taken as UTC (never server-local time)
+and every result is normalized to UTC.
+"""
+from datetime import datetime, timezone
+from typing import Optional, Union
+
+
+def parse_timestamp(value: Union[datetime, str, None]) -> Optional[datetime]:
+    """Native datetimes and ISO-8601 strings (legacy or API input) as tz-aware UTC.
+
+    Raises ValueError for strings that are not ISO-8601.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        # Offset-less values are taken as UTC, which is how BSON stores naive datetimes
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def json_timestamp(value):
+    """JSON-safe form of a timestamp (ISO string), other values unchanged"""
+    return value.isoformat() if isinstance(value, datetime) else value
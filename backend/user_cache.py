@@ -0,0 +1,37 @@
+"""Short-lived cache of authenticated user documents keyed by user_id"""
+from typing import Optional
+
+from cachetools import TTLCache
+
+USER_PROJECTION = {"_id": 0, "password": 0}
+
+
+class UserCache:
+    """LRU-bounded TTL cache in front of `users` lookups.
+
+    Callers that modify a user document must call `invalidate(user_id)`; the
+    TTL bounds how stale an entry can get if a write happens elsewhere.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, db, user_id: str) -> Optional[dict]:
+        user = self._cache.get(user_id)
+        if user is not None:
+            self.hits += 1
+            return dict(user)
+        self.misses += 1
+        user = await db.users.find_one({"user_id": user_id}, USER_PROJECTION)
+        if user:
+            self._cache[user_id] = user
+            return dict(user)
+        return None
+
+    def invalidate(self, user_id: str):
+        self._cache.pop(user_id, None)
+
+    def clear(self):
+        self._cache.clear()
@@ -0,0 +1,26 @@
+"""
+Per-document revision fields used for cache validation.
+
+Every domain document carries `version` (incremented on each write that
+changes its API representation) and `updated_at`. Inserts start from
+`initial_version()`; updates pass their update document through
+`bump_version()`.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def _now(now: Optional[datetime]) -> datetime:
+    return now or datetime.now(timezone.utc)
+
+
+def initial_version(now: Optional[datetime] = None) -> dict:
+    return {"version": 1, "updated_at": _now(now)}
+
+
+def bump_version(update: dict, now: Optional[datetime] = None) -> dict:
+    """Return a copy of a Mongo update document that also advances version/updated_at"""
+    update = dict(update)
+    update["$set"] = {**update.get("$set", {}), "updated_at": _now(now)}
+    update["$inc"] = {**update.get("$inc", {}), "version": 1}
+    return update
@@ -203,16 +203,30 @@ class CareFollowAPITester:
         }
         
         print("🤖 Generating AI instructions (this may take 10-15 seconds)...")
-        success, status, data = self.make_request('POST', 'instructions/generate', instruction_data, self.staff_token, expected_status=200)
-        
-        if success and 'instruction_id' in data:
-            self.created_ids['instruction_id'] = data['instruction_id']
-            has_text = bool(data.get('text_content'))
-            has_audio = bool(data.get('audio_url'))
-            self.log_test("Generate AI instructions", True, f"ID: {data['instruction_id']}, Text: {has_text}, Audio: {has_audio}", "instructions/generate")
-        else:
+        success, status, data = self.make_request('POST', 'instructions/generate', instruction_data, self.staff_token, expected_status=202)
+        if not success or 'job_id' not in data:
             self.log_test("Generate AI instructions", False, f"Status: {status}, Data: {data}", "instructions/generate")
-        return success
+            return False
+        
+        # Generation runs as a background job; poll it until it finishes
+        job_id = data['job_id']
+        deadline = time.time() + 120
+        while data.get('status') in ('queued', 'running') and time.time() < deadline:
+            time.sleep(2)
+            success, status, data = self.make_request('GET', f'instructions/jobs/{job_id}', token=self.staff_token)
+            if not success:
+                self.log_test("Generate AI instructions", False, f"Job poll status: {status}, Data: {data}", f"instructions/jobs/{job_id}")
+                return False
+        
+        instruction = data.get('instruction') or {}
+        if data.get('status') == 'done' and instruction.get('instruction_id'):
+            self.created_ids['instruction_id'] = instruction['instruction_id']
+            has_text = bool(instruction.get('text_content'))
+            has_audio = bool(instruction.get('audio_url'))
+            self.log_test("Generate AI instructions", has_text, f"ID: {instruction['instruction_id']}, Text: {has_text}, Audio: {has_audio}", "instructions/generate")
+            return has_text
+        self.log_test("Generate AI instructions", False, f"Job {job_id} ended as {data.get('status')}: {data.get('error')}", f"instructions/jobs/{job_id}")
+        return False
 
     def test_list_instructions(self):
         """Test listing instructions"""
@@ -4,3 +4,8 @@ import { twMerge } from "tailwind-merge"
 export function cn(...inputs) {
   return twMerge(clsx(inputs));
 }
+
+// Backend media URLs (e.g. instruction audio) are relative to the API host
+export function mediaUrl(url) {
+  return url && url.startsWith('/') ? `${process.env.REACT_APP_BACKEND_URL}${url}` : url;
+}
@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import Layout from '../components/Layout';
 import { api } from '../contexts/AuthContext';
+import { mediaUrl } from '../lib/utils';
 import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card';
 import { Button } from '../components/ui/button';
 import { Label } from '../components/ui/label';
@@ -87,16 +88,27 @@ const Instructions = () => {
         });
       }, 5000);
 
-      const response = await api.post('/instructions/generate', {
+      // Generation runs as a background job; poll until it finishes
+      let { data: job } = await api.post('/instructions/generate', {
         appointment_id: selectedAppointment,
         generate_audio: generateAudio
-      }, {
-        timeout: 180000 // 3 minutes for AI + audio generation
       });
+      const deadline = Date.now() + 180000; // 3 minutes for AI + audio generation
+      while (job.status === 'queued' || job.status === 'running') {
+        if (Date.now() > deadline) {
+          clearInterval(progressInterval);
+          throw Object.assign(new Error('timeout'), { code: 'ECONNABORTED' });
+        }
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        ({ data: job } = await api.get(`/instructions/jobs/${job.job_id}`));
+      }
       
       clearInterval(progressInterval);
+      if (job.status !== 'done') {
+        throw Object.assign(new Error(job.error), { response: { data: { detail: job.error } } });
+      }
       toast.success('Orientações geradas com sucesso!');
-      setInstructions([response.data, ...instructions]);
+      setInstructions([job.instruction, ...instructions]);
       setSelectedAppointment('');
     } catch (error) {
       if (error.code === 'ECONNABORTED' || error.message?.includes('timeout')) {
@@ -246,7 +258,7 @@ const Instructions = () => {
                     {ins.audio_url && (
                       <div className="mt-4 p-4 bg-white rounded-lg border">
                         <p className="text-sm text-slate-500 mb-2">Áudio das orientações:</p>
-                        <audio controls className="w-full" src={ins.audio_url}>
+                        <audio controls className="w-full" src={mediaUrl(ins.audio_url)}>
                           Seu navegador não suporta áudio.
                         </audio>
                       </div>
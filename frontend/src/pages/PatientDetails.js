@@ -2,6 +2,7 @@ import React, { useEffect, useState, useCallback } from 'react';
 import { useParams, Link } from 'react-router-dom';
 import Layout from '../components/Layout';
 import { api } from '../contexts/AuthContext';
+import { mediaUrl } from '../lib/utils';
 import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card';
 import { Button } from '../components/ui/button';
 import { Badge } from '../components/ui/badge';
@@ -203,7 +204,7 @@ const PatientDetails = () => {
                     </div>
                     <p className="text-slate-700 text-sm whitespace-pre-wrap line-clamp-4">{ins.text_content}</p>
                     {ins.audio_url && (
-                      <audio controls className="w-full mt-3" src={ins.audio_url}>
+                      <audio controls className="w-full mt-3" src={mediaUrl(ins.audio_url)}>
                         Seu navegador não suporta áudio.
                       </audio>
                     )}
@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
 import { api } from '../contexts/AuthContext';
+import { mediaUrl } from '../lib/utils';
 import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card';
 import { Button } from '../components/ui/button';
 import { Badge } from '../components/ui/badge';
@@ -37,7 +38,22 @@ const PatientPortal = () => {
   const fetchPortalData = async () => {
     try {
       const response = await api.get('/patient/portal');
-      setData(response.data);
+      const portal = response.data;
+      // Sections longer than one page come back with a cursor for the rest
+      let cursors = portal.next_cursors || {};
+      while (Object.keys(cursors).length) {
+        const params = Object.fromEntries(
+          Object.entries(cursors).map(([section, cursor]) => [`${section}_cursor`, cursor])
+        );
+        const { data: page } = await api.get('/patient/portal', { params });
+        const next = {};
+        Object.keys(cursors).forEach((section) => {
+          portal[section] = portal[section].concat(page[section]);
+          if (page.next_cursors?.[section]) next[section] = page.next_cursors[section];
+        });
+        cursors = next;
+      }
+      setData(portal);
     } catch (error) {
       toast.error('Erro ao carregar dados');
     } finally {
@@ -145,7 +161,7 @@ const PatientPortal = () => {
                     </div>
                     <p className="text-slate-700 text-sm whitespace-pre-wrap leading-relaxed">{cleanAIText(ins.text_content)}</p>
                     {ins.audio_url && (
-                      <audio controls className="w-full mt-4" src={ins.audio_url}>
+                      <audio controls className="w-full mt-4" src={mediaUrl(ins.audio_url)}>
                         Seu navegador não suporta áudio.
                       </audio>
                     )}
@@ -0,0 +1,49 @@
+"""
+Shared test setup.
+
+`server` is imported once per session against mongomock (Motor's client is
+swapped before the import), with the job queue in-process and the reminder
+dispatcher off. The `api` fixture runs the app's lifespan in a TestClient on
+an empty database with the production indexes.
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Nothing listens on port 1; tests that need a real, unreachable client build one from this URL
+os.environ["MONGO_URL"] = "mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=200&connectTimeoutMS=200"
+os.environ.setdefault("DB_NAME", "carefollow_test")
+os.environ["MONGO_READY_TIMEOUT_MS"] = "500"
+os.environ["JOB_QUEUE_BACKEND"] = "local"
+os.environ["REMINDER_DISPATCHER_ENABLED"] = "false"
+
+import motor.motor_asyncio as motor_asyncio  # noqa: E402
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+RealMotorClient = motor_asyncio.AsyncIOMotorClient
+motor_asyncio.AsyncIOMotorClient = lambda *args, **kwargs: AsyncMongoMockClient(tz_aware=kwargs.get("tz_aware", False))
+
+import server  # noqa: E402
+
+
+@pytest.fixture
+def api():
+    from starlette.testclient import TestClient
+
+    with TestClient(server.app) as client:
+        client.portal.call(server.client.drop_database, os.environ["DB_NAME"])
+        # Dropping the database also drops the indexes the lifespan created
+        client.portal.call(server.ensure_indexes, server.db)
+        server.user_cache.clear()
+        yield client
+
+
+@pytest.fixture
+def staff_headers(api) -> dict:
+    response = api.post("/api/auth/register", json={"email": "staff@example.com", "password": "secret", "name": "Staff"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,87 @@
+"""Range requests on instruction audio, and media and session tokens kept apart"""
+import base64
+
+import pytest
+
+import server
+from blobstore import RangeNotSatisfiable, parse_range
+
+AUDIO = bytes(range(100))
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=10-19", (10, 19)),
+    ("bytes=0-0", (0, 0)),
+    ("bytes=90-500", (90, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes=40-", (40, 99)),
+    (None, None),
+    ("items=0-10", None),
+    ("bytes=0-1,5-6", None),
+    ("bytes=a-b", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, len(AUDIO)) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=150-200", "bytes=20-10", "bytes=-0"])
+def test_unsatisfiable_ranges(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, len(AUDIO))
+
+
+@pytest.fixture
+def instruction_id(api) -> str:
+    # mongomock has no GridFS, so the audio is stored the legacy way, inline as a data URL
+    api.portal.call(server.db.care_instructions.insert_one, {
+        "instruction_id": "inst_1",
+        "patient_id": "pat_1",
+        "audio_url": "data:audio/mpeg;base64," + base64.b64encode(AUDIO).decode(),
+    })
+    return "inst_1"
+
+
+def audio_url(instruction_id, token=None):
+    url = f"/api/instructions/{instruction_id}/audio"
+    return f"{url}?token={token}" if token else url
+
+
+def test_range_requests_over_the_endpoint(api, instruction_id):
+    token = server.create_media_token(instruction_id)
+    full = api.get(audio_url(instruction_id, token))
+    assert full.status_code == 200
+    assert full.content == AUDIO
+    assert full.headers["accept-ranges"] == "bytes"
+
+    for header, start, end in (("bytes=10-19", 10, 19), ("bytes=-5", 95, 99), ("bytes=90-", 90, 99)):
+        part = api.get(audio_url(instruction_id, token), headers={"Range": header})
+        assert part.status_code == 206
+        assert part.content == AUDIO[start:end + 1]
+        assert part.headers["content-range"] == f"bytes {start}-{end}/100"
+        assert part.headers["content-length"] == str(end - start + 1)
+
+    unsatisfiable = api.get(audio_url(instruction_id, token), headers={"Range": "bytes=100-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == "bytes */100"
+
+
+def test_staff_bearer_token_reads_audio(api, staff_headers, instruction_id):
+    assert api.get(audio_url(instruction_id), headers=staff_headers).content == AUDIO
+
+
+def test_media_token_is_not_a_bearer_token(api, instruction_id):
+    headers = {"Authorization": f"Bearer {server.create_media_token(instruction_id)}"}
+    assert api.get("/api/auth/me", headers=headers).status_code == 401
+    assert api.get(f"/api/instructions/{instruction_id}", headers=headers).status_code == 401
+    assert api.get(audio_url(instruction_id), headers=headers).status_code == 401
+
+
+def test_session_token_is_not_a_media_token(api, staff_headers, instruction_id):
+    session_token = staff_headers["Authorization"].removeprefix("Bearer ")
+    assert api.get(audio_url(instruction_id, session_token)).status_code == 401
+
+
+def test_media_token_is_scoped_to_one_instruction(api, instruction_id):
+    other = server.create_media_token("inst_other")
+    assert api.get(audio_url(instruction_id, other)).status_code == 401
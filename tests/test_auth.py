@@ -0,0 +1,31 @@
+"""Concurrent sign-ups with the same email are rejected cleanly by the unique index"""
+import server
+
+
+def race_on_hash(monkeypatch, email):
+    """Insert a user with `email` while the endpoint is hashing, i.e. after its existence check"""
+    run = server.cpu_pool.run
+
+    async def run_then_insert(fn, *args):
+        hashed = await run(fn, *args)
+        await server.db.users.insert_one({"user_id": "user_racer", "email": email, "role": "staff"})
+        monkeypatch.setattr(server.cpu_pool, "run", run)
+        return hashed
+
+    monkeypatch.setattr(server.cpu_pool, "run", run_then_insert)
+
+
+def test_register_race_returns_400(api, monkeypatch):
+    race_on_hash(monkeypatch, "dup@example.com")
+    response = api.post("/api/auth/register", json={"email": "dup@example.com", "password": "secret", "name": "Dup"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
+
+
+def test_create_patient_keeps_a_concurrently_created_account(api, staff_headers, monkeypatch):
+    race_on_hash(monkeypatch, "pat@example.com")
+    response = api.post("/api/patients", json={"name": "Pat", "email": "pat@example.com", "phone": "1"},
+                        headers=staff_headers)
+    assert response.status_code == 200
+    users = api.portal.call(server.db.users.find({"email": "pat@example.com"}).to_list, None)
+    assert [user["user_id"] for user in users] == ["user_racer"]
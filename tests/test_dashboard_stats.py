@@ -0,0 +1,85 @@
+"""Counter rebuilds never overwrite increments that race them, and drift is reconciled"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+from dashboard_stats import COUNTERS_ID, DashboardCounters  # noqa: E402
+
+
+def fresh_db():
+    return AsyncMongoMockClient()["carefollow_test"]
+
+
+def test_read_rebuilds_a_missing_document():
+    async def scenario():
+        db = fresh_db()
+        await db.patients.insert_many([{"patient_id": "p1"}, {"patient_id": "p2"}])
+        counters = DashboardCounters(db)
+        assert (await counters.read())["total_patients"] == 2
+        await counters.bump(total_patients=1)
+        assert (await counters.read())["total_patients"] == 3
+
+    asyncio.run(scenario())
+
+
+def test_increment_during_rebuild_is_not_overwritten():
+    async def scenario():
+        db = fresh_db()
+        counters = DashboardCounters(db)
+        await counters.recompute()
+        count_documents = type(db.patients).count_documents
+        raced = []
+
+        async def count_then_race(collection, query, *args, **kwargs):
+            count = await count_documents(collection, query, *args, **kwargs)
+            if collection.name == "patients" and not raced:
+                # A patient is created (and counted in) after this count has run
+                raced.append(True)
+                await db.patients.insert_one({"patient_id": "late"})
+                await counters.bump(total_patients=1)
+            return count
+
+        type(db.patients).count_documents = count_then_race
+        try:
+            values = await counters.recompute()
+        finally:
+            type(db.patients).count_documents = count_documents
+        assert values["total_patients"] == 1
+        assert (await counters.read())["total_patients"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_rebuild_adopts_a_document_without_version():
+    async def scenario():
+        db = fresh_db()
+        await db.counters.insert_one({"_id": COUNTERS_ID, "total_patients": 7})
+        counters = DashboardCounters(db)
+        assert (await counters.recompute())["total_patients"] == 0
+        assert (await db.counters.find_one({"_id": COUNTERS_ID}))["version"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_periodic_reconciliation_corrects_drift():
+    async def scenario():
+        db = fresh_db()
+        counters = DashboardCounters(db)
+        await counters.recompute()
+        # Written outside the API, so no bump
+        await db.followups.insert_one({"followup_id": "f1", "completed": False})
+        counters.start(0.01)
+        try:
+            for _ in range(100):
+                if (await counters.read())["pending_followups"] == 1:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await counters.stop()
+        assert (await counters.read())["pending_followups"] == 1
+
+    asyncio.run(scenario())
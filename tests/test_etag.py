@@ -0,0 +1,101 @@
+"""Conditional GETs: JSON responses are tagged and revalidated, everything else passes through"""
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import server
+from etag import ETagMiddleware
+from versioning import bump_version
+
+
+async def items(request):
+    return JSONResponse({"items": [1, 2, 3]})
+
+
+async def missing(request):
+    return JSONResponse({"detail": "Not found"}, status_code=404)
+
+
+async def ndjson(request):
+    async def lines():
+        yield b'{"n":1}\n'
+        yield b'{"n":2}\n'
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+async def events(request):
+    async def lines():
+        yield b"data: one\n\n"
+    return StreamingResponse(lines(), media_type="text/event-stream")
+
+
+async def text(request):
+    return PlainTextResponse("plain")
+
+
+app = Starlette(routes=[
+    Route("/items", items, methods=["GET", "POST"]),
+    Route("/missing", missing),
+    Route("/ndjson", ndjson),
+    Route("/events", events),
+    Route("/text", text),
+])
+app.add_middleware(ETagMiddleware)
+client = TestClient(app)
+
+
+def test_get_is_tagged():
+    response = client.get("/items")
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith('"')
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert response.json() == {"items": [1, 2, 3]}
+
+
+def test_matching_if_none_match_is_an_empty_304():
+    etag = client.get("/items").headers["etag"]
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        response = client.get("/items", headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert "content-type" not in response.headers
+        assert "content-length" not in response.headers
+
+
+def test_stale_if_none_match_gets_the_body():
+    response = client.get("/items", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+    assert response.json() == {"items": [1, 2, 3]}
+
+
+def test_streaming_responses_pass_through():
+    for path, body in (("/ndjson", b'{"n":1}\n{"n":2}\n'), ("/events", b"data: one\n\n"), ("/text", b"plain")):
+        response = client.get(path, headers={"If-None-Match": "*"})
+        assert response.status_code == 200
+        assert response.content == body
+        assert "etag" not in response.headers
+
+
+def test_non_get_and_errors_are_not_tagged():
+    assert "etag" not in client.post("/items").headers
+    response = client.get("/missing", headers={"If-None-Match": "*"})
+    assert response.status_code == 404
+    assert "etag" not in response.headers
+
+
+def test_patient_etag_follows_its_version(api, staff_headers):
+    patient = api.post("/api/patients", json={"name": "Ana", "email": "ana@example.com", "phone": "1"},
+                       headers=staff_headers).json()
+    url = f"/api/patients/{patient['patient_id']}"
+    etag = api.get(url, headers=staff_headers).headers["etag"]
+    assert etag == f'"{patient["patient_id"]}.v1"'
+    assert api.get(url, headers={**staff_headers, "If-None-Match": etag}).status_code == 304
+
+    api.portal.call(server.db.patients.update_one, {"patient_id": patient["patient_id"]},
+                    bump_version({"$set": {"phone": "2"}}))
+    response = api.get(url, headers={**staff_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{patient["patient_id"]}.v2"'
+    assert response.json()["phone"] == "2"
@@ -0,0 +1,122 @@
+"""Pooled outbound clients: connection reuse against a local stub server, and retries"""
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from http_clients import HttpClients  # noqa: E402
+
+FAST_RETRIES = {"HTTP_RETRY_BASE_DELAY": "0.001"}
+
+
+async def start_stub_server(statuses):
+    """HTTP/1.1 keep-alive server answering with `statuses` in turn; records each client port"""
+    ports = []
+    pending = list(statuses)
+
+    async def handle(reader, writer):
+        ports.append(writer.get_extra_info("peername")[1])
+        while True:
+            try:
+                await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            status = pending.pop(0) if pending else 200
+            body = b'{"ok": true}' if status == 200 else b""
+            writer.write(
+                b"HTTP/1.1 %d X\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n" % (status, len(body))
+                + body
+            )
+            await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1], ports
+
+
+def test_requests_share_one_keepalive_connection():
+    async def scenario():
+        server, port, connections = await start_stub_server([200, 503, 200, 200])
+        clients = HttpClients(FAST_RETRIES)
+        clients.register("stub", f"http://127.0.0.1:{port}")
+        try:
+            responses = [await clients.request("stub", "GET", "/session") for _ in range(3)]
+            assert clients.client("stub") is clients.client("stub")
+        finally:
+            await clients.aclose()
+            server.close()
+            await server.wait_closed()
+        return responses, connections
+
+    responses, connections = asyncio.run(scenario())
+    # The 503 was retried on the same connection
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert len(connections) == 1
+
+
+def test_idempotent_requests_retry_transport_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        if len(calls) < 3:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200, json={"ok": True})
+
+    async def scenario():
+        clients = HttpClients(FAST_RETRIES)
+        clients.register("mock", "http://mock", transport=httpx.MockTransport(handler))
+        try:
+            return await clients.request("mock", "GET", "/")
+        finally:
+            await clients.aclose()
+
+    assert asyncio.run(scenario()).json() == {"ok": True}
+    assert calls == ["GET", "GET", "GET"]
+
+
+def test_non_idempotent_requests_are_not_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        return httpx.Response(503)
+
+    async def scenario():
+        clients = HttpClients(FAST_RETRIES)
+        clients.register("mock", "http://mock", transport=httpx.MockTransport(handler))
+        try:
+            return await clients.request("mock", "POST", "/", json={})
+        finally:
+            await clients.aclose()
+
+    assert asyncio.run(scenario()).status_code == 503
+    assert calls == ["POST"]
+
+
+def test_retries_give_up_after_the_limit():
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        return httpx.Response(502)
+
+    async def scenario():
+        clients = HttpClients({**FAST_RETRIES, "HTTP_RETRIES": "2"})
+        clients.register("mock", "http://mock", transport=httpx.MockTransport(handler))
+        try:
+            return await clients.request("mock", "GET", "/")
+        finally:
+            await clients.aclose()
+
+    assert asyncio.run(scenario()).status_code == 502
+    assert len(calls) == 3
+
+
+def test_http2_enabled_when_h2_is_installed():
+    clients = HttpClients({})
+    assert clients.http2 is True
+    assert HttpClients({"HTTP2_ENABLED": "false"}).http2 is False
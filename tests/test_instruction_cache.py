@@ -0,0 +1,98 @@
+"""ContentCache: TTL expiry, LRU eviction and the in-process L1 in front of Mongo"""
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from cachetools import TTLCache  # noqa: E402
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+from instruction_cache import ContentCache, instruction_cache_key  # noqa: E402
+
+
+def fresh_collection():
+    return AsyncMongoMockClient(tz_aware=True)["carefollow_test"]["instruction_cache"]
+
+
+def test_key_ignores_case_and_whitespace_but_not_the_model():
+    key = instruction_cache_key("Knee  surgery", "ACL tear", None, "v1", "gpt")
+    assert key == instruction_cache_key("knee surgery ", "acl tear", "", "v1", "gpt")
+    assert key != instruction_cache_key("knee surgery", "acl tear", None, "v1", "other")
+
+
+def test_round_trip_counts_hits_and_misses():
+    async def scenario():
+        collection = fresh_collection()
+        cache = ContentCache(collection, ttl_seconds=3600, max_entries=10)
+        assert await cache.get("k") is None
+        await cache.put("k", "value")
+        assert await cache.get("k") == "value"
+        assert await cache.get("k") == "value"
+        assert (cache.hits, cache.misses) == (2, 1)
+        assert (await collection.find_one({"key": "k"}))["hits"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_expired_entries_are_misses():
+    async def scenario():
+        collection = fresh_collection()
+        cache = ContentCache(collection, ttl_seconds=3600, max_entries=10)
+        await cache.put("k", "value")
+        # What the TTL monitor would eventually delete is already ignored by reads
+        await collection.update_one({"key": "k"}, {"$set": {"expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)}})
+        assert await cache.get("k") is None
+        # Writing again refreshes the expiry
+        await cache.put("k", "fresh")
+        assert await cache.get("k") == "fresh"
+
+    asyncio.run(scenario())
+
+
+def test_least_recently_used_entries_are_evicted():
+    async def scenario():
+        collection = fresh_collection()
+        cache = ContentCache(collection, ttl_seconds=3600, max_entries=2)
+        # BSON dates have millisecond resolution; keep the access times distinct
+        for step in (cache.put("a", "A"), cache.put("b", "B"), cache.get("a"), cache.put("c", "C")):
+            await step
+            await asyncio.sleep(0.005)
+        assert sorted(doc["key"] for doc in await collection.find({}).to_list(None)) == ["a", "c"]
+        assert await cache.get("b") is None
+
+    asyncio.run(scenario())
+
+
+def test_l1_fills_from_mongo_and_serves_without_it():
+    async def scenario():
+        collection = fresh_collection()
+        writer = ContentCache(collection, ttl_seconds=3600, max_entries=10, l1_size=4)
+        reader = ContentCache(collection, ttl_seconds=3600, max_entries=10, l1_size=4)
+        await writer.put("k", "value")
+        assert "k" in writer.l1
+        # Another process sees the entry through Mongo and keeps it in its own L1
+        assert "k" not in reader.l1
+        assert await reader.get("k") == "value"
+        assert reader.l1["k"] == "value"
+        await collection.delete_many({})
+        assert await reader.get("k") == "value"
+        assert await ContentCache(collection, ttl_seconds=3600, max_entries=10).get("k") is None
+
+    asyncio.run(scenario())
+
+
+def test_l1_entries_expire_with_the_mongo_ttl():
+    async def scenario():
+        now = [0.0]
+        cache = ContentCache(fresh_collection(), ttl_seconds=60, max_entries=10, l1_size=4)
+        cache.l1 = TTLCache(maxsize=4, ttl=60, timer=lambda: now[0])
+        await cache.put("k", "value")
+        await cache.collection.update_one({"key": "k"}, {"$set": {"expires_at": datetime.now(timezone.utc)}})
+        assert await cache.get("k") == "value"
+        now[0] = 61
+        assert await cache.get("k") is None
+        assert "k" not in cache.l1
+
+    asyncio.run(scenario())
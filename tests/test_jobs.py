@@ -0,0 +1,107 @@
+"""Job workers survive storage errors, and only the lease owner records a result"""
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+from jobs import DONE, FAILED, QUEUED, RUNNING, LocalJobQueue, MongoJobQueue  # noqa: E402
+
+
+async def echo(payload):
+    return {"echo": payload["n"]}
+
+
+async def wait_for_status(queue, job_id, statuses, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        job = await queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    return await queue.get(job_id)
+
+
+def test_worker_survives_a_failing_finish():
+    class FlakyQueue(LocalJobQueue):
+        failures = 1
+
+        async def _finish(self, job, fields):
+            if self.failures:
+                self.failures -= 1
+                job["status"] = QUEUED
+                self._queue.put_nowait(job["job_id"])
+                raise ConnectionError("mongo went away")
+            return await super()._finish(job, fields)
+
+    async def scenario():
+        queue = FlakyQueue(echo, workers=1, poll_interval=0.01)
+        queue.start()
+        try:
+            first = await queue.enqueue({"n": 1})
+            second = await queue.enqueue({"n": 2})
+            return [await wait_for_status(queue, job["job_id"], (DONE, FAILED)) for job in (first, second)]
+        finally:
+            await queue.stop()
+
+    jobs = asyncio.run(scenario())
+    assert [job["status"] for job in jobs] == [DONE, DONE]
+    assert jobs[1]["result"] == {"echo": 2}
+
+
+def test_lease_is_renewed_while_the_handler_runs():
+    async def slow(payload):
+        await asyncio.sleep(0.25)
+        return {"ok": True}
+
+    async def scenario():
+        collection = AsyncMongoMockClient()["jobs_test"]["generation_jobs"]
+        queue = MongoJobQueue(collection, slow, lease_seconds=0.06)
+        job = {"job_id": "job_renew", "status": RUNNING, "payload": {}, "lease_owner": "me", "attempts": 1,
+               "lease_until": queue._lease_until()}
+        await collection.insert_one(dict(job))
+        await queue._run(job)
+        return await queue.get("job_renew")
+
+    job = asyncio.run(scenario())
+    assert job["status"] == DONE
+    assert "lease_owner" not in job
+
+
+def test_result_is_discarded_after_the_lease_was_taken_over():
+    async def scenario():
+        collection = AsyncMongoMockClient()["jobs_test"]["generation_jobs"]
+        queue = MongoJobQueue(collection, echo)
+        await collection.insert_one({"job_id": "job_stolen", "status": RUNNING, "payload": {"n": 1},
+                                     "lease_owner": "other", "attempts": 2})
+        await queue._run({"job_id": "job_stolen", "payload": {"n": 1}, "lease_owner": "me", "attempts": 1})
+        return await queue.get("job_stolen")
+
+    job = asyncio.run(scenario())
+    assert job["status"] == RUNNING
+    assert job["lease_owner"] == "other"
+
+
+def test_jobs_fail_once_claimed_too_often():
+    calls = []
+
+    async def handler(payload):
+        calls.append(payload)
+        return {}
+
+    async def scenario():
+        collection = AsyncMongoMockClient()["jobs_test"]["generation_jobs"]
+        queue = MongoJobQueue(collection, handler, max_attempts=3)
+        expired = datetime.now(timezone.utc) - timedelta(seconds=1)
+        await collection.insert_one({"job_id": "job_poison", "status": RUNNING, "payload": {}, "lease_owner": "x",
+                                     "attempts": 4, "lease_until": expired})
+        await queue._run({"job_id": "job_poison", "payload": {}, "lease_owner": "x", "attempts": 4})
+        return await queue.get("job_poison")
+
+    job = asyncio.run(scenario())
+    assert job["status"] == FAILED
+    assert "3 attempts" in job["error"]
+    assert calls == []
@@ -0,0 +1,39 @@
+"""String timestamps become dates, and versioned documents are bumped so caches revalidate"""
+import asyncio
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+from migrate_timestamps import migrate  # noqa: E402
+
+
+def test_conversion_bumps_versioned_documents_only():
+    async def scenario():
+        db = AsyncMongoMockClient(tz_aware=True)["carefollow_test"]
+        await db.patients.insert_many([
+            {"patient_id": "legacy", "created_at": "2024-05-01T10:00:00", "updated_at": "2024-05-01T10:00:00", "version": 1},
+            {"patient_id": "native", "created_at": datetime(2024, 5, 1, tzinfo=timezone.utc), "version": 3},
+        ])
+        await db.users.insert_one({"user_id": "u1", "created_at": "2024-05-01T10:00:00+00:00"})
+
+        results = await migrate(db)
+        assert results["patients"] == {"converted": 1, "unparseable": 0}
+        legacy = await db.patients.find_one({"patient_id": "legacy"})
+        assert legacy["created_at"] == datetime(2024, 5, 1, 10, tzinfo=timezone.utc)
+        assert isinstance(legacy["updated_at"], datetime)
+        assert legacy["updated_at"] > legacy["created_at"]
+        assert legacy["version"] == 2
+        assert (await db.patients.find_one({"patient_id": "native"}))["version"] == 3
+        user = await db.users.find_one({"user_id": "u1"})
+        assert isinstance(user["created_at"], datetime)
+        assert "version" not in user
+
+        # A second run finds nothing left to convert and bumps nothing
+        assert (await migrate(db))["patients"]["converted"] == 0
+        assert (await db.patients.find_one({"patient_id": "legacy"}))["version"] == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,98 @@
+"""Pool slots are held until the offloaded work finishes, even if the caller is cancelled"""
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from offload import BoundedExecutor, OffloadSaturated  # noqa: E402
+
+
+def thread_pool(workers: int, max_queue: int) -> BoundedExecutor:
+    return BoundedExecutor("test", lambda n: ThreadPoolExecutor(max_workers=n), workers=workers, max_queue=max_queue)
+
+
+async def wait_until(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition() and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+    assert condition()
+
+
+def test_cancelled_caller_keeps_the_slot_until_the_work_ends():
+    async def scenario():
+        pool = thread_pool(workers=1, max_queue=0)
+        started, release = threading.Event(), threading.Event()
+
+        def blocking():
+            started.set()
+            release.wait(5)
+            return "done"
+
+        task = asyncio.create_task(pool.run(blocking))
+        await wait_until(started.is_set)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The thread is still busy, so the pool must still count it
+        assert pool.pending == 1
+        with pytest.raises(OffloadSaturated):
+            await pool.run(lambda: None)
+
+        release.set()
+        await wait_until(lambda: pool.pending == 0)
+        assert await pool.run(lambda: 42) == 42
+        assert pool.stats()["completed"] == 2
+        assert pool.stats()["rejected"] == 1
+        pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_queued_work_frees_its_slot():
+    async def scenario():
+        pool = thread_pool(workers=1, max_queue=1)
+        started, release = threading.Event(), threading.Event()
+        ran = []
+
+        def blocking():
+            started.set()
+            release.wait(5)
+
+        running = asyncio.create_task(pool.run(blocking))
+        await wait_until(started.is_set)
+        queued = asyncio.create_task(pool.run(ran.append, "queued"))
+        await wait_until(lambda: pool.pending == 2)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        # Never started, so it is dropped and its slot is free again
+        assert pool.pending == 1
+
+        release.set()
+        await running
+        assert pool.pending == 0
+        assert ran == []
+        pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_failures_are_counted():
+    async def scenario():
+        pool = thread_pool(workers=1, max_queue=0)
+
+        def boom():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            await pool.run(boom)
+        await wait_until(lambda: pool.pending == 0)
+        assert pool.stats()["failed"] == 1
+        pool.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,40 @@
+"""The portal returns every section in full by default and pages them on request"""
+from datetime import datetime, timedelta, timezone
+
+import server
+
+REMINDERS = 150
+
+
+def seed_patient(api, staff_headers) -> dict:
+    patient = api.post("/api/patients", json={"name": "Ana", "email": "ana@example.com", "phone": "1"},
+                       headers=staff_headers).json()
+    start = datetime.now(timezone.utc)
+    api.portal.call(server.db.reminders.insert_many, [
+        {"reminder_id": f"rem_{n:04d}", "patient_id": patient["patient_id"], "message": "m", "reminder_type": "email",
+         "scheduled_for": start, "sent": False, "sent_at": None, "created_at": start + timedelta(seconds=n)}
+        for n in range(REMINDERS)
+    ])
+    login = api.post("/api/auth/login", json={"email": "ana@example.com", "password": server.PATIENT_TEMP_PASSWORD})
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+def test_default_page_holds_more_than_a_hundred_items(api, staff_headers):
+    headers = seed_patient(api, staff_headers)
+    portal = api.get("/api/patient/portal", headers=headers).json()
+    assert len(portal["reminders"]) == REMINDERS
+    assert portal["next_cursors"] == {}
+
+
+def test_sections_larger_than_one_page_follow_their_cursor(api, staff_headers):
+    headers = seed_patient(api, staff_headers)
+    seen = []
+    params = {"limit": 40}
+    while True:
+        portal = api.get("/api/patient/portal", params=params, headers=headers).json()
+        seen += [r["reminder_id"] for r in portal["reminders"]]
+        cursor = portal["next_cursors"].get("reminders")
+        if not cursor:
+            break
+        params = {"limit": 40, "reminders_cursor": cursor}
+    assert seen == [f"rem_{n:04d}" for n in range(REMINDERS)]
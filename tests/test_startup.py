@@ -0,0 +1,38 @@
+"""The API must start and report itself unready while MongoDB is down"""
+import asyncio
+import os
+
+import httpx
+
+import server
+
+from .conftest import RealMotorClient
+
+
+async def probe_while_mongo_down():
+    async with server.app.router.lifespan_context(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            health = await http.get("/health")
+            ready = await http.get("/ready")
+    return health, ready
+
+
+def test_startup_survives_unreachable_mongo(monkeypatch):
+    # A real driver client: mongomock would always answer the ping
+    monkeypatch.setattr(server, "client", RealMotorClient(os.environ["MONGO_URL"]))
+    health, ready = asyncio.run(probe_while_mongo_down())
+    # Liveness stays up so the worker is not restarted; it still reports the outage
+    assert health.status_code == 200
+    assert health.json()["status"] == "degraded"
+    assert health.json()["mongo"]["ok"] is False
+    assert ready.status_code == 503
+    assert ready.json()["reason"] == "mongo unreachable"
+    assert ready.json()["mongo"]["ok"] is False
+
+
+def test_health_reports_a_reachable_mongo(api):
+    health = api.get("/health").json()
+    assert health["status"] == "ok"
+    assert health["mongo"]["ok"] is True
+    assert "mongo_pools" in health
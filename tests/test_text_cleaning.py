@@ -0,0 +1,52 @@
+"""clean_ai_text must keep matching the golden corpus produced by the original regex chain"""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from text_cleaning import IncrementalTextCleaner, clean_ai_text  # noqa: E402
+
+CORPUS = json.loads((BACKEND_DIR / "benchmarks" / "clean_ai_text_corpus.json").read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[f"case{i}" for i in range(len(CORPUS))])
+def test_matches_golden_output(case):
+    assert clean_ai_text(case["input"]) == case["expected"]
+
+
+def test_empty_input():
+    assert clean_ai_text("") == ""
+    assert clean_ai_text(None) == ""
+
+
+def clean_chunks(chunks):
+    cleaner = IncrementalTextCleaner()
+    return "".join(cleaner.feed(chunk) for chunk in chunks) + cleaner.flush()
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[f"case{i}" for i in range(len(CORPUS))])
+def test_incremental_matches_whole_text_at_every_split(case):
+    text = case["input"]
+    expected = clean_ai_text(text)
+    for offset in range(len(text) + 1):
+        assert clean_chunks([text[:offset], text[offset:]]) == expected, f"split at {offset}"
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[f"case{i}" for i in range(len(CORPUS))])
+def test_incremental_one_character_at_a_time(case):
+    assert clean_chunks(case["input"]) == clean_ai_text(case["input"])
+
+
+def test_incremental_holds_blank_lines_inside_a_code_fence():
+    cleaner = IncrementalTextCleaner()
+    assert cleaner.feed("Intro\n\n``") == "Intro"
+    # The fence opener arrived split across chunks; nothing is released until it closes
+    assert cleaner.feed("`\nline one\n\nline two\n\n") == ""
+    assert cleaner.feed("``") == ""
+    released = cleaner.feed("`\n\nAfter")
+    assert released == clean_chunks(["Intro\n\n```\nline one\n\nline two\n\n```"])[len("Intro"):]
+    assert cleaner.flush() == "\n\nAfter"
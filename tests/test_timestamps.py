@@ -0,0 +1,32 @@
+"""One rule for timestamps coming from the API or from legacy documents"""
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from timestamps import parse_timestamp  # noqa: E402
+
+EXPECTED = datetime(2031, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("value", [
+    "2031-01-01T12:00:00Z",
+    "2031-01-01T12:00:00+00:00",
+    "2031-01-01T09:00:00-03:00",
+    "2031-01-01T12:00:00",
+    datetime(2031, 1, 1, 12, 0),
+    datetime(2031, 1, 1, 14, 0, tzinfo=timezone(timedelta(hours=2))),
+])
+def test_values_are_normalized_to_utc(value):
+    parsed = parse_timestamp(value)
+    assert parsed == EXPECTED
+    assert parsed.utcoffset() == timedelta(0)
+    assert parsed.tzinfo is timezone.utc
+
+
+def test_invalid_strings_raise_value_error():
+    with pytest.raises(ValueError):
+        parse_timestamp("next tuesday")